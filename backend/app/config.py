@@ -0,0 +1,96 @@
+from typing import Any, Dict, List, Literal, Optional
+
+from pydantic import BaseSettings
+
+
+class Settings(BaseSettings):
+    """Runtime settings, read from NEURONUTRI_* environment variables or .env."""
+
+    # Forest evaluator used at inference time: sklearn's trees, or the
+    # flat-array evaluator in services/forest_compiler.py
+    inference_backend: Literal["sklearn", "compiled"] = "sklearn"
+
+    # How the forest is loaded: unpickled per worker ("joblib"), or the
+    # flat-array export memory-mapped and shared between workers ("mmap")
+    model_storage: Literal["joblib", "mmap"] = "joblib"
+
+    # Where model calls run: on the event loop ("inline"), in a thread pool,
+    # or in a process pool of model replicas
+    inference_executor: Literal["inline", "thread", "process"] = "thread"
+    # Pool size; defaults to the number of CPUs
+    inference_workers: Optional[int] = None
+    # Calls allowed to wait for a worker before /analyze answers 503
+    inference_queue_depth: int = 64
+
+    # Coalesce concurrent /analyze calls into batches scored with one call
+    micro_batching: bool = False
+    # A batch is scored once it holds this many requests...
+    micro_batch_max_size: int = 32
+    # ...or once its first request has waited this long
+    micro_batch_max_wait_ms: float = 2.0
+
+    # /analyze/stream scores its first 16 records as one chunk, then doubles
+    # the chunk size up to this many records per model call
+    stream_chunk_size: int = 1024
+
+    # "fast" validates /analyze request bodies into plain records without
+    # building pydantic models and encodes responses with orjson, skipping
+    # response_model validation; "standard" leaves both to FastAPI
+    serving_mode: Literal["standard", "fast"] = "standard"
+
+    # Forest to serve: the trained one ("full") or the compacted one saved
+    # next to it ("compact"); versions without a compact forest serve "full"
+    model_variant: Literal["full", "compact"] = "full"
+
+    # What to do when no trained model exists at startup: train before
+    # accepting traffic ("blocking"), or serve /health right away and train
+    # in a subprocess, answering /analyze with 503 until it is done
+    model_bootstrap: Literal["blocking", "background"] = "blocking"
+
+    # Seconds between checks of the registry's CURRENT pointer; a new
+    # version is loaded and swapped in automatically. 0 disables the watcher
+    model_watch_interval: float = 0.0
+    # Token required in the X-Admin-Token header by /admin endpoints;
+    # when unset the admin endpoints are disabled
+    admin_token: Optional[str] = None
+
+    # In-process LRU cache of /analyze results; 0 disables the cache
+    prediction_cache_size: int = 10000
+    # Seconds a cached result stays valid
+    prediction_cache_ttl: float = 300.0
+    # Optional cache shared between workers: a SQLite file on local disk
+    # ("disk") or a Redis-compatible server ("redis")
+    prediction_cache_backend: Literal["none", "disk", "redis"] = "none"
+    prediction_cache_path: str = "prediction_cache.sqlite3"
+    prediction_cache_redis_url: str = "redis://localhost:6379/0"
+
+    # Time request stages (parsing, encoding, prediction, recommendations,
+    # serialization) and expose them with service stats on /metrics
+    metrics_enabled: bool = True
+
+    # Hyperparameter search run by model training: forest parameters to try
+    # as a JSON object of lists, e.g. {"max_depth": [8, 12]}. Unset trains
+    # the default parameters only
+    training_param_grid: Optional[Dict[str, List[Any]]] = None
+    # Try every combination ("grid") or training_search_iterations random ones
+    training_search: Literal["grid", "random"] = "grid"
+    training_search_iterations: int = 10
+    training_cv_folds: int = 5
+    # Training processes; defaults to the number of CPUs
+    training_workers: Optional[int] = None
+    # Refit the best parameters on the whole training split ("full"), or keep
+    # the forest already fitted on the best fold ("best_fold")
+    training_refit: Literal["full", "best_fold"] = "full"
+
+    # After training, also save the smallest subset of trees whose test-split
+    # ROC AUC and recall are within these tolerances of the full forest
+    compaction_enabled: bool = True
+    compaction_auc_tolerance: float = 0.005
+    compaction_recall_tolerance: float = 0.01
+
+    class Config:
+        env_prefix = "NEURONUTRI_"
+        env_file = ".env"
+
+
+settings = Settings()
@@ -1,17 +1,39 @@
-from fastapi import FastAPI, HTTPException, Depends
+from fastapi import FastAPI, HTTPException, Depends, Header, Request
 from fastapi.middleware.cors import CORSMiddleware
-from pydantic import BaseModel
-from typing import List, Dict, Any, Optional
+from fastapi.responses import JSONResponse, PlainTextResponse, Response, StreamingResponse
+from pydantic import BaseModel, ValidationError, conint
+from typing import AsyncIterator, Callable, List, Dict, Any, Optional, Tuple
+import asyncio
+import json
 import os
+import sys
 import joblib
+import orjson
 
-from .services.model_trainer import NutritionStrokeModel, train_and_save_model
+from .config import settings
+from .services.analysis import analyze_diet_logs, analyze_patient, analyze_patients, find_similar_patients
+from .services.fast_serving import (
+    FastJSONResponse, FastPathRoute, RecordValidator, fast_path, parse_flag, read_json_body
+)
+from .services.inference import MODELS_DIR, InferenceModel
+from .services.inference_executor import ExecutorSaturated, InferenceExecutor
+from .services.metrics import METRICS, PrometheusWriter, RequestTimingMiddleware, mark_handler_end, mark_handler_start
+from .services.micro_batcher import MicroBatcher
+from .services.prediction_cache import DiskCache, MemoryCache, PredictionCache, RedisCache, cache_key
+from .services.model_registry import ModelRegistry
+
+# Upper bound on records accepted by /analyze/batch in a single request
+MAX_BATCH_SIZE = 10000
+# Longest NDJSON line accepted by /analyze/stream
+MAX_NDJSON_LINE_BYTES = 1 << 20
 
 app = FastAPI(
     title="NeuroNutri Guide API",
     description="API for stroke risk prediction and nutrition recommendations",
     version="1.0.0"
 )
+# Lets endpoints declare a fast path (see serving_mode)
+app.router.route_class = FastPathRoute
 
 # Enable CORS
 app.add_middleware(
@@ -22,6 +44,10 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Per-stage request timings, exposed on /metrics
+METRICS.enabled = settings.metrics_enabled
+app.add_middleware(RequestTimingMiddleware)
+
 # Pydantic models for request/response
 class PatientData(BaseModel):
     age: float
@@ -35,61 +61,717 @@ class PatientData(BaseModel):
     work_type: str = "Private"
     nutrition_data: Optional[Dict[str, float]] = None
 
+# Validates request bodies in the fast serving mode
+PATIENT_VALIDATOR = RecordValidator(PatientData)
+
+class RiskExplanation(BaseModel):
+    # Stroke risk before any feature is taken into account
+    baseline_risk: float
+    # Risk each feature added (or removed), largest first; they add up to
+    # stroke_risk - baseline_risk
+    contributions: Dict[str, float]
+
 class PredictionResult(BaseModel):
     stroke_risk: float
     risk_category: str
     recommendations: List[str]
     nutrition_goals: Dict[str, Any]
+    # Per-nutrient intake findings, present when nutrition_data was given
+    nutrient_analysis: Optional[Dict[str, Any]] = None
+    # Feature contributions to stroke_risk, present when requested with ?explain=true
+    explanation: Optional[RiskExplanation] = None
+
+class ModelReloadRequest(BaseModel):
+    # Version to activate and load; defaults to the registry's current version
+    version: Optional[str] = None
+
+class BatchAnalysisRequest(BaseModel):
+    # Records are validated one by one, so a bad record only fails itself
+    patients: List[Any]
+
+class BatchItemResult(BaseModel):
+    index: int
+    result: Optional[PredictionResult] = None
+    error: Optional[str] = None
+
+class BatchAnalysisResult(BaseModel):
+    results: List[BatchItemResult]
+
+class DietLog(BaseModel):
+    nutrition_data: Dict[str, float]
+    # Attributes the daily goals depend on
+    age: float = 50
+    gender: str = "male"
+    hypertension: int = 0
+    bmi: float = 25
+
+class DietLogBatchRequest(BaseModel):
+    logs: List[DietLog]
+
+class DietLogResult(BaseModel):
+    index: int
+    nutrient_analysis: Optional[Dict[str, Any]] = None
+    recommendations: Optional[List[str]] = None
+    nutrition_goals: Optional[Dict[str, Any]] = None
+    error: Optional[str] = None
+
+class DietLogBatchResult(BaseModel):
+    results: List[DietLogResult]
+
+class SimilarPatientsRequest(BaseModel):
+    patients: List[Dict[str, Any]]
+    k: conint(ge=1, le=100) = 5
+
+class SimilarPatient(BaseModel):
+    distance: float
+    row: int
+    patient: Dict[str, Any]
+
+class SimilarPatientsResult(BaseModel):
+    index: int
+    neighbors: Optional[List[SimilarPatient]] = None
+    error: Optional[str] = None
+
+class SimilarPatientsBatchResult(BaseModel):
+    results: List[SimilarPatientsResult]
+
+def prediction_response(result: Dict[str, Any]) -> Dict[str, Any]:
+    """An analysis shaped as the PredictionResult response_model would return it."""
+    return {field: result.get(field) for field in PredictionResult.__fields__}
+
+def validate_patient(raw: Any) -> Dict[str, Any]:
+    """
+    A PatientData record as a plain dict.
+    
+    In the fast serving mode, records whose values need no coercion skip
+    building the pydantic model.
+    
+    Raises:
+        ValidationError: If the record is not valid PatientData
+    """
+    if settings.serving_mode == "fast":
+        record = PATIENT_VALIDATOR(raw)
+        if record is not None:
+            return record
+    return PatientData.parse_obj(raw).dict()
+
+registry = ModelRegistry(MODELS_DIR)
+
+def load_model_from_disk(version: Optional[str] = None) -> InferenceModel:
+    return registry.load(
+        version,
+        inference_backend=settings.inference_backend,
+        storage=settings.model_storage,
+        variant=settings.model_variant
+    )
+
+def training_stage_timings(version: Optional[str]) -> Dict[str, float]:
+    """Seconds each stage of train() took for a version, from its manifest."""
+    if version is None:
+        return {}
+    try:
+        return registry.read_manifest(version).get('metrics', {}).get('stage_timings', {})
+    except (OSError, ValueError):
+        return {}
+
+async def install_model(model: InferenceModel) -> None:
+    """Make a fully loaded model the one serving requests."""
+    await app.state.executor.swap_model(model)
+    app.state.training_stage_timings = training_stage_timings(model.version)
+    # A single reference assignment: requests see either the old or new model
+    app.state.model = model
+    app.state.model_status = "ready"
+    # Keys include the model version, so this only frees the old results
+    if app.state.prediction_cache is not None:
+        app.state.prediction_cache.clear()
+
+async def swap_in_model(version: Optional[str] = None, activate: bool = False) -> InferenceModel:
+    """
+    Load a registry version in the background and swap it in.
+    
+    The current model keeps serving (including requests already in flight)
+    until the new one is completely loaded and verified. With ``activate``
+    the registry's CURRENT pointer only moves once the new model serves, so
+    a version that fails to load never becomes current. Callers must hold
+    ``app.state.reload_lock``.
+    """
+    loop = asyncio.get_running_loop()
+    model = await loop.run_in_executor(None, load_model_from_disk, version)
+    await install_model(model)
+    if activate:
+        registry.activate(version)
+    print(f"Serving model version {model.version}")
+    return model
+
+async def reload_model(version: Optional[str] = None) -> InferenceModel:
+    """Take the reload lock and swap in a registry version."""
+    async with app.state.reload_lock:
+        return await swap_in_model(version)
+
+async def watch_registry(interval: float) -> None:
+    """Reload whenever the registry's current version changes."""
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            current = registry.current_version()
+            serving = getattr(app.state.model, 'version', None)
+            if current is not None and current != serving and not app.state.reload_lock.locked():
+                await reload_model(current)
+        except Exception as e:
+            print(f"Model reload failed: {str(e)}")
+
+def create_prediction_cache() -> Optional[PredictionCache]:
+    if settings.prediction_cache_size <= 0:
+        return None
+    shared = None
+    if settings.prediction_cache_backend == "disk":
+        shared = DiskCache(settings.prediction_cache_path, ttl=settings.prediction_cache_ttl)
+    elif settings.prediction_cache_backend == "redis":
+        shared = RedisCache(settings.prediction_cache_redis_url, ttl=settings.prediction_cache_ttl)
+    return PredictionCache(MemoryCache(settings.prediction_cache_size, settings.prediction_cache_ttl), shared)
+
+async def score_micro_batch(items: List[Tuple[Dict[str, Any], bool]]) -> List[Dict[str, Any]]:
+    """Score coalesced (record, explain) /analyze requests with one model call."""
+    records = [record for record, _ in items]
+    explain = any(wanted for _, wanted in items)
+    results = await app.state.executor.run(analyze_patients, records, explain)
+    # Explanations are cheap, so the batch is explained if any request asked
+    if explain:
+        for (_, wanted), result in zip(items, results):
+            if not wanted:
+                result.pop('explanation', None)
+    return results
+
+async def bootstrap_models() -> None:
+    """Train models in a subprocess, then load and install them."""
+    backend_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    process = None
+    try:
+        print("Training models in the background...")
+        process = await asyncio.create_subprocess_exec(
+            sys.executable, "-m", "app.services.model_trainer", cwd=backend_dir
+        )
+        returncode = await process.wait()
+        if returncode != 0:
+            raise RuntimeError(f"Model training exited with status {returncode}")
+        
+        await reload_model()
+        print("Background model training complete; model is ready")
+        
+    except asyncio.CancelledError:
+        if process is not None and process.returncode is None:
+            process.kill()
+        raise
+    except Exception as e:
+        print(f"Background model training failed: {str(e)}")
+        app.state.model_status = "failed"
+        app.state.model_error = str(e)
 
 # Load models on startup
 @app.on_event("startup")
 async def load_models():
-    models_dir = os.path.join(os.path.dirname(__file__), "models")
-    os.makedirs(models_dir, exist_ok=True)
+    os.makedirs(MODELS_DIR, exist_ok=True)
+    app.state.model = None
+    app.state.model_status = "loading"
+    app.state.model_error = None
+    app.state.reload_lock = asyncio.Lock()
+    app.state.watch_task = None
+    app.state.prediction_cache = create_prediction_cache()
+    
+    # Run model calls off the event loop
+    app.state.executor = InferenceExecutor(
+        mode=settings.inference_executor,
+        max_workers=settings.inference_workers,
+        queue_depth=settings.inference_queue_depth
+    )
+    
+    # Optionally coalesce concurrent /analyze calls into batches
+    app.state.batcher = None
+    if settings.micro_batching:
+        app.state.batcher = MicroBatcher(
+            score_micro_batch,
+            max_batch_size=settings.micro_batch_max_size,
+            max_wait_ms=settings.micro_batch_max_wait_ms
+        )
+    
+    if settings.model_watch_interval > 0:
+        app.state.watch_task = asyncio.create_task(watch_registry(settings.model_watch_interval))
     
     # Check if models exist, if not, train them
-    model_files = ["stroke_model.joblib", "nutrition_scaler.joblib", "encoders.joblib"]
-    if not all(os.path.exists(os.path.join(models_dir, f)) for f in model_files):
+    if registry.current_version() is None:
+        if settings.model_bootstrap == "background":
+            app.state.model_status = "training"
+            app.state.bootstrap_task = asyncio.create_task(bootstrap_models())
+            return
+        # The training stack is only imported when there is something to train
+        from .services.model_trainer import train_and_save_model
         print("Training models...")
         train_and_save_model()
     
     # Load the models
-    app.state.model = NutritionStrokeModel.load_models(models_dir)
+    await install_model(load_model_from_disk())
+
+@app.on_event("shutdown")
+async def shutdown_executor():
+    for task_name in ('bootstrap_task', 'watch_task'):
+        task = getattr(app.state, task_name, None)
+        if task is not None and not task.done():
+            task.cancel()
+    if hasattr(app.state, 'executor'):
+        app.state.executor.shutdown()
+
+def service_unavailable(detail: str) -> HTTPException:
+    return HTTPException(status_code=503, detail=detail, headers={"Retry-After": "1"})
+
+def require_admin(x_admin_token: Optional[str] = Header(None)) -> None:
+    if settings.admin_token is None:
+        raise HTTPException(status_code=404, detail="Admin endpoints are disabled")
+    if x_admin_token != settings.admin_token:
+        raise HTTPException(status_code=401, detail="Invalid admin token")
+
+def require_model() -> None:
+    """Reject requests with 503 until a model is installed."""
+    if getattr(app.state, 'model', None) is None:
+        status = getattr(app.state, 'model_status', 'loading')
+        raise service_unavailable(f"Model is not ready (status: {status})")
 
 # Routes
 @app.get("/")
 async def root():
     return {"message": "Welcome to NeuroNutri Guide API"}
 
-@app.post("/analyze", response_model=PredictionResult)
-async def analyze_health(patient_data: PatientData):
+async def analyze_record(input_data: Dict[str, Any], explain: bool) -> Dict[str, Any]:
+    """Stroke risk and recommendations for a validated /analyze record."""
+    require_model()
     try:
-        # Convert input data to dict
-        input_data = patient_data.dict()
+        # Repeated profiles are answered from the cache
+        cache = app.state.prediction_cache
+        if cache is not None:
+            model = app.state.model
+            key = cache_key(input_data, f"{model.version}/{model.variant}" + ("/explain" if explain else ""))
+            cached = await cache.get_async(key)
+            if cached is not None:
+                return cached
         
-        # Get stroke risk prediction
-        stroke_result = app.state.model.predict_stroke_risk(input_data)
+        # Get stroke risk prediction and recommendations
+        if app.state.batcher is None:
+            result = await app.state.executor.run(analyze_patient, input_data, explain)
+        else:
+            result = await app.state.batcher.submit((input_data, explain))
+            if 'error' in result:
+                raise ValueError(result['error'])
         
-        # Add stroke risk to input data for nutrition recommendations
-        input_data['stroke_risk'] = stroke_result['stroke_risk']
-        
-        # Get nutrition recommendations
-        nutrition_result = app.state.model.get_nutrition_recommendations(input_data)
-        
-        # Combine results
-        return {
-            "stroke_risk": stroke_result['stroke_risk'],
-            "risk_category": stroke_result['risk_category'],
-            "recommendations": nutrition_result['recommendations'],
-            "nutrition_goals": nutrition_result['daily_goals']
-        }
+        if cache is not None:
+            cache.set_async(key, result)
+        return result
         
+    except ExecutorSaturated as e:
+        raise service_unavailable(str(e))
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+async def analyze_health_fast(request: Request) -> Optional[Response]:
+    """
+    /analyze in the fast serving mode: the body is parsed with orjson and
+    validated into a plain record, and the response encoded with orjson
+    without response_model validation.
+    
+    Returns None, leaving the request to analyze_health, in the standard
+    mode and for bodies that need pydantic's coercion or error reporting.
+    """
+    if settings.serving_mode != "fast":
+        return None
+    explain = parse_flag(request.query_params.get("explain"))
+    if explain is None:
+        return None
+    input_data = PATIENT_VALIDATOR(await read_json_body(request))
+    if input_data is None:
+        return None
+    
+    mark_handler_start(request)
+    result = await analyze_record(input_data, explain)
+    mark_handler_end(request)
+    return FastJSONResponse(prediction_response(result))
+
+@app.post("/analyze", response_model=PredictionResult)
+@fast_path(analyze_health_fast)
+async def analyze_health(patient_data: PatientData, request: Request, explain: bool = False):
+    mark_handler_start(request)
+    result = await analyze_record(patient_data.dict(), explain)
+    mark_handler_end(request)
+    return result
+
+async def analyze_batch_records(patients: List[Any], explain: bool,
+                                validate: Callable[[Any], Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """
+    ``{"index", "result"}`` or ``{"index", "error"}`` per /analyze/batch
+    record, in input order; ``validate`` turns a raw record into a PatientData dict.
+    """
+    if len(patients) > MAX_BATCH_SIZE:
+        raise HTTPException(
+            status_code=413,
+            detail=f"Batch too large: {len(patients)} records (max {MAX_BATCH_SIZE})"
+        )
+    require_model()
+    
+    results: List[Dict[str, Any]] = [None] * len(patients)
+    
+    # Validate each record on its own so one bad record doesn't fail the batch
+    indices, records = [], []
+    for index, raw in enumerate(patients):
+        if not isinstance(raw, dict):
+            results[index] = {"index": index, "error": "Patient record must be an object"}
+            continue
+        try:
+            records.append(validate(raw))
+            indices.append(index)
+        except ValidationError as e:
+            results[index] = {"index": index, "error": str(e)}
+    
+    try:
+        analyses = await app.state.executor.run(analyze_patients, records, explain)
+    except ExecutorSaturated as e:
+        raise service_unavailable(str(e))
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
+    
+    for index, analysis in zip(indices, analyses):
+        if 'error' in analysis:
+            results[index] = {"index": index, "error": analysis['error']}
+        else:
+            results[index] = {"index": index, "result": analysis}
+    return results
+
+async def analyze_health_batch_fast(request: Request) -> Optional[Response]:
+    """
+    /analyze/batch in the fast serving mode (see analyze_health_fast).
+    
+    Records that need pydantic's coercion or error reporting are validated
+    by PatientData one by one, as in the standard mode.
+    """
+    if settings.serving_mode != "fast":
+        return None
+    explain = parse_flag(request.query_params.get("explain"))
+    body = await read_json_body(request)
+    patients = body.get("patients") if type(body) is dict else None
+    if explain is None or type(patients) is not list:
+        return None
+    
+    mark_handler_start(request)
+    results = await analyze_batch_records(patients, explain, validate_patient)
+    mark_handler_end(request)
+    return FastJSONResponse({"results": [
+        {"index": item["index"],
+         "result": prediction_response(item["result"]) if "result" in item else None,
+         "error": item.get("error")}
+        for item in results
+    ]})
+
+@app.post("/analyze/batch", response_model=BatchAnalysisResult)
+@fast_path(analyze_health_batch_fast)
+async def analyze_health_batch(batch: BatchAnalysisRequest, request: Request, explain: bool = False):
+    mark_handler_start(request)
+    results = await analyze_batch_records(
+        batch.patients, explain, lambda raw: PatientData.parse_obj(raw).dict()
+    )
+    mark_handler_end(request)
+    return {"results": results}
+
+class NDJSONStreamingResponse(StreamingResponse):
+    """
+    StreamingResponse whose body is produced while the request body is read.
+    
+    StreamingResponse watches for client disconnects by reading the ASGI
+    receive channel, which would swallow the request body messages; here the
+    body iterator is the only reader, and a disconnect surfaces to it as
+    ClientDisconnect.
+    """
+    media_type = "application/x-ndjson"
+    
+    async def __call__(self, scope, receive, send) -> None:
+        await self.stream_response(send)
+        if self.background is not None:
+            await self.background()
+
+class NDJSONLineTooLong(Exception):
+    """Raised when an NDJSON line exceeds MAX_NDJSON_LINE_BYTES."""
+
+async def read_ndjson_lines(request: Request) -> AsyncIterator[Tuple[int, bytes]]:
+    """Split an NDJSON request body into numbered non-empty lines as it arrives."""
+    buffer = b""
+    index = 0
+    async for data in request.stream():
+        buffer += data
+        *lines, buffer = buffer.split(b"\n")
+        for line in lines:
+            if len(line) > MAX_NDJSON_LINE_BYTES:
+                raise NDJSONLineTooLong(f"Line {index} is longer than {MAX_NDJSON_LINE_BYTES} bytes")
+            if line.strip():
+                yield index, line
+                index += 1
+        # An unfinished line is refused as soon as it is too long
+        if len(buffer) > MAX_NDJSON_LINE_BYTES:
+            raise NDJSONLineTooLong(f"Line {index} is longer than {MAX_NDJSON_LINE_BYTES} bytes")
+    if buffer.strip():
+        yield index, buffer
+
+def parse_stream_record(line: bytes) -> Dict[str, Any]:
+    """
+    A PatientData dict from one NDJSON line.
+    
+    Raises:
+        ValueError: For invalid JSON or an invalid record (ValidationError)
+    """
+    if settings.serving_mode == "fast":
+        try:
+            record = PATIENT_VALIDATOR(orjson.loads(line))
+        except orjson.JSONDecodeError:
+            # Parsed again below for the standard error message
+            record = None
+        if record is not None:
+            return record
+    return PatientData.parse_obj(json.loads(line)).dict()
+
+async def analyze_stream_chunk(lines: List[Tuple[int, bytes]], explain: bool = False) -> bytes:
+    """Score one chunk of NDJSON records; returns their NDJSON results in input order."""
+    results: Dict[int, Dict[str, Any]] = {}
+    indices, records = [], []
+    for index, line in lines:
+        try:
+            records.append(parse_stream_record(line))
+            indices.append(index)
+        except ValueError as e:
+            # Covers both invalid JSON and ValidationError
+            results[index] = {"index": index, "error": str(e)}
+    
+    if records:
+        try:
+            # A stream can't answer 503 halfway through, so it waits for a worker instead
+            analyses = await app.state.executor.run(analyze_patients, records, explain, wait=True)
+        except Exception as e:
+            analyses = [{'error': str(e)}] * len(records)
+        for index, analysis in zip(indices, analyses):
+            if 'error' in analysis:
+                results[index] = {"index": index, "error": analysis['error']}
+            else:
+                results[index] = {"index": index, "result": analysis}
+    
+    if settings.serving_mode == "fast":
+        return b"".join(orjson.dumps(results[index]) + b"\n" for index, _ in lines)
+    return b"".join(json.dumps(results[index]).encode() + b"\n" for index, _ in lines)
+
+async def stream_analyses(request: Request, explain: bool = False) -> AsyncIterator[bytes]:
+    """
+    Score NDJSON records as they arrive, yielding NDJSON results per chunk.
+    
+    The first chunk holds 16 records so the first results go out quickly;
+    each following chunk is twice as large, up to ``stream_chunk_size``. At
+    most one chunk of records is held at a time.
+    """
+    chunk_size = min(16, settings.stream_chunk_size)
+    chunk: List[Tuple[int, bytes]] = []
+    try:
+        async for index, line in read_ndjson_lines(request):
+            chunk.append((index, line))
+            if len(chunk) >= chunk_size:
+                yield await analyze_stream_chunk(chunk, explain)
+                chunk = []
+                chunk_size = min(chunk_size * 2, settings.stream_chunk_size)
+    except NDJSONLineTooLong as e:
+        if chunk:
+            yield await analyze_stream_chunk(chunk, explain)
+        yield json.dumps({"error": str(e)}).encode() + b"\n"
+        return
+    if chunk:
+        yield await analyze_stream_chunk(chunk, explain)
+
+@app.post("/analyze/stream")
+async def analyze_health_stream(request: Request, explain: bool = False):
+    """
+    Analyze patients sent as NDJSON (one PatientData object per line).
+    
+    Results are streamed back as NDJSON while the upload is still being
+    read, one ``{"index", "result"}`` or ``{"index", "error"}`` line per
+    input line, in input order.
+    """
+    require_model()
+    return NDJSONStreamingResponse(stream_analyses(request, explain))
+
+@app.post("/analyze/intake", response_model=DietLogBatchResult)
+async def analyze_intake_batch(batch: DietLogBatchRequest):
+    """Nutrient intake analysis for a bulk upload of diet logs."""
+    if len(batch.logs) > MAX_BATCH_SIZE:
+        raise HTTPException(
+            status_code=413,
+            detail=f"Batch too large: {len(batch.logs)} logs (max {MAX_BATCH_SIZE})"
+        )
+    require_model()
+    
+    try:
+        analyses = await app.state.executor.run(analyze_diet_logs, [log.dict() for log in batch.logs])
+    except ExecutorSaturated as e:
+        raise service_unavailable(str(e))
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    
+    return {"results": [dict(analysis, index=index) for index, analysis in enumerate(analyses)]}
+
+@app.post("/similar", response_model=SimilarPatientsBatchResult)
+async def similar_patients(request: SimilarPatientsRequest):
+    """The k most similar training patients for each query patient."""
+    if len(request.patients) > MAX_BATCH_SIZE:
+        raise HTTPException(
+            status_code=413,
+            detail=f"Batch too large: {len(request.patients)} patients (max {MAX_BATCH_SIZE})"
+        )
+    require_model()
+    if app.state.model.similarity_index is None:
+        raise HTTPException(status_code=404, detail="The serving model has no similar-patient index")
+    
+    results: List[Dict[str, Any]] = [None] * len(request.patients)
+    
+    indices, records = [], []
+    for index, raw in enumerate(request.patients):
+        try:
+            records.append(PatientData.parse_obj(raw).dict())
+            indices.append(index)
+        except ValidationError as e:
+            results[index] = {"index": index, "error": str(e)}
+    
+    try:
+        matches = await app.state.executor.run(find_similar_patients, records, request.k)
+    except ExecutorSaturated as e:
+        raise service_unavailable(str(e))
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    
+    for index, match in zip(indices, matches):
+        results[index] = dict(match, index=index)
+    
+    return {"results": results}
+
+@app.get("/stats")
+async def service_stats():
+    """Inference executor, micro-batcher and prediction cache statistics."""
+    stats = {}
+    if hasattr(app.state, 'executor'):
+        stats["executor"] = app.state.executor.stats()
+    if getattr(app.state, 'batcher', None) is not None:
+        stats["micro_batcher"] = app.state.batcher.stats()
+    if getattr(app.state, 'prediction_cache', None) is not None:
+        stats["prediction_cache"] = app.state.prediction_cache.stats()
+    return stats
+
+def render_metrics() -> str:
+    """Request timings and service state in the Prometheus text format."""
+    out = PrometheusWriter()
+    
+    out.family("neuronutri_request_stage_seconds", "histogram",
+               "Time spent in each stage of /analyze and /analyze/batch requests")
+    for stage, histogram in METRICS.stages.items():
+        out.histogram("neuronutri_request_stage_seconds", histogram, {"stage": stage})
+    
+    out.family("neuronutri_http_request_duration_seconds", "histogram", "HTTP request latency")
+    for (path, status), histogram in sorted(METRICS.requests.items()):
+        out.histogram("neuronutri_http_request_duration_seconds", histogram, {"path": path, "status": status})
+    
+    model = getattr(app.state, 'model', None)
+    out.family("neuronutri_model_info", "gauge", "Model version and forest variant being served")
+    if model is not None:
+        out.sample("neuronutri_model_info", 1, {"version": model.version, "variant": model.variant})
+    out.family("neuronutri_training_stage_seconds", "gauge",
+               "Seconds each training stage took for the model being served")
+    for stage, seconds in getattr(app.state, 'training_stage_timings', {}).items():
+        out.sample("neuronutri_training_stage_seconds", float(seconds), {"stage": stage})
+    
+    if hasattr(app.state, 'executor'):
+        executor = app.state.executor.stats()
+        out.family("neuronutri_inference_in_flight", "gauge", "Model calls running or waiting for a worker")
+        out.sample("neuronutri_inference_in_flight", executor["in_flight"], {"mode": executor["mode"]})
+        out.family("neuronutri_inference_capacity", "gauge", "Model calls accepted at once before answering 503")
+        out.sample("neuronutri_inference_capacity", app.state.executor.capacity)
+        out.family("neuronutri_inference_rejected_total", "counter", "Model calls rejected with 503")
+        out.sample("neuronutri_inference_rejected_total", executor["rejected"])
+    
+    if getattr(app.state, 'batcher', None) is not None:
+        batcher = app.state.batcher.stats()
+        out.family("neuronutri_micro_batches_total", "counter", "Micro-batches scored")
+        out.sample("neuronutri_micro_batches_total", batcher["batches"])
+        out.family("neuronutri_micro_batch_items_total", "counter", "Requests scored in micro-batches")
+        out.sample("neuronutri_micro_batch_items_total", batcher["items"])
+    
+    if getattr(app.state, 'prediction_cache', None) is not None:
+        cache = app.state.prediction_cache.stats()
+        out.family("neuronutri_prediction_cache_hits_total", "counter", "Prediction cache hits")
+        out.sample("neuronutri_prediction_cache_hits_total", cache["hits"], {"tier": "memory"})
+        out.sample("neuronutri_prediction_cache_hits_total", cache["shared_hits"], {"tier": "shared"})
+        out.family("neuronutri_prediction_cache_misses_total", "counter", "Prediction cache misses")
+        out.sample("neuronutri_prediction_cache_misses_total", cache["misses"])
+        out.family("neuronutri_prediction_cache_evictions_total", "counter", "Entries evicted from the in-process cache")
+        out.sample("neuronutri_prediction_cache_evictions_total", cache["evictions"])
+        out.family("neuronutri_prediction_cache_entries", "gauge", "Entries in the in-process cache")
+        out.sample("neuronutri_prediction_cache_entries", cache["entries"])
+    
+    return out.render()
+
+@app.get("/metrics", response_class=PlainTextResponse)
+async def prometheus_metrics():
+    """Prometheus scrape endpoint."""
+    if not METRICS.enabled:
+        raise HTTPException(status_code=404, detail="Metrics are disabled")
+    return PlainTextResponse(render_metrics(), media_type="text/plain; version=0.0.4")
+
+@app.get("/admin/models", dependencies=[Depends(require_admin)])
+async def list_models():
+    """Registry versions, the active version and the version being served."""
+    model = getattr(app.state, 'model', None)
+    return {
+        "versions": registry.list_versions(),
+        "current_version": registry.current_version(),
+        "serving_version": getattr(model, 'version', None)
+    }
+
+@app.post("/admin/models/reload", dependencies=[Depends(require_admin)])
+async def reload_models(request: Optional[ModelReloadRequest] = None):
+    """Activate a version (or re-read CURRENT) and hot-swap it in."""
+    if app.state.reload_lock.locked():
+        raise HTTPException(status_code=409, detail="A model reload is already in progress")
+    
+    async with app.state.reload_lock:
+        previous_version = getattr(getattr(app.state, 'model', None), 'version', None)
+        version = request.version if request is not None else None
+        try:
+            # CURRENT moves only after the version loaded, verified and is serving
+            model = await swap_in_model(version, activate=version is not None)
+        except (ValueError, FileNotFoundError) as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        except Exception as e:
+            raise HTTPException(status_code=500, detail=f"Model reload failed: {str(e)}")
+    
+    return {"version": model.version, "previous_version": previous_version}
 
 @app.get("/health")
 async def health_check():
-    return {"status": "healthy", "model_loaded": hasattr(app.state, 'model')}
+    return {
+        "status": "healthy",
+        "model_loaded": getattr(app.state, 'model', None) is not None,
+        "model_status": getattr(app.state, 'model_status', 'loading'),
+        "model_version": getattr(getattr(app.state, 'model', None), 'version', None)
+    }
+
+@app.get("/ready")
+async def readiness_check():
+    """Readiness probe: 200 once a model is serving, 503 while loading or training."""
+    if getattr(app.state, 'model', None) is None:
+        return JSONResponse(
+            status_code=503,
+            content={
+                "ready": False,
+                "model_status": getattr(app.state, 'model_status', 'loading'),
+                "error": getattr(app.state, 'model_error', None)
+            }
+        )
+    return {"ready": True, "model_status": app.state.model_status}
 
 if __name__ == "__main__":
     import uvicorn
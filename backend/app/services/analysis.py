@@ -0,0 +1,120 @@
+import time
+from typing import Dict, Any, List, Optional, Tuple
+
+from .metrics import METRICS
+from .inference import InferenceModel
+
+
+def build_prediction(model: InferenceModel, patient_data: Dict[str, Any],
+                     stroke_result: Dict[str, Any],
+                     nutrition_result: Optional[Dict[str, Any]] = None,
+                     intake_result: Optional[Tuple[Dict[str, Any], Tuple[str, ...]]] = None) -> Dict[str, Any]:
+    """Combine a stroke risk prediction with nutrition recommendations."""
+    # Add stroke risk to input data for nutrition recommendations
+    patient_data['stroke_risk'] = stroke_result['stroke_risk']
+    
+    # Get nutrition recommendations
+    if nutrition_result is None:
+        nutrition_result = model.get_nutrition_recommendations(patient_data)
+    
+    # Combine results
+    prediction = {
+        "stroke_risk": stroke_result['stroke_risk'],
+        "risk_category": stroke_result['risk_category'],
+        "recommendations": nutrition_result['recommendations'],
+        "nutrition_goals": nutrition_result['daily_goals']
+    }
+    if 'explanation' in stroke_result:
+        prediction["explanation"] = stroke_result['explanation']
+    
+    # Findings from the patient's logged intake come first
+    if intake_result is not None:
+        nutrient_analysis, intake_recommendations = intake_result
+        prediction["recommendations"] = intake_recommendations + tuple(prediction["recommendations"])
+        prediction["nutrient_analysis"] = nutrient_analysis
+    
+    return prediction
+
+
+def analyze_patient(model: InferenceModel, patient_data: Dict[str, Any], explain: bool = False) -> Dict[str, Any]:
+    """
+    Stroke risk and nutrition recommendations for a single patient.
+    
+    ``explain`` adds the feature contributions behind the stroke risk.
+    """
+    stroke_result = model.predict_stroke_risk(patient_data, explain=explain)
+    start = time.perf_counter()
+    if not patient_data.get('nutrition_data'):
+        prediction = build_prediction(model, patient_data, stroke_result)
+    else:
+        patient_data['stroke_risk'] = stroke_result['stroke_risk']
+        nutrition_result = model.get_nutrition_recommendations(patient_data)
+        intake_result = model.analyze_nutrient_intake_batch(
+            [patient_data['nutrition_data']], [nutrition_result['daily_goals']]
+        )[0]
+        prediction = build_prediction(model, patient_data, stroke_result, nutrition_result, intake_result)
+    METRICS.observe('recommend', time.perf_counter() - start)
+    return prediction
+
+
+def analyze_patients(model: InferenceModel, records: List[Dict[str, Any]],
+                     explain: bool = False) -> List[Dict[str, Any]]:
+    """
+    Batch version of analyze_patient.
+    
+    Results are in input order; records that could not be scored are
+    returned as ``{'error': ...}`` entries.
+    """
+    stroke_results = model.predict_stroke_risk_batch(records, explain=explain)
+    start = time.perf_counter()
+    
+    scored = [i for i, result in enumerate(stroke_results) if 'error' not in result]
+    for i in scored:
+        records[i]['stroke_risk'] = stroke_results[i]['stroke_risk']
+    nutrition_results = model.get_nutrition_recommendations_batch([records[i] for i in scored])
+    
+    # Intake analysis for the records that include a diet log, in one pass
+    logged = [n for n, i in enumerate(scored) if records[i].get('nutrition_data')]
+    intake_results: List[Any] = [None] * len(scored)
+    if logged:
+        analyses = model.analyze_nutrient_intake_batch(
+            [records[scored[n]]['nutrition_data'] for n in logged],
+            [nutrition_results[n]['daily_goals'] for n in logged]
+        )
+        for n, analysis in zip(logged, analyses):
+            intake_results[n] = analysis
+    
+    results = list(stroke_results)
+    for i, nutrition_result, intake_result in zip(scored, nutrition_results, intake_results):
+        results[i] = build_prediction(model, records[i], stroke_results[i], nutrition_result, intake_result)
+    METRICS.observe('recommend', time.perf_counter() - start)
+    return results
+
+
+def analyze_diet_logs(model: InferenceModel, logs: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """
+    Nutrient intake analysis for a bulk upload of diet logs.
+    
+    Each log holds ``nutrition_data`` plus the patient attributes the daily
+    goals depend on; no stroke risk is computed.
+    """
+    goals = [daily_goals for _, daily_goals in model.recommendation_engine.lookup_batch(logs)]
+    analyses = model.analyze_nutrient_intake_batch([log.get('nutrition_data') for log in logs], goals)
+    
+    results = []
+    for daily_goals, analysis in zip(goals, analyses):
+        if analysis is None:
+            results.append({'error': 'No known nutrients in nutrition_data'})
+            continue
+        nutrient_analysis, recommendations = analysis
+        results.append({
+            'nutrient_analysis': nutrient_analysis,
+            'recommendations': recommendations,
+            'nutrition_goals': daily_goals
+        })
+    return results
+
+
+def find_similar_patients(model: InferenceModel, records: List[Dict[str, Any]], k: int) -> List[Dict[str, Any]]:
+    """The ``k`` most similar training patients for each record."""
+    return model.find_similar_patients(records, k=k)
@@ -0,0 +1,157 @@
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple, Type
+
+import orjson
+from fastapi.routing import APIRoute
+from pydantic import BaseModel, Extra
+from pydantic.fields import SHAPE_DICT, SHAPE_SINGLETON
+from starlette.requests import Request
+from starlette.responses import Response
+
+# Field types RecordValidator checks itself, and the JSON value types it
+# accepts for each without pydantic's coercion
+_ACCEPTED_TYPES: Dict[type, Tuple[type, ...]] = {
+    float: (int, float),
+    int: (int,),
+    str: (str,),
+}
+
+# Query parameter spellings the fast path parses itself
+_FLAGS = {'true': True, '1': True, 'false': False, '0': False}
+
+FastHandler = Callable[[Request], Awaitable[Optional[Response]]]
+
+
+class RecordValidator:
+    """
+    Validates JSON objects into the dict ``model.parse_obj(obj).dict()``
+    returns, without building the model.
+
+    Only flat models of ``float``, ``int`` and ``str`` fields (optionally
+    ``Dict[str, ...]`` of those) are supported. A value is accepted only
+    when its type needs no coercion: any int or float for ``float`` fields,
+    and exactly ``int`` or ``str`` otherwise. Anything else, including
+    ``bool`` values, numeric strings and missing required fields, makes the
+    validator return None so the caller can hand the object to pydantic,
+    which then coerces it or reports the error as usual.
+    """
+
+    def __init__(self, model: Type[BaseModel]):
+        if model.__validators__ or model.__pre_root_validators__ or model.__post_root_validators__:
+            raise TypeError(f"{model.__name__} has custom validators")
+        if model.__config__.extra != Extra.ignore:
+            raise TypeError(f"{model.__name__} doesn't ignore extra fields")
+
+        # (field, accepted value types, converter, is a dict)
+        self.fields = []
+        for name, field in model.__fields__.items():
+            accepted = _ACCEPTED_TYPES.get(field.type_)
+            if accepted is None or field.alias != name or field.shape not in (SHAPE_SINGLETON, SHAPE_DICT):
+                raise TypeError(f"Field {model.__name__}.{name} is not supported")
+            if field.shape == SHAPE_DICT and field.key_field.type_ is not str:
+                raise TypeError(f"Field {model.__name__}.{name} needs string keys")
+            convert = float if field.type_ is float else None
+            self.fields.append((field, accepted, convert, field.shape == SHAPE_DICT))
+
+    @staticmethod
+    def _value(value: Any, accepted: Tuple[type, ...], convert: Optional[type]) -> Any:
+        # type() rather than isinstance() keeps bool (an int subclass) out
+        if type(value) not in accepted:
+            raise TypeError
+        return convert(value) if convert is not None else value
+
+    def __call__(self, obj: Any) -> Optional[Dict[str, Any]]:
+        if type(obj) is not dict:
+            return None
+        record = {}
+        try:
+            for field, accepted, convert, is_dict in self.fields:
+                name = field.name
+                value = obj.get(name)
+                if value is None:
+                    if name in obj:
+                        if not field.allow_none:
+                            return None
+                        record[name] = None
+                    elif field.required:
+                        return None
+                    else:
+                        record[name] = field.get_default()
+                elif is_dict:
+                    if type(value) is not dict:
+                        return None
+                    record[name] = {key: self._value(item, accepted, convert) for key, item in value.items()}
+                else:
+                    record[name] = self._value(value, accepted, convert)
+        except TypeError:
+            return None
+        return record
+
+
+class FastJSONResponse(Response):
+    """
+    JSON response encoded with orjson, for content that is already made of
+    plain JSON types (tuples and NumPy scalars included).
+
+    Unlike the default response of a route with a ``response_model``, the
+    content is not validated or passed through ``jsonable_encoder`` first.
+    """
+
+    media_type = 'application/json'
+
+    def render(self, content: Any) -> bytes:
+        return orjson.dumps(content, option=orjson.OPT_SERIALIZE_NUMPY)
+
+
+async def read_json_body(request: Request) -> Any:
+    """
+    The request's JSON body parsed with orjson, or None when it is not
+    declared as JSON or orjson can't parse it (e.g. ``NaN``), in which case
+    FastAPI parses it.
+    """
+    content_type = request.headers.get('content-type')
+    if content_type is not None and content_type.split(';')[0].strip().lower() != 'application/json':
+        return None
+    try:
+        return orjson.loads(await request.body())
+    except orjson.JSONDecodeError:
+        return None
+
+
+def parse_flag(value: Optional[str], default: bool = False) -> Optional[bool]:
+    """A boolean query parameter, or None for spellings left to FastAPI."""
+    if value is None:
+        return default
+    return _FLAGS.get(value.lower())
+
+
+def fast_path(handler: FastHandler) -> Callable[[Callable], Callable]:
+    """
+    Give an endpoint a fast path, tried before FastAPI parses the request.
+
+    ``handler`` gets the raw request and returns a response, or None to
+    let the endpoint handle the request the usual way. It only takes
+    effect on routes of class FastPathRoute.
+    """
+    def decorate(endpoint: Callable) -> Callable:
+        endpoint.fast_path = handler
+        return endpoint
+    return decorate
+
+
+class FastPathRoute(APIRoute):
+    """APIRoute that tries the endpoint's ``fast_path`` handler (if any) first."""
+
+    def get_route_handler(self) -> Callable[[Request], Awaitable[Response]]:
+        handler = super().get_route_handler()
+        fast_handler = getattr(self.endpoint, 'fast_path', None)
+        if fast_handler is None:
+            return handler
+
+        async def route_handler(request: Request) -> Response:
+            # The request body is cached, so the standard handler can still read it
+            response = await fast_handler(request)
+            if response is None:
+                response = await handler(request)
+            return response
+
+        return route_handler
@@ -0,0 +1,200 @@
+import copy
+from typing import Any, Dict, List, Tuple
+
+import numpy as np
+from scipy.stats import rankdata
+from sklearn.ensemble import RandomForestClassifier
+from sklearn.metrics import roc_auc_score
+
+# Most held-out rows the greedy search ranks candidate trees on, and the
+# confirmation resamples are drawn from
+SELECTION_ROWS = 20000
+# Bootstrap resamples of the confirmation rows
+N_BOOTSTRAP = 200
+# Fewest held-out rows of each outcome compaction runs on. Each half gets
+# half of them; with fewer cases the resamples barely differ, and a
+# handful of trees can pass the budget by matching the forest on them
+MIN_CLASS_ROWS = 60
+
+
+def _candidate_aucs(scores: np.ndarray, positive: np.ndarray) -> np.ndarray:
+    """ROC AUC of every row of ``scores`` (candidates x samples) at once."""
+    # Mann-Whitney U from average ranks, which handles tied scores like roc_auc_score
+    ranks = rankdata(scores, axis=1)
+    n_pos = int(positive.sum())
+    n_neg = len(positive) - n_pos
+    return (ranks[:, positive].sum(axis=1) - n_pos * (n_pos + 1) / 2) / (n_pos * n_neg)
+
+
+def _recall(proba: np.ndarray, positive: np.ndarray) -> np.ndarray:
+    """Recall of ``predict`` (class 1 when its probability is over 0.5), per row of ``proba``."""
+    return ((proba > 0.5) & positive).sum(axis=-1) / positive.sum(axis=-1)
+
+
+def _resampled_metrics(proba: np.ndarray, resamples: np.ndarray,
+                       positive: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """ROC AUC and recall of ``proba`` on every bootstrap resample (rows of ``resamples``)."""
+    scores = proba[resamples]
+    ranks = rankdata(scores, axis=1)
+    n_pos = positive.sum(axis=1)
+    n_neg = positive.shape[1] - n_pos
+    aucs = ((ranks * positive).sum(axis=1) - n_pos * (n_pos + 1) / 2) / (n_pos * n_neg)
+    return aucs, _recall(scores, positive)
+
+
+def _greedy_order(tree_proba: np.ndarray, positive: np.ndarray, auc_floor: float,
+                  recall_floor: float) -> Tuple[List[int], int]:
+    """
+    Order trees by greedy forward selection on held-out AUC.
+
+    Each step adds the tree that gives the averaged forest the highest AUC,
+    breaking ties by recall, until the forest meets both floors. The trees
+    never selected follow in order of their own AUC.
+
+    Returns:
+        Tree indices in selection order, and how many were selected
+    """
+    remaining = list(range(len(tree_proba)))
+    selected: List[int] = []
+    total = np.zeros(tree_proba.shape[1])
+
+    while remaining:
+        candidates = (total + tree_proba[remaining]) / (len(selected) + 1)
+        aucs = _candidate_aucs(candidates, positive)
+        recalls = _recall(candidates, positive)
+        best = int(np.lexsort((-recalls, -aucs))[0])
+
+        tree = remaining.pop(best)
+        selected.append(tree)
+        total += tree_proba[tree]
+        if aucs[best] >= auc_floor and recalls[best] >= recall_floor:
+            break
+
+    n_selected = len(selected)
+    if remaining:
+        single_aucs = _candidate_aucs(tree_proba[remaining], positive)
+        selected.extend(remaining[i] for i in np.argsort(-single_aucs, kind='stable'))
+    return selected, n_selected
+
+
+def compact_forest(forest: RandomForestClassifier, X: np.ndarray, y: np.ndarray,
+                   auc_tolerance: float = 0.005, recall_tolerance: float = 0.01,
+                   confidence: float = 0.95, random_state: int = 42) -> Tuple[RandomForestClassifier, Dict[str, Any]]:
+    """
+    The smallest subset of a forest's trees that stays within an accuracy budget.
+
+    The held-out rows are split in two stratified halves. Trees are ordered
+    by greedy forward selection on the first half. The second half, which
+    the search never saw, then picks how many of them to keep: the fewest
+    whose ROC AUC and recall drops against the full forest stay within
+    ``auc_tolerance`` and ``recall_tolerance`` on ``confidence`` of paired
+    bootstrap resamples. Requiring this of the resamples, not just of the
+    point estimate, keeps a lucky split from passing a subset that only
+    scraped under the budget. At worst the result is the whole forest.
+
+    Args:
+        forest: Fitted forest to compact; it is not modified
+        X: Held-out feature matrix (float32, ``feature_columns`` order)
+        y: Held-out stroke outcomes, with at least MIN_CLASS_ROWS of each
+        auc_tolerance: Largest allowed ROC AUC drop
+        recall_tolerance: Largest allowed recall drop
+        confidence: Share of bootstrap resamples the drops must stay within
+            the tolerances on
+        random_state: Seed for splitting and resampling the held-out rows
+
+    Returns:
+        A forest sharing the selected trees with ``forest``, and a report of
+        its size and metrics on the confirmation rows next to the full forest's
+
+    Raises:
+        ValueError: If there are fewer than MIN_CLASS_ROWS rows of either outcome
+    """
+    X = np.ascontiguousarray(X, dtype=np.float32)
+    y = np.asarray(y).astype(int)
+    positive = y == 1
+    n_trees = len(forest.estimators_)
+    if np.bincount(y, minlength=2).min() < MIN_CLASS_ROWS:
+        raise ValueError(f"Compaction needs at least {MIN_CLASS_ROWS} held-out rows of each outcome")
+
+    # Stratified halves, one to search on and one to confirm on, of at
+    # most SELECTION_ROWS rows each
+    rng = np.random.default_rng(random_state)
+    select_rows, confirm_rows = [], []
+    for label in (True, False):
+        rows = rng.permutation(np.flatnonzero(positive == label))
+        half = len(rows) // 2
+        keep = max(1, round(min(half, SELECTION_ROWS * np.mean(positive == label))))
+        select_rows.append(rows[:half][:keep])
+        confirm_rows.append(rows[half:][:keep])
+    select_rows, confirm_rows = np.concatenate(select_rows), np.concatenate(confirm_rows)
+
+    # Stroke probability of every tree on every held-out row, computed once
+    tree_proba = np.stack([tree.predict_proba(X, check_input=False)[:, 1] for tree in forest.estimators_])
+
+    # The search stops once the subset matches the full forest on its own rows
+    select_proba = tree_proba[:, select_rows].mean(axis=0)
+    order, n_min = _greedy_order(
+        tree_proba[:, select_rows], positive[select_rows],
+        roc_auc_score(y[select_rows], select_proba) - auc_tolerance,
+        float(_recall(select_proba, positive[select_rows])) - recall_tolerance
+    )
+
+    # Paired resamples of the confirmation rows, shared by every candidate
+    confirm_proba = tree_proba[order][:, confirm_rows]
+    confirm_positive = positive[confirm_rows]
+    resamples = rng.integers(0, len(confirm_rows), size=(N_BOOTSTRAP, len(confirm_rows)))
+    resampled_positive = confirm_positive[resamples]
+    # Resamples that drew a single outcome have no AUC
+    resamples = resamples[resampled_positive.any(axis=1) & ~resampled_positive.all(axis=1)]
+    resampled_positive = confirm_positive[resamples]
+    full_proba = confirm_proba.mean(axis=0)
+    full_aucs, full_recalls = _resampled_metrics(full_proba, resamples, resampled_positive)
+    running = np.cumsum(confirm_proba, axis=0)
+
+    def drops(n: int) -> Tuple[float, float]:
+        aucs, recalls = _resampled_metrics(running[n - 1] / n, resamples, resampled_positive)
+        return (float(np.quantile(full_aucs - aucs, confidence)),
+                float(np.quantile(full_recalls - recalls, confidence)))
+
+    def within_budget(n: int) -> bool:
+        auc_drop, recall_drop = drops(n)
+        return auc_drop <= auc_tolerance and recall_drop <= recall_tolerance
+
+    # Binary search for the fewest trees within budget (all of them always are)
+    low, high = n_min, n_trees
+    while low < high:
+        middle = (low + high) // 2
+        if within_budget(middle):
+            high = middle
+        else:
+            low = middle + 1
+    n_selected = high
+    auc_drop, recall_drop = drops(n_selected)
+    proba = running[n_selected - 1] / n_selected
+
+    compact = copy.copy(forest)
+    # Keep the trees in their original order
+    compact.estimators_ = [forest.estimators_[i] for i in sorted(order[:n_selected])]
+    compact.n_estimators = n_selected
+    # Out-of-bag estimates belong to the full forest
+    compact.oob_score = False
+    for attr in ('oob_score_', 'oob_decision_function_'):
+        compact.__dict__.pop(attr, None)
+
+    report = {
+        'n_trees': n_selected,
+        'full_n_trees': n_trees,
+        'roc_auc': float(roc_auc_score(confirm_positive, proba)),
+        'recall': float(_recall(proba, confirm_positive)),
+        'full_roc_auc': float(roc_auc_score(confirm_positive, full_proba)),
+        'full_recall': float(_recall(full_proba, confirm_positive)),
+        'auc_drop_bound': auc_drop,
+        'recall_drop_bound': recall_drop,
+        'auc_tolerance': auc_tolerance,
+        'recall_tolerance': recall_tolerance,
+        'confidence': confidence,
+        'selection_rows': len(select_rows),
+        'confirmation_rows': len(confirm_rows),
+        'trees': sorted(order[:n_selected])
+    }
+    return compact, report
@@ -0,0 +1,193 @@
+import json
+import os
+
+import numpy as np
+from typing import Optional
+
+ARRAY_NAMES = ('feature', 'threshold', 'children_left', 'children_right', 'value', 'roots')
+META_FILE = 'forest.json'
+
+
+class CompiledForest:
+    """
+    A fitted random forest flattened into contiguous NumPy node arrays.
+
+    Every tree of the forest is laid out back to back in the same arrays, so
+    a row is scored by walking all trees at once: each step gathers the split
+    feature and threshold of the current node of every tree and moves to the
+    left or right child. Leaves point to themselves, which lets the walk run
+    for a fixed ``max_depth`` steps without any per-tree bookkeeping.
+    """
+
+    # Rows evaluated per traversal step; bounds the (rows x trees) index matrix
+    chunk_size = 4096
+
+    def __init__(self, feature: np.ndarray, threshold: np.ndarray,
+                 children_left: np.ndarray, children_right: np.ndarray,
+                 value: np.ndarray, roots: np.ndarray, max_depth: int):
+        self.feature = feature
+        self.threshold = threshold
+        self.children_left = children_left
+        self.children_right = children_right
+        self.value = value
+        self.roots = roots
+        self.max_depth = max_depth
+        # Directory the arrays are memory-mapped from, if any
+        self.source_dir: Optional[str] = None
+
+    def __reduce_ex__(self, protocol):
+        # Memory-mapped forests are re-mapped from disk when unpickled (e.g.
+        # in process-pool workers) so the pages stay shared between processes
+        if self.source_dir is not None:
+            return (CompiledForest.load, (self.source_dir, 'r'))
+        return super().__reduce_ex__(protocol)
+
+    @property
+    def n_trees(self) -> int:
+        return len(self.roots)
+
+    @property
+    def n_classes(self) -> int:
+        return self.value.shape[1]
+
+    @classmethod
+    def from_sklearn(cls, forest) -> 'CompiledForest':
+        """Export the trees of a fitted ``RandomForestClassifier``."""
+        features, thresholds, lefts, rights, values, roots = [], [], [], [], [], []
+        max_depth = 0
+        offset = 0
+
+        for estimator in forest.estimators_:
+            tree = estimator.tree_
+            n_nodes = tree.node_count
+            is_leaf = tree.children_left == -1
+            node_ids = np.arange(n_nodes)
+
+            # Leaves loop back to themselves so extra steps are no-ops
+            lefts.append(np.where(is_leaf, node_ids, tree.children_left) + offset)
+            rights.append(np.where(is_leaf, node_ids, tree.children_right) + offset)
+            features.append(np.where(is_leaf, 0, tree.feature))
+            thresholds.append(np.where(is_leaf, np.inf, tree.threshold))
+
+            # Same normalization as DecisionTreeClassifier.predict_proba
+            value = tree.value[:, 0, :forest.n_classes_]
+            normalizer = value.sum(axis=1, keepdims=True)
+            normalizer[normalizer == 0.0] = 1.0
+            values.append(value / normalizer)
+
+            roots.append(offset)
+            max_depth = max(max_depth, tree.max_depth)
+            offset += n_nodes
+
+        return cls(
+            feature=np.concatenate(features).astype(np.intp),
+            threshold=np.concatenate(thresholds).astype(np.float64),
+            children_left=np.concatenate(lefts).astype(np.intp),
+            children_right=np.concatenate(rights).astype(np.intp),
+            value=np.ascontiguousarray(np.concatenate(values), dtype=np.float64),
+            roots=np.asarray(roots, dtype=np.intp),
+            max_depth=int(max_depth)
+        )
+
+    def save(self, directory: str) -> None:
+        """Write the node arrays as .npy files that can be memory-mapped."""
+        os.makedirs(directory, exist_ok=True)
+        for name in ARRAY_NAMES:
+            np.save(os.path.join(directory, f"{name}.npy"), np.ascontiguousarray(getattr(self, name)))
+        with open(os.path.join(directory, META_FILE), 'w') as f:
+            json.dump({'max_depth': self.max_depth, 'n_trees': self.n_trees, 'n_classes': self.n_classes}, f)
+
+    @classmethod
+    def load(cls, directory: str, mmap_mode: Optional[str] = 'r') -> 'CompiledForest':
+        """
+        Load a saved forest.
+
+        With ``mmap_mode='r'`` the arrays are mapped read-only, so every
+        process on a host serving the same files shares one copy of the model
+        through the OS page cache, and loading doesn't read the file up front.
+        """
+        with open(os.path.join(directory, META_FILE)) as f:
+            meta = json.load(f)
+        # np.asarray drops the memmap subclass (and its per-operation
+        # overhead) while keeping the mapped buffer
+        arrays = {
+            name: np.asarray(np.load(os.path.join(directory, f"{name}.npy"), mmap_mode=mmap_mode))
+            for name in ARRAY_NAMES
+        }
+        forest = cls(max_depth=meta['max_depth'], **arrays)
+        if mmap_mode is not None:
+            forest.source_dir = directory
+        return forest
+
+    def apply(self, X: np.ndarray) -> np.ndarray:
+        """Return the leaf index reached in every tree, shape (n_rows, n_trees)."""
+        X = np.asarray(X, dtype=np.float32)
+        rows = np.arange(X.shape[0])[:, None]
+        nodes = np.repeat(self.roots[None, :], X.shape[0], axis=0)
+
+        for _ in range(self.max_depth):
+            # float32 inputs against float64 thresholds, exactly like sklearn
+            go_left = X[rows, self.feature[nodes]] <= self.threshold[nodes]
+            nodes = np.where(go_left, self.children_left[nodes], self.children_right[nodes])
+
+        return nodes
+
+    def predict_proba(self, X: np.ndarray) -> np.ndarray:
+        """Average class probabilities over all trees."""
+        X = np.asarray(X, dtype=np.float32)
+        proba = np.empty((X.shape[0], self.n_classes), dtype=np.float64)
+        for start in range(0, X.shape[0], self.chunk_size):
+            leaves = self.apply(X[start:start + self.chunk_size])
+            proba[start:start + self.chunk_size] = self.value[leaves].mean(axis=1)
+        return proba
+
+    def probe_matrix(self, n_features: int, n_rows: int = 512, seed: int = 0) -> np.ndarray:
+        """
+        Random rows spanning the split thresholds of every feature.
+
+        Half the values are drawn uniformly around each feature's threshold
+        range; the rest sit on thresholds rounded to float32, which exercises
+        the comparison at split boundaries.
+        """
+        rng = np.random.default_rng(seed)
+        X = np.zeros((n_rows, n_features), dtype=np.float32)
+        is_split = np.isfinite(self.threshold)
+
+        for col in range(n_features):
+            col_thresholds = self.threshold[is_split & (self.feature == col)]
+            if len(col_thresholds) == 0:
+                continue
+            low, high = col_thresholds.min(), col_thresholds.max()
+            margin = max(1.0, (high - low) * 0.1)
+            X[:, col] = rng.uniform(low - margin, high + margin, n_rows)
+            on_split = rng.random(n_rows) < 0.5
+            X[on_split, col] = rng.choice(col_thresholds, on_split.sum()).astype(np.float32)
+
+        return X
+
+    def max_deviation(self, reference_proba: np.ndarray, X: np.ndarray) -> float:
+        """Largest absolute probability difference against a reference scorer."""
+        return float(np.abs(self.predict_proba(X) - reference_proba).max())
+
+
+def compile_forest(forest, n_features: int, atol: float = 1e-9) -> Optional[CompiledForest]:
+    """
+    Compile a fitted forest and check it against sklearn's own probabilities.
+
+    Returns None when the compiled evaluator disagrees with sklearn by more
+    than ``atol`` on the probe rows, so callers can keep using sklearn.
+    """
+    compiled = CompiledForest.from_sklearn(forest)
+    X = compiled.probe_matrix(n_features)
+
+    reference = np.zeros((X.shape[0], forest.n_classes_), dtype=np.float64)
+    for tree in forest.estimators_:
+        reference += tree.predict_proba(X, check_input=False)
+    reference /= len(forest.estimators_)
+
+    deviation = compiled.max_deviation(reference, X)
+    if deviation > atol:
+        print(f"Warning: compiled forest deviates from sklearn by {deviation:.3g}; using sklearn")
+        return None
+
+    return compiled
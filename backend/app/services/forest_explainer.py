@@ -0,0 +1,76 @@
+from typing import Tuple
+
+import numpy as np
+
+from .forest_compiler import CompiledForest
+
+
+class ForestExplainer:
+    """
+    Per-prediction feature contributions of a forest, by tree-path decomposition.
+
+    Walking from a tree's root to a leaf, every split moves the stroke
+    probability from its parent node's value to its child's; the change is
+    credited to the split feature. A leaf's value is therefore the root
+    value plus one contribution per feature, and averaging over the trees
+    splits the forest's probability into a baseline (the mean root value)
+    and per-feature contributions that add up to it exactly.
+
+    The contributions along the path to every node are tabulated once, when
+    the explainer is built, so explaining rows is a gather from the leaves
+    they reach, like scoring them.
+    """
+
+    # Rows explained per gather; bounds the (rows x trees x features) block
+    chunk_size = 512
+
+    def __init__(self, forest: CompiledForest, n_features: int, class_index: int = 1):
+        value = np.asarray(forest.value[:, class_index], dtype=np.float64)
+        feature = np.asarray(forest.feature)
+        children_left = np.asarray(forest.children_left)
+        children_right = np.asarray(forest.children_right)
+
+        # Contributions accumulated from the root to each node, one level at a time
+        contributions = np.zeros((len(value), n_features), dtype=np.float64)
+        nodes = np.asarray(forest.roots)
+        for _ in range(forest.max_depth):
+            # Leaves point to themselves
+            nodes = nodes[children_left[nodes] != nodes]
+            if not len(nodes):
+                break
+            children = []
+            for child in (children_left[nodes], children_right[nodes]):
+                contributions[child] = contributions[nodes]
+                contributions[child, feature[nodes]] += value[child] - value[nodes]
+                children.append(child)
+            nodes = np.concatenate(children)
+
+        self.value = value
+        self.contributions = contributions
+        self.roots = np.asarray(forest.roots)
+        self.baseline = float(value[self.roots].mean())
+
+    @classmethod
+    def from_sklearn(cls, forest, n_features: int, class_index: int = 1) -> 'ForestExplainer':
+        """Explainer for a fitted ``RandomForestClassifier``."""
+        return cls(CompiledForest.from_sklearn(forest), n_features, class_index)
+
+    def sklearn_leaves(self, forest, X: np.ndarray) -> np.ndarray:
+        """Leaves of ``forest`` (the one this explainer was built from) reached by every row."""
+        X = np.ascontiguousarray(X, dtype=np.float32)
+        return np.column_stack([tree.apply(X, check_input=False) for tree in forest.estimators_]) + self.roots
+
+    def explain(self, leaves: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Probabilities and feature contributions of rows, from their leaves.
+
+        Args:
+            leaves: Leaf reached in every tree, shape (n_rows, n_trees), as
+                returned by ``CompiledForest.apply``
+
+        Returns:
+            The probability of each row, and its contribution per feature
+            (n_rows x n_features); each row's contributions add up to its
+            probability minus ``baseline``
+        """
+        return self.value[leaves].mean(axis=1), self.contributions[leaves].mean(axis=1)
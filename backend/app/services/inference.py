@@ -0,0 +1,466 @@
+import os
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+import joblib
+import numpy as np
+
+from .forest_compiler import CompiledForest, compile_forest
+from .forest_explainer import ForestExplainer
+from .intake_analysis import analyze_intake, nutrition_matrix
+from .metrics import METRICS
+from .recommendation_engine import DEFAULT_ENGINE
+from .similarity_index import SimilarityIndex
+
+# Default location of the saved models (backend/app/models), which is also
+# where the API loads them from
+MODELS_DIR = os.path.normpath(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'models'))
+
+# Subdirectory of a model directory holding the flat-array forest export
+FOREST_DIR = 'stroke_forest'
+# Artifacts of the compacted forest, saved next to the full one
+COMPACT_MODEL_FILE = 'stroke_model_compact.joblib'
+COMPACT_FOREST_DIR = 'stroke_forest_compact'
+# File holding the similar-patient index
+SIMILARITY_FILE = 'similarity_index.joblib'
+
+
+def _to_float(value: Any) -> float:
+    """Convert a value to float, or NaN if it isn't numeric."""
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return float('nan')
+
+
+class InferenceModel:
+    """
+    The serving half of the stroke model: loading a saved model, scoring
+    patients and looking up their recommendations.
+    
+    Imports only what prediction needs (numpy, joblib and the inference
+    services), so API and process-pool workers start without loading the
+    training stack; model_trainer.NutritionStrokeModel adds training on top.
+    """
+    
+    # Compiled recommendation rules; a class attribute, so it isn't pickled
+    # with every model sent to a process-pool worker
+    recommendation_engine = DEFAULT_ENGINE
+    
+    def __init__(self):
+        self.stroke_model = None
+        self.nutrition_scaler = None
+        self.encoders = {}
+        self.feature_columns = [
+            'age', 'gender', 'bmi', 'hypertension', 'heart_disease',
+            'avg_glucose_level', 'smoking_status', 'residence_type', 'work_type'
+        ]
+        self.nutrition_columns = [
+            'calories', 'protein_g', 'fat_g', 'carbs_g', 'fiber_g',
+            'sugar_g', 'sodium_mg', 'potassium_mg', 'cholesterol_mg',
+            'vitamin_a_iu', 'vitamin_c_mg', 'calcium_mg', 'iron_mg'
+        ]
+        # Lookup tables for the inference fast path, built by _prepare_inference()
+        self._encoder_tables: Optional[Dict[str, Dict[str, int]]] = None
+        # Optional flat-array evaluator used instead of sklearn's trees
+        self.compiled_forest: Optional[CompiledForest] = None
+        # Registry version this model was loaded from or published as
+        self.version: Optional[str] = None
+        # Nearest-neighbor index over the real training patients
+        self.similarity_index: Optional[SimilarityIndex] = None
+        # Forest of the fewest trees within the accuracy budget, set by training
+        self.compact_model = None
+        # Which forest stroke_model holds: 'full', or 'compact' when loaded as such
+        self.variant = 'full'
+        # Per-node contribution tables for explanations, built by
+        # prepare_explanations() when the first explanation is requested
+        self.explainer: Optional[ForestExplainer] = None
+    
+    def _prepare_inference(self) -> None:
+        """
+        Precompute plain-dict lookup tables from the fitted encoders.
+        
+        ``LabelEncoder`` codes are positions in ``classes_``, so each table maps
+        a normalized label to the code ``encoder.transform`` would return.
+        Unseen labels fall back to code 0, i.e. ``classes_[0]``.
+        """
+        self._encoder_tables = {
+            col: {label: code for code, label in enumerate(encoder.classes_)}
+            for col, encoder in self.encoders.items()
+        }
+    
+    def _encode_row(self, patient_data: Dict[str, Any]) -> np.ndarray:
+        """Build a single encoded feature row in ``feature_columns`` order."""
+        if self._encoder_tables is None:
+            self._prepare_inference()
+        
+        row = np.empty((1, len(self.feature_columns)), dtype=np.float32)
+        for i, col in enumerate(self.feature_columns):
+            value = patient_data[col]
+            table = self._encoder_tables.get(col)
+            if table is None:
+                row[0, i] = value
+                continue
+            
+            label = str(value).lower().strip()
+            code = table.get(label)
+            if code is None:
+                print(f"Warning: Found unknown {col} values: ['{label}']")
+                code = 0
+            row[0, i] = code
+        
+        return row
+    
+    def compile_forest(self) -> bool:
+        """
+        Switch inference to the flat-array forest evaluator.
+        
+        The compiled forest is checked against sklearn's probabilities before
+        it is used; returns False (and keeps sklearn) if they disagree.
+        """
+        self.compiled_forest = compile_forest(self.stroke_model, len(self.feature_columns))
+        return self.compiled_forest is not None
+    
+    def _predict_proba_array(self, X: np.ndarray) -> np.ndarray:
+        """
+        Class probabilities for an encoded float32 feature matrix.
+        
+        Equivalent to ``stroke_model.predict_proba`` but averages the trees
+        sequentially, skipping input validation (the matrix is already in
+        ``feature_columns`` order) and the joblib dispatch that dominates
+        the cost of scoring a handful of rows.
+        """
+        if self.compiled_forest is not None:
+            return self.compiled_forest.predict_proba(X)
+        
+        X = np.ascontiguousarray(X, dtype=np.float32)
+        proba = np.zeros((X.shape[0], self.stroke_model.n_classes_), dtype=np.float64)
+        for tree in self.stroke_model.estimators_:
+            proba += tree.predict_proba(X, check_input=False)
+        proba /= len(self.stroke_model.estimators_)
+        return proba
+    
+    def prepare_explanations(self) -> None:
+        """Tabulate the per-node feature contributions explanations are gathered from."""
+        if self.compiled_forest is not None:
+            self.explainer = ForestExplainer(self.compiled_forest, len(self.feature_columns))
+        else:
+            self.explainer = ForestExplainer.from_sklearn(self.stroke_model, len(self.feature_columns))
+    
+    def _explain_array(self, X: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Stroke probabilities and per-feature contributions for an encoded
+        float32 feature matrix.
+        
+        The probabilities come from the same leaves as the contributions, so
+        explaining rows takes one forest traversal, like scoring them.
+        """
+        if self.explainer is None:
+            self.prepare_explanations()
+        
+        X = np.ascontiguousarray(X, dtype=np.float32)
+        proba = np.empty(X.shape[0], dtype=np.float64)
+        contributions = np.empty((X.shape[0], len(self.feature_columns)), dtype=np.float64)
+        for start in range(0, X.shape[0], self.explainer.chunk_size):
+            chunk = X[start:start + self.explainer.chunk_size]
+            if self.compiled_forest is not None:
+                leaves = self.compiled_forest.apply(chunk)
+            else:
+                leaves = self.explainer.sklearn_leaves(self.stroke_model, chunk)
+            rows = slice(start, start + len(chunk))
+            proba[rows], contributions[rows] = self.explainer.explain(leaves)
+        return proba, contributions
+    
+    def _explanation(self, contributions: np.ndarray) -> Dict[str, Any]:
+        """Explanation of one prediction, largest contributions (either sign) first."""
+        order = np.argsort(-np.abs(contributions), kind='stable')
+        return {
+            'baseline_risk': self.explainer.baseline,
+            'contributions': {self.feature_columns[i]: float(contributions[i]) for i in order}
+        }
+    
+    def predict_stroke_risk(self, patient_data: Dict[str, Any], explain: bool = False) -> Dict[str, Any]:
+        """
+        Predict stroke risk for a given patient.
+        
+        With ``explain``, the result also holds an ``explanation``: the
+        baseline risk and how much each feature moved this patient's risk
+        away from it.
+        """
+        try:
+            start = time.perf_counter()
+            features = self._encode_row(patient_data)
+            encoded = time.perf_counter()
+            if explain:
+                stroke_probs, contributions = self._explain_array(features)
+                stroke_prob = stroke_probs[0]
+            else:
+                stroke_prob = self._predict_proba_array(features)[0][1]
+            METRICS.observe('encode', encoded - start)
+            METRICS.observe('predict', time.perf_counter() - encoded)
+            
+            result = {
+                'stroke_risk': float(stroke_prob),
+                'risk_category': self._get_risk_category(stroke_prob)
+            }
+            if explain:
+                result['explanation'] = self._explanation(contributions[0])
+            return result
+            
+        except Exception as e:
+            print(f"Error in predict_stroke_risk: {str(e)}")
+            print(f"Input data: {patient_data}")
+            raise
+    
+    def _encode_batch(self, records: List[Dict[str, Any]]) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Encode records column-wise into a float32 feature matrix.
+        
+        Returns the matrix in ``feature_columns`` order together with a
+        boolean mask of the same shape marking missing or non-numeric values.
+        """
+        if self._encoder_tables is None:
+            self._prepare_inference()
+        
+        n_rows = len(records)
+        features = np.empty((n_rows, len(self.feature_columns)), dtype=np.float32)
+        missing = np.zeros(features.shape, dtype=bool)
+        
+        for j, col in enumerate(self.feature_columns):
+            values = [record.get(col) for record in records]
+            table = self._encoder_tables.get(col)
+            
+            if table is None:
+                # Coerce numeric columns; anything that is not a number is an error
+                try:
+                    column = np.array(values, dtype=np.float64)
+                except (TypeError, ValueError):
+                    column = np.array([_to_float(v) for v in values], dtype=np.float64)
+                missing[:, j] = ~np.isfinite(column)
+                features[:, j] = column
+                continue
+            
+            # Encode categorical variables, mapping unseen labels to the first class
+            labels = [str(v).lower().strip() for v in values]
+            codes = np.fromiter((table.get(label, -1) for label in labels), dtype=np.int64, count=n_rows)
+            missing[:, j] = [v is None or v != v for v in values]
+            unknown = (codes < 0) & ~missing[:, j]
+            if unknown.any():
+                print(f"Warning: Found unknown {col} values: {np.unique(np.array(labels, dtype=object)[unknown])}")
+            codes[codes < 0] = 0
+            features[:, j] = codes
+        
+        return features, missing
+    
+    def predict_stroke_risk_batch(self, patients: List[Dict[str, Any]], explain: bool = False) -> List[Dict[str, Any]]:
+        """
+        Predict stroke risk for many patients with a single model call.
+        
+        Records are encoded column-wise in one pass and scored together with
+        one forest evaluation. Results are returned in input order; a
+        record that cannot be scored gets an ``error`` entry instead of a
+        prediction. ``explain`` adds an ``explanation`` to every prediction,
+        as in predict_stroke_risk.
+        """
+        results: List[Dict[str, Any]] = [None] * len(patients)
+        records = [p if isinstance(p, dict) else {} for p in patients]
+        if not records:
+            return results
+        
+        start = time.perf_counter()
+        features, missing = self._encode_batch(records)
+        METRICS.observe('encode', time.perf_counter() - start)
+        
+        invalid = missing.any(axis=1)
+        valid_idx = np.flatnonzero(~invalid)
+        if len(valid_idx):
+            start = time.perf_counter()
+            if explain:
+                stroke_probs, contributions = self._explain_array(features[valid_idx])
+            else:
+                stroke_probs = self._predict_proba_array(features[valid_idx])[:, 1]
+            METRICS.observe('predict', time.perf_counter() - start)
+            for n, (i, stroke_prob) in enumerate(zip(valid_idx, stroke_probs)):
+                results[i] = {
+                    'stroke_risk': float(stroke_prob),
+                    'risk_category': self._get_risk_category(stroke_prob)
+                }
+                if explain:
+                    results[i]['explanation'] = self._explanation(contributions[n])
+        
+        for i in np.flatnonzero(invalid):
+            if not isinstance(patients[i], dict):
+                results[i] = {'error': 'Patient record must be an object'}
+                continue
+            bad_cols = [col for col, bad in zip(self.feature_columns, missing[i]) if bad]
+            results[i] = {'error': f"Missing or invalid values for: {', '.join(bad_cols)}"}
+        
+        return results
+    
+    def find_similar_patients(self, patients: List[Dict[str, Any]], k: int = 5) -> List[Dict[str, Any]]:
+        """
+        The ``k`` most similar training patients for each query patient.
+        
+        Patients with a ``nutrition_data`` log are compared on their patient
+        features and nutrition; the others on their patient features only.
+        Records with missing or invalid features get an ``error`` entry.
+        
+        Returns:
+            Per patient, ``{'neighbors': [...]}`` nearest first, each with the
+            distance, cohort row number and decoded patient attributes
+        """
+        if self.similarity_index is None:
+            raise ValueError("This model has no similar-patient index; retrain it to build one")
+        
+        features, missing = self._encode_batch(patients)
+        invalid = missing.any(axis=1)
+        results: List[Dict[str, Any]] = [None] * len(patients)
+        for i in np.flatnonzero(invalid):
+            bad_cols = [col for col, m in zip(self.feature_columns, missing[i]) if m]
+            results[i] = {'error': f"Missing or invalid values for: {', '.join(bad_cols)}"}
+        
+        with_log = np.array([bool(p.get('nutrition_data')) for p in patients], dtype=bool)
+        for has_log in (False, True):
+            rows = np.flatnonzero(~invalid & (with_log == has_log))
+            if len(rows) == 0:
+                continue
+            nutrition = None
+            if has_log:
+                nutrition = nutrition_matrix([patients[i]['nutrition_data'] for i in rows], self.nutrition_columns)
+            distances, neighbors = self.similarity_index.query(features[rows], nutrition, k=k)
+            
+            for i, dist_row, neighbor_row in zip(rows, distances, neighbors):
+                described = self.similarity_index.describe(neighbor_row, self.feature_columns, self.encoders)
+                results[i] = {'neighbors': [
+                    {'distance': float(d), 'row': int(r), 'patient': patient}
+                    for d, r, patient in zip(dist_row, neighbor_row, described)
+                ]}
+        
+        return results
+    
+    def get_nutrition_recommendations(self, patient_data: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Generate nutrition recommendations based on patient data.
+        
+        Looked up in the compiled rule table (see recommendation_engine), so
+        the returned recommendation tuple and goals are shared and read-only.
+        """
+        recommendations, daily_goals = self.recommendation_engine.lookup(patient_data)
+        return {
+            'recommendations': recommendations,
+            'daily_goals': daily_goals
+        }
+    
+    def get_nutrition_recommendations_batch(self, patients: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Batch version of get_nutrition_recommendations."""
+        return [
+            {'recommendations': recommendations, 'daily_goals': daily_goals}
+            for recommendations, daily_goals in self.recommendation_engine.lookup_batch(patients)
+        ]
+    
+    def analyze_nutrient_intake_batch(self, nutrition_logs: List[Optional[Dict[str, float]]],
+                                      goals: List[Dict[str, Any]]) -> List[Optional[Tuple[Dict[str, Any], Tuple[str, ...]]]]:
+        """
+        Nutrient intake analysis for many diet logs at once.
+        
+        Each log is standardized with the fitted nutrition scaler and
+        compared with the matching daily goals (see intake_analysis).
+        
+        Args:
+            nutrition_logs: Nutrient intake per patient, or None when not logged
+            goals: Daily nutrition goals of each patient
+            
+        Returns:
+            Per log, the nutrient analysis and intake recommendations, or None
+            for logs with no known nutrients
+        """
+        logs = [log or {} for log in nutrition_logs]
+        return analyze_intake(
+            logs, goals, self.nutrition_columns,
+            self.nutrition_scaler.mean_, self.nutrition_scaler.scale_
+        )
+    
+    def _get_risk_category(self, probability: float) -> str:
+        """Convert probability to risk category."""
+        if probability < 0.2:
+            return 'Low'
+        elif probability < 0.5:
+            return 'Moderate'
+        else:
+            return 'High'
+    
+    def _get_daily_nutrition_goals(self, patient_data: Dict[str, Any]) -> Dict[str, Any]:
+        """Calculate personalized daily nutrition goals."""
+        return self.recommendation_engine.lookup(patient_data)[1]
+    
+    def save_models(self, model_dir: str = MODELS_DIR) -> None:
+        """Save trained models and encoders."""
+        os.makedirs(model_dir, exist_ok=True)
+        
+        joblib.dump(self.stroke_model, os.path.join(model_dir, 'stroke_model.joblib'))
+        joblib.dump(self.nutrition_scaler, os.path.join(model_dir, 'nutrition_scaler.joblib'))
+        joblib.dump(self.encoders, os.path.join(model_dir, 'encoders.joblib'))
+        
+        # Flat-array export of the forest for memory-mapped loading
+        forest = self.compiled_forest or compile_forest(self.stroke_model, len(self.feature_columns))
+        if forest is not None:
+            forest.save(os.path.join(model_dir, FOREST_DIR))
+        
+        if self.similarity_index is not None:
+            self.similarity_index.save(os.path.join(model_dir, SIMILARITY_FILE))
+        
+        if self.compact_model is not None:
+            joblib.dump(self.compact_model, os.path.join(model_dir, COMPACT_MODEL_FILE))
+            compact_forest = compile_forest(self.compact_model, len(self.feature_columns))
+            if compact_forest is not None:
+                compact_forest.save(os.path.join(model_dir, COMPACT_FOREST_DIR))
+    
+    @classmethod
+    def load_models(cls, model_dir: str = MODELS_DIR, inference_backend: str = 'sklearn',
+                    storage: str = 'joblib', variant: str = 'full') -> 'InferenceModel':
+        """
+        Load trained models and encoders.
+        
+        Args:
+            model_dir: Directory containing the saved models
+            inference_backend: 'sklearn' to score with the fitted trees, or
+                'compiled' to use the verified flat-array forest evaluator
+            storage: 'joblib' to unpickle the sklearn forest, or 'mmap' to
+                memory-map the flat-array export instead. Memory-mapped
+                models are shared between processes through the page cache
+                and always use the compiled evaluator.
+            variant: 'full' for the trained forest, or 'compact' for the
+                compacted one; models saved without a compact forest load
+                the full one
+        """
+        if variant not in ('full', 'compact'):
+            raise ValueError(f"Unknown model variant: {variant}")
+        instance = cls()
+        
+        model_file, forest_dir = 'stroke_model.joblib', os.path.join(model_dir, FOREST_DIR)
+        if variant == 'compact':
+            if os.path.exists(os.path.join(model_dir, COMPACT_MODEL_FILE)):
+                model_file, forest_dir = COMPACT_MODEL_FILE, os.path.join(model_dir, COMPACT_FOREST_DIR)
+                instance.variant = 'compact'
+            else:
+                print(f"Warning: no compact forest in {model_dir}; loading the full model")
+        
+        instance.nutrition_scaler = joblib.load(os.path.join(model_dir, 'nutrition_scaler.joblib'))
+        instance.encoders = joblib.load(os.path.join(model_dir, 'encoders.joblib'))
+        instance._prepare_inference()
+        
+        # The similar-patient index is always memory-mapped
+        similarity_path = os.path.join(model_dir, SIMILARITY_FILE)
+        if os.path.exists(similarity_path):
+            instance.similarity_index = SimilarityIndex.load(similarity_path, mmap_mode='r')
+        
+        if storage == 'mmap' and os.path.isdir(forest_dir):
+            instance.compiled_forest = CompiledForest.load(forest_dir, mmap_mode='r')
+        else:
+            if storage == 'mmap':
+                print(f"Warning: no flat forest export in {model_dir}; loading the joblib model")
+            instance.stroke_model = joblib.load(os.path.join(model_dir, model_file))
+            if inference_backend == 'compiled':
+                instance.compile_forest()
+        
+        return instance
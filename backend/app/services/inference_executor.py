@@ -0,0 +1,192 @@
+import asyncio
+import multiprocessing
+import os
+import time
+from collections import deque
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Any, Callable, Deque, Dict, Optional
+
+from .metrics import METRICS
+
+# Model replica held by each process-pool worker
+_worker_model = None
+
+
+def _init_worker(model, metrics_enabled: bool = True) -> None:
+    global _worker_model
+    _worker_model = model
+    # Stage timings are sent back with each result and recorded by the server
+    METRICS.enabled = metrics_enabled
+    METRICS.forward = True
+
+
+def _ping(delay: float = 0.0) -> bool:
+    # The delay keeps one worker busy so the next ping goes to another worker
+    time.sleep(delay)
+    return _worker_model is not None
+
+
+def _call_with_worker_model(func: Callable, args: tuple) -> Any:
+    METRICS.drain()
+    return func(_worker_model, *args), METRICS.drain()
+
+
+class ExecutorSaturated(Exception):
+    """Raised when every worker is busy and the wait queue is full."""
+
+
+class InferenceExecutor:
+    """
+    Runs CPU-bound model calls off the asyncio event loop.
+    
+    Modes:
+        inline: call the model directly on the event loop (no isolation)
+        thread: a thread pool sharing the loaded model
+        process: a process pool where each worker holds its own model replica
+    
+    At most ``max_workers + queue_depth`` calls are accepted at once; beyond
+    that ``run`` raises ExecutorSaturated so the API can shed load instead of
+    queueing requests without bound, unless the caller asks to wait for a
+    free slot.
+    """
+    
+    def __init__(self, mode: str = 'inline', max_workers: Optional[int] = None, queue_depth: int = 64):
+        if mode not in ('inline', 'thread', 'process'):
+            raise ValueError(f"Unknown executor mode: {mode}")
+        self.mode = mode
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self.queue_depth = queue_depth
+        self.model = None
+        self._pool: Optional[Executor] = None
+        self._in_flight = 0
+        self._rejected = 0
+        # Callers waiting for a free slot, woken in arrival order
+        self._waiters: Deque[asyncio.Future] = deque()
+    
+    @property
+    def capacity(self) -> int:
+        return self.max_workers + self.queue_depth
+    
+    def start(self, model) -> None:
+        """Create the worker pool and hand it the model to serve."""
+        self.model = model
+        self._pool = self._create_pool(model)
+        if self.mode == 'process':
+            # Spawn every worker now rather than on the first requests
+            for _ in range(self.max_workers):
+                self._pool.submit(_ping)
+    
+    def _create_pool(self, model) -> Optional[Executor]:
+        if self.mode == 'thread':
+            return ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix='inference')
+        if self.mode == 'process':
+            return ProcessPoolExecutor(
+                max_workers=self.max_workers,
+                mp_context=multiprocessing.get_context('spawn'),
+                initializer=_init_worker,
+                initargs=(model, METRICS.enabled)
+            )
+        return None
+    
+    async def swap_model(self, model) -> None:
+        """
+        Serve ``model`` from now on.
+        
+        Calls already submitted finish on the model they started with: thread
+        calls are bound to it at submit time, and in process mode a fresh pool
+        of replicas is started and warmed up before it takes over, while the
+        old pool drains in the background.
+        """
+        if self.mode != 'process':
+            if self._pool is None:
+                self.start(model)
+            else:
+                self.model = model
+            return
+        
+        old_pool = self._pool
+        new_pool = self._create_pool(model)
+        await self._warm_up(new_pool)
+        self.model, self._pool = model, new_pool
+        if old_pool is not None:
+            old_pool.shutdown(wait=False)
+    
+    async def _warm_up(self, pool: Executor) -> None:
+        """Wait until the workers of a new process pool have their replicas."""
+        loop = asyncio.get_running_loop()
+        await asyncio.gather(*(
+            loop.run_in_executor(pool, _ping, 0.05) for _ in range(self.max_workers)
+        ))
+    
+    def _wake_waiter(self) -> None:
+        """Hand a freed slot to the longest-waiting caller, if any."""
+        while self._waiters:
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                waiter.set_result(None)
+                return
+    
+    async def _wait_for_slot(self) -> None:
+        """Wait until fewer than ``capacity`` calls are in flight."""
+        while self._in_flight >= self.capacity:
+            waiter = asyncio.get_running_loop().create_future()
+            self._waiters.append(waiter)
+            try:
+                await waiter
+            except asyncio.CancelledError:
+                # A slot handed to a cancelled caller goes to the next one
+                if waiter.done() and not waiter.cancelled():
+                    self._wake_waiter()
+                raise
+    
+    async def run(self, func: Callable, *args, wait: bool = False) -> Any:
+        """
+        Call ``func(model, *args)`` on a worker and await the result.
+        
+        Args:
+            func: Called with the model followed by ``args``
+            wait: At capacity, wait for a call to finish instead of raising
+        
+        Raises:
+            ExecutorSaturated: If the executor is already at capacity and
+                ``wait`` is not set
+        """
+        if self._pool is None:
+            return func(self.model, *args)
+        
+        if self._in_flight >= self.capacity:
+            if not wait:
+                self._rejected += 1
+                raise ExecutorSaturated(
+                    f"Inference queue is full ({self._in_flight} requests in flight)"
+                )
+            await self._wait_for_slot()
+        
+        loop = asyncio.get_running_loop()
+        self._in_flight += 1
+        try:
+            if self.mode == 'process':
+                result, observations = await loop.run_in_executor(
+                    self._pool, _call_with_worker_model, func, args
+                )
+                METRICS.observe_many(observations)
+                return result
+            # Bind the model now so a concurrent swap doesn't affect this call
+            return await loop.run_in_executor(self._pool, func, self.model, *args)
+        finally:
+            self._in_flight -= 1
+            self._wake_waiter()
+    
+    def shutdown(self, wait: bool = True) -> None:
+        if self._pool is not None:
+            self._pool.shutdown(wait=wait)
+            self._pool = None
+    
+    def stats(self) -> Dict[str, Any]:
+        return {
+            'mode': self.mode,
+            'max_workers': self.max_workers,
+            'queue_depth': self.queue_depth,
+            'in_flight': self._in_flight,
+            'rejected': self._rejected
+        }
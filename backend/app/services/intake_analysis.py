@@ -0,0 +1,140 @@
+from typing import Any, Dict, List, Mapping, Optional, Sequence, Tuple
+
+import numpy as np
+
+# How each daily goal is read: a minimum to reach, a maximum to stay under,
+# or a target to stay within GOAL_TOLERANCE of
+GOAL_DIRECTIONS = {
+    'calories': 'target',
+    'protein_g': 'min',
+    'fiber_g': 'min',
+    'calcium_mg': 'min',
+    'sodium_mg': 'max',
+    'sugar_g': 'max',
+}
+GOAL_TOLERANCE = 0.1
+
+# Intake farther than this many standard deviations from the training
+# population is flagged as unusually high or low
+Z_SCORE_LIMIT = 2.0
+
+# Recommendations added for (nutrient, status) findings, in this order
+INTAKE_RECOMMENDATIONS = {
+    ('sodium_mg', 'above_goal'): "Your sodium intake is above your daily goal; limit processed foods and added salt.",
+    ('sugar_g', 'above_goal'): "Your sugar intake is above your daily goal; cut back on sweets and sugary drinks.",
+    ('calories', 'above_goal'): "Your calorie intake is above your daily goal; reduce portion sizes.",
+    ('calories', 'below_goal'): "Your calorie intake is below your daily goal; make sure you eat regular, balanced meals.",
+    ('fiber_g', 'below_goal'): "Your fiber intake is below your daily goal; add legumes, whole grains and vegetables.",
+    ('protein_g', 'below_goal'): "Your protein intake is below your daily goal; include lean protein with each meal.",
+    ('calcium_mg', 'below_goal'): "Your calcium intake is below your daily goal; add dairy or fortified alternatives.",
+    ('cholesterol_mg', 'high'): "Your cholesterol intake is unusually high; limit red meat, egg yolks and full-fat dairy.",
+    ('fat_g', 'high'): "Your fat intake is unusually high; choose lean cuts and cook with less oil.",
+    ('potassium_mg', 'low'): "Your potassium intake is unusually low; eat more fruits, vegetables and beans.",
+}
+
+
+def nutrition_matrix(logs: Sequence[Mapping[str, Any]], columns: Sequence[str]) -> np.ndarray:
+    """Diet logs as a (logs x nutrients) float matrix, with NaN for nutrients not logged."""
+    X = np.full((len(logs), len(columns)), np.nan)
+    for i, log in enumerate(logs):
+        for j, col in enumerate(columns):
+            value = log.get(col)
+            if value is not None:
+                X[i, j] = value
+    return X
+
+
+def goal_matrix(goals: Sequence[Mapping[str, Any]], keys: Sequence[str]) -> np.ndarray:
+    """Daily goals as a (logs x goals) matrix, with NaN where a patient has no goal."""
+    # Goal dicts are shared between patients in the same rule bucket, so
+    # each distinct dict is converted once
+    rows: Dict[int, List[float]] = {}
+    G = np.empty((len(goals), len(keys)))
+    for i, goal in enumerate(goals):
+        row = rows.get(id(goal))
+        if row is None:
+            row = rows[id(goal)] = [goal.get(key, np.nan) for key in keys]
+        G[i] = row
+    return G
+
+
+def analyze_intake(logs: Sequence[Mapping[str, Any]], goals: Sequence[Mapping[str, Any]],
+                   columns: Sequence[str], mean: np.ndarray,
+                   scale: np.ndarray) -> List[Optional[Tuple[Dict[str, Any], Tuple[str, ...]]]]:
+    """
+    Compare many diet logs with the training population and with each patient's goals.
+
+    All logs are standardized with the fitted scaler's ``mean`` and
+    ``scale`` in one array operation, and every goal comparison is done on
+    whole columns; only the per-log result dicts are built row by row.
+
+    Args:
+        logs: Nutrient intake per log, keyed by nutrition column
+        goals: Daily nutrition goals of the patient each log belongs to
+        columns: Nutrition columns the scaler was fitted on
+        mean: ``nutrition_scaler.mean_``
+        scale: ``nutrition_scaler.scale_``
+
+    Returns:
+        Per log, the nutrient analysis and the intake recommendations, or
+        None for logs without any known nutrient
+    """
+    X = nutrition_matrix(logs, columns)
+    Z = (X - mean) / scale
+
+    goal_keys = [col for col in columns if col in GOAL_DIRECTIONS]
+    goal_idx = [columns.index(col) for col in goal_keys]
+    G = goal_matrix(goals, goal_keys)
+    intake = X[:, goal_idx]
+    gap = intake - G
+
+    # Status per (log, goal) as an index into the labels below
+    status_labels = np.array(['met', 'below_goal', 'above_goal', None], dtype=object)
+    status = np.zeros(gap.shape, dtype=np.intp)
+    for k, col in enumerate(goal_keys):
+        direction = GOAL_DIRECTIONS[col]
+        if direction == 'min':
+            status[:, k] = np.where(gap[:, k] < 0, 1, 0)
+        elif direction == 'max':
+            status[:, k] = np.where(gap[:, k] > 0, 2, 0)
+        else:
+            tolerance = GOAL_TOLERANCE * G[:, k]
+            status[:, k] = np.select([gap[:, k] < -tolerance, gap[:, k] > tolerance], [1, 2], 0)
+    status[np.isnan(gap)] = 3
+
+    z_labels = np.array(['low', 'typical', 'high'], dtype=object)
+    z_status = np.select([Z < -Z_SCORE_LIMIT, Z > Z_SCORE_LIMIT], [0, 2], 1)
+    logged = ~np.isnan(X)
+
+    goal_status = status_labels[status]
+    population_status = z_labels[z_status]
+    goal_position = {col: k for k, col in enumerate(goal_keys)}
+
+    results: List[Optional[Tuple[Dict[str, Any], Tuple[str, ...]]]] = []
+    for i in range(len(logs)):
+        if not logged[i].any():
+            results.append(None)
+            continue
+
+        nutrients = {}
+        findings = set()
+        for j in np.flatnonzero(logged[i]):
+            col = columns[j]
+            entry = {
+                'intake': float(X[i, j]),
+                'z_score': float(Z[i, j]),
+                'population': population_status[i, j]
+            }
+            findings.add((col, entry['population']))
+            k = goal_position.get(col)
+            if k is not None and status[i, k] != 3:
+                entry['goal'] = float(G[i, k])
+                entry['gap'] = float(gap[i, k])
+                entry['status'] = goal_status[i, k]
+                findings.add((col, entry['status']))
+            nutrients[col] = entry
+
+        recommendations = tuple(text for finding, text in INTAKE_RECOMMENDATIONS.items() if finding in findings)
+        results.append(({'nutrients': nutrients}, recommendations))
+
+    return results
@@ -0,0 +1,212 @@
+import threading
+import time
+from bisect import bisect_left
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+# Upper bounds, in seconds, of the latency histogram buckets
+LATENCY_BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5)
+
+# Stages of an /analyze request, in the order they run
+REQUEST_STAGES = ('parse', 'encode', 'predict', 'recommend', 'serialize')
+
+
+class Histogram:
+    """
+    Latency histogram safe to update from any thread without a lock.
+
+    Every thread counts into its own shard; shards are only summed when the
+    histogram is read, so an observation is a bisect and three in-place
+    updates of thread-local lists.
+    """
+
+    def __init__(self, buckets: Tuple[float, ...] = LATENCY_BUCKETS):
+        self.buckets = buckets
+        self._local = threading.local()
+        self._shards: List[List[float]] = []
+
+    def _shard(self) -> List[float]:
+        shard = getattr(self._local, 'shard', None)
+        if shard is None:
+            # Bucket counts, then +Inf count, sum and total count
+            shard = self._local.shard = [0] * (len(self.buckets) + 1) + [0.0, 0]
+            self._shards.append(shard)  # list.append is atomic
+        return shard
+
+    def observe(self, value: float) -> None:
+        shard = self._shard()
+        shard[bisect_left(self.buckets, value)] += 1
+        shard[-2] += value
+        shard[-1] += 1
+
+    def snapshot(self) -> Tuple[List[int], float, int]:
+        """Cumulative bucket counts (the last one is +Inf), sum and count."""
+        totals = [0] * (len(self.buckets) + 1)
+        total_sum, total_count = 0.0, 0
+        for shard in list(self._shards):
+            for i in range(len(totals)):
+                totals[i] += shard[i]
+            total_sum += shard[-2]
+            total_count += shard[-1]
+        cumulative, running = [], 0
+        for count in totals:
+            running += count
+            cumulative.append(running)
+        return cumulative, total_sum, total_count
+
+
+class Metrics:
+    """
+    Process-wide request stage timings.
+
+    ``observe`` is called on the hot path with durations measured with
+    ``time.perf_counter``; when disabled it returns immediately. Process-pool
+    workers run with ``forward`` set: they keep their observations in a list
+    that the inference executor ships back with each result, to be recorded
+    in the serving process.
+    """
+
+    def __init__(self, enabled: bool = True):
+        self.enabled = enabled
+        self.forward = False
+        self.stages: Dict[str, Histogram] = {stage: Histogram() for stage in REQUEST_STAGES}
+        self.requests: Dict[Tuple[str, int], Histogram] = {}
+        self._forwarded: List[Tuple[str, float]] = []
+
+    def observe(self, stage: str, seconds: float) -> None:
+        if not self.enabled:
+            return
+        if self.forward:
+            self._forwarded.append((stage, seconds))
+            return
+        self.stages[stage].observe(seconds)
+
+    def observe_many(self, observations: Iterable[Tuple[str, float]]) -> None:
+        for stage, seconds in observations:
+            self.observe(stage, seconds)
+
+    def drain(self) -> List[Tuple[str, float]]:
+        """Observations kept by a forwarding worker since the last drain."""
+        observations, self._forwarded = self._forwarded, []
+        return observations
+
+    def observe_request(self, path: str, status: int, seconds: float) -> None:
+        if not self.enabled:
+            return
+        histogram = self.requests.get((path, status))
+        if histogram is None:
+            # setdefault keeps whichever histogram another thread created first
+            histogram = self.requests.setdefault((path, status), Histogram())
+        histogram.observe(seconds)
+
+
+METRICS = Metrics()
+
+
+def _labels(labels: Dict[str, Any]) -> str:
+    if not labels:
+        return ''
+    escaped = (
+        f'{key}="{str(value).replace(chr(92), chr(92) * 2).replace(chr(34), chr(92) + chr(34))}"'
+        for key, value in labels.items()
+    )
+    return '{' + ','.join(escaped) + '}'
+
+
+def _format_value(value: float) -> str:
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class PrometheusWriter:
+    """Builds the Prometheus text exposition format, one metric family at a time."""
+
+    def __init__(self):
+        self.lines: List[str] = []
+
+    def family(self, name: str, kind: str, help_text: str) -> None:
+        self.lines.append(f"# HELP {name} {help_text}")
+        self.lines.append(f"# TYPE {name} {kind}")
+
+    def sample(self, name: str, value: float, labels: Optional[Dict[str, Any]] = None) -> None:
+        self.lines.append(f"{name}{_labels(labels or {})} {_format_value(value)}")
+
+    def histogram(self, name: str, histogram: Histogram, labels: Optional[Dict[str, Any]] = None) -> None:
+        labels = labels or {}
+        cumulative, total_sum, count = histogram.snapshot()
+        for bound, bucket_count in zip(histogram.buckets + (float('inf'),), cumulative):
+            le = '+Inf' if bound == float('inf') else repr(bound)
+            self.sample(f"{name}_bucket", bucket_count, {**labels, 'le': le})
+        self.sample(f"{name}_sum", total_sum, labels)
+        self.sample(f"{name}_count", count, labels)
+
+    def render(self) -> str:
+        return '\n'.join(self.lines) + '\n'
+
+
+class RequestTimingMiddleware:
+    """
+    ASGI middleware timing every HTTP request, and the parse and serialize
+    stages of the handlers that mark where they start and end.
+
+    The time a request arrived is stored in ``scope['state']`` (exposed as
+    ``request.state.received_at``). A handler that calls ``mark_handler_start``
+    records everything before it (reading and validating the body) as the
+    ``parse`` stage; one that calls ``mark_handler_end`` gets the time until
+    the response headers are sent (encoding and validating the response)
+    recorded as ``serialize``.
+    """
+
+    def __init__(self, app, metrics: Metrics = METRICS):
+        self.app = app
+        self.metrics = metrics
+        # Route path template of each endpoint, so path parameters don't
+        # become label values
+        self._route_paths: Dict[Any, str] = {}
+
+    def _route_path(self, scope) -> str:
+        endpoint = scope.get('endpoint')
+        if endpoint is None:
+            return 'unmatched'
+        path = self._route_paths.get(endpoint)
+        if path is None:
+            for route in getattr(scope.get('app'), 'routes', ()):
+                if getattr(route, 'endpoint', None) is endpoint:
+                    path = route.path
+                    break
+            path = self._route_paths[endpoint] = path or scope['path']
+        return path
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] != 'http' or not self.metrics.enabled:
+            await self.app(scope, receive, send)
+            return
+
+        state = scope.setdefault('state', {})
+        state['received_at'] = start = time.perf_counter()
+        status = 500
+
+        async def timed_send(message):
+            nonlocal status
+            if message['type'] == 'http.response.start':
+                status = message['status']
+                handler_end = state.get('handler_end')
+                if handler_end is not None:
+                    self.metrics.observe('serialize', time.perf_counter() - handler_end)
+            await send(message)
+
+        try:
+            await self.app(scope, receive, timed_send)
+        finally:
+            self.metrics.observe_request(self._route_path(scope), status, time.perf_counter() - start)
+
+
+def mark_handler_start(request) -> None:
+    """Record the time since the request arrived as the ``parse`` stage."""
+    received_at = getattr(request.state, 'received_at', None)
+    if received_at is not None:
+        METRICS.observe('parse', time.perf_counter() - received_at)
+
+
+def mark_handler_end(request) -> None:
+    """Start the ``serialize`` stage; it ends when the response headers go out."""
+    if METRICS.enabled:
+        request.state.handler_end = time.perf_counter()
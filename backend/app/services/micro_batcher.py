@@ -0,0 +1,101 @@
+import asyncio
+from bisect import bisect_left
+from itertools import accumulate
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Set, Tuple
+
+# Upper bounds of the batch size histogram buckets
+BATCH_SIZE_BUCKETS = (1, 2, 4, 8, 16, 32, 64, 128, 256)
+
+
+class MicroBatcher:
+    """
+    Coalesces concurrent single-item requests into batches.
+    
+    Items submitted while a batch is open are collected until either
+    ``max_batch_size`` items are waiting or ``max_wait_ms`` has passed since
+    the first one arrived. The batch is then scored with one call to
+    ``score_batch`` and each waiting coroutine receives its own result.
+    """
+    
+    def __init__(self, score_batch: Callable[[List[Any]], Awaitable[List[Any]]],
+                 max_batch_size: int = 32, max_wait_ms: float = 2.0):
+        self.score_batch = score_batch
+        self.max_batch_size = max_batch_size
+        self.max_wait_ms = max_wait_ms
+        self._pending: List[Tuple[Any, asyncio.Future]] = []
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self._tasks: Set[asyncio.Task] = set()
+        
+        # Metrics
+        self._batches = 0
+        self._items = 0
+        self._flushed_full = 0
+        self._flushed_timeout = 0
+        self._size_counts = [0] * (len(BATCH_SIZE_BUCKETS) + 1)
+    
+    async def submit(self, item: Any) -> Any:
+        """Add an item to the open batch and wait for its result."""
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._pending.append((item, future))
+        
+        if len(self._pending) >= self.max_batch_size:
+            self._flushed_full += 1
+            self._flush()
+        elif self._timer is None:
+            self._timer = loop.call_later(self.max_wait_ms / 1000.0, self._flush_on_timeout)
+        
+        return await future
+    
+    def _flush_on_timeout(self) -> None:
+        self._timer = None
+        self._flushed_timeout += 1
+        self._flush()
+    
+    def _flush(self) -> None:
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        
+        batch, self._pending = self._pending, []
+        if not batch:
+            return
+        
+        self._batches += 1
+        self._items += len(batch)
+        self._size_counts[bisect_left(BATCH_SIZE_BUCKETS, len(batch))] += 1
+        
+        task = asyncio.ensure_future(self._run(batch))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+    
+    async def _run(self, batch: List[Tuple[Any, asyncio.Future]]) -> None:
+        try:
+            results = await self.score_batch([item for item, _ in batch])
+        except Exception as e:
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+        
+        for (_, future), result in zip(batch, results):
+            # The waiter may have gone away (e.g. client disconnected)
+            if not future.done():
+                future.set_result(result)
+    
+    def stats(self) -> Dict[str, Any]:
+        # Cumulative, like a Prometheus histogram: le_N counts batches of at most N items
+        histogram = dict(zip(
+            [f"le_{bound}" for bound in BATCH_SIZE_BUCKETS] + ["le_inf"],
+            accumulate(self._size_counts)
+        ))
+        return {
+            'max_batch_size': self.max_batch_size,
+            'max_wait_ms': self.max_wait_ms,
+            'batches': self._batches,
+            'items': self._items,
+            'mean_batch_size': self._items / self._batches if self._batches else 0.0,
+            'flushed_full': self._flushed_full,
+            'flushed_timeout': self._flushed_timeout,
+            'batch_size_histogram': histogram
+        }
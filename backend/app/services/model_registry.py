@@ -0,0 +1,233 @@
+import hashlib
+import json
+import os
+import shutil
+import uuid
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional, Tuple, Type
+
+import numpy as np
+
+from .inference import MODELS_DIR, InferenceModel
+
+MANIFEST_FILE = 'manifest.json'
+CURRENT_FILE = 'CURRENT'
+ARTIFACT_FILES = ['stroke_model.joblib', 'nutrition_scaler.joblib', 'encoders.joblib']
+
+# Version reported for models saved directly into the registry root by
+# save_models() before the registry existed
+LEGACY_VERSION = 'legacy'
+
+
+def _file_sha256(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def _list_files(directory: str) -> List[str]:
+    """Relative paths of all files under a directory, in sorted order."""
+    paths = []
+    for dirpath, _, filenames in os.walk(directory):
+        for filename in filenames:
+            paths.append(os.path.relpath(os.path.join(dirpath, filename), directory))
+    return sorted(paths)
+
+
+def _to_jsonable(value: Any) -> Any:
+    """Convert training metrics (numpy scalars, int dict keys) to JSON types."""
+    if isinstance(value, dict):
+        return {str(_to_jsonable(k)): _to_jsonable(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_to_jsonable(v) for v in value]
+    if isinstance(value, np.generic):
+        return value.item()
+    if isinstance(value, np.ndarray):
+        return value.tolist()
+    return value
+
+
+class ModelRegistry:
+    """
+    Versioned on-disk store of trained models.
+
+    Layout under ``root``::
+
+        versions/<version>/stroke_model.joblib
+        versions/<version>/nutrition_scaler.joblib
+        versions/<version>/encoders.joblib
+        versions/<version>/stroke_forest/*.npy
+        versions/<version>/manifest.json
+        CURRENT
+
+    A version directory is written under a temporary name and renamed into
+    place only once complete, and ``CURRENT`` (the name of the active version)
+    is replaced atomically, so readers never see a partially written model.
+    The manifest records a SHA-256 per artifact, checked on the first load
+    of a version, along with the feature and encoder schema and the
+    training metrics.
+    """
+
+    def __init__(self, root: str = MODELS_DIR):
+        self.root = root
+        self.versions_dir = os.path.join(root, 'versions')
+        # Versions whose artifacts matched their hashes, with the
+        # (size, mtime) of every file at the time
+        self._verified: Dict[str, Dict[str, Tuple[int, int]]] = {}
+
+    def version_dir(self, version: str) -> str:
+        return os.path.join(self.versions_dir, version)
+
+    def list_versions(self) -> List[str]:
+        if not os.path.isdir(self.versions_dir):
+            return []
+        return sorted(
+            name for name in os.listdir(self.versions_dir)
+            if os.path.exists(os.path.join(self.versions_dir, name, MANIFEST_FILE))
+        )
+
+    def current_version(self) -> Optional[str]:
+        """The active version, LEGACY_VERSION for a pre-registry model, or None."""
+        try:
+            with open(os.path.join(self.root, CURRENT_FILE)) as f:
+                return f.read().strip() or None
+        except FileNotFoundError:
+            pass
+        if all(os.path.exists(os.path.join(self.root, name)) for name in ARTIFACT_FILES):
+            return LEGACY_VERSION
+        return None
+
+    def read_manifest(self, version: str) -> Dict[str, Any]:
+        if version == LEGACY_VERSION:
+            return {'version': LEGACY_VERSION}
+        with open(os.path.join(self.version_dir(version), MANIFEST_FILE)) as f:
+            return json.load(f)
+
+    def publish(self, model: InferenceModel, metrics: Optional[Dict[str, Any]] = None,
+                activate: bool = True) -> str:
+        """
+        Save a trained model as a new version.
+
+        Args:
+            model: Trained model to save
+            metrics: Training metrics to record in the manifest
+            activate: Whether to point CURRENT at the new version
+
+        Returns:
+            The new version name: the UTC creation time to the microsecond
+            and the start of the forest's hash, plus a random suffix if
+            another publish took that name first
+        """
+        os.makedirs(self.versions_dir, exist_ok=True)
+        staging_dir = os.path.join(self.versions_dir, f".tmp-{uuid.uuid4().hex}")
+
+        try:
+            model.save_models(staging_dir)
+            files = {
+                name: {
+                    'sha256': _file_sha256(os.path.join(staging_dir, name)),
+                    'size': os.path.getsize(os.path.join(staging_dir, name))
+                }
+                for name in _list_files(staging_dir)
+            }
+            created_at = datetime.now(timezone.utc)
+            version = f"{created_at:%Y%m%dT%H%M%S%f}-{files['stroke_model.joblib']['sha256'][:8]}"
+            manifest = {
+                'version': version,
+                'created_at': created_at.isoformat(),
+                'files': files,
+                'feature_columns': model.feature_columns,
+                'nutrition_columns': model.nutrition_columns,
+                'encoders': {col: [str(c) for c in enc.classes_] for col, enc in model.encoders.items()},
+                'metrics': _to_jsonable(metrics or {})
+            }
+
+            # Renaming onto an existing (non-empty) version directory fails
+            # rather than replacing it, so a name taken in the meantime by a
+            # concurrent publish is detected and a suffix added
+            base_version = version
+            while True:
+                manifest['version'] = version
+                with open(os.path.join(staging_dir, MANIFEST_FILE), 'w') as f:
+                    json.dump(manifest, f, indent=2)
+                try:
+                    os.rename(staging_dir, self.version_dir(version))
+                    break
+                except OSError:
+                    if not os.path.exists(self.version_dir(version)):
+                        raise
+                version = f"{base_version}-{uuid.uuid4().hex[:6]}"
+        except Exception:
+            shutil.rmtree(staging_dir, ignore_errors=True)
+            raise
+
+        # Just hashed, so loading it doesn't hash it again
+        self._verified[version] = self._file_stats(version, files)
+
+        model.version = version
+        if activate:
+            self.activate(version)
+        return version
+
+    def activate(self, version: str) -> None:
+        """Atomically point CURRENT at an existing version."""
+        if version not in self.list_versions():
+            raise ValueError(f"Unknown model version: {version}")
+
+        pointer_tmp = os.path.join(self.root, f".{CURRENT_FILE}.{uuid.uuid4().hex}")
+        with open(pointer_tmp, 'w') as f:
+            f.write(version)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(pointer_tmp, os.path.join(self.root, CURRENT_FILE))
+
+    def _file_stats(self, version: str, names: List[str]) -> Dict[str, Tuple[int, int]]:
+        stats = {}
+        for name in names:
+            st = os.stat(os.path.join(self.version_dir(version), name))
+            stats[name] = (st.st_size, st.st_mtime_ns)
+        return stats
+
+    def verify(self, version: str, force: bool = False) -> None:
+        """
+        Check every artifact of a version against its manifest hash.
+
+        Versions are hashed once per registry: later calls only compare each
+        file's size and modification time with those seen when the hashes
+        matched, and hash again if any changed or ``force`` is set.
+        """
+        manifest = self.read_manifest(version)
+        stats = self._file_stats(version, list(manifest['files']))
+        if not force and self._verified.get(version) == stats:
+            return
+
+        for name, info in manifest['files'].items():
+            path = os.path.join(self.version_dir(version), name)
+            if _file_sha256(path) != info['sha256']:
+                raise ValueError(f"Checksum mismatch for {name} in model version {version}")
+        self._verified[version] = stats
+
+    def load(self, version: Optional[str] = None, model_class: Type[InferenceModel] = InferenceModel,
+             **load_options) -> InferenceModel:
+        """
+        Load a version (the current one by default) after verifying it.
+
+        Models are loaded as the slim ``InferenceModel`` unless ``model_class``
+        says otherwise; pass ``model_trainer.NutritionStrokeModel`` to get a
+        model that can be updated. Extra keyword arguments are passed to
+        ``load_models``.
+        """
+        version = version or self.current_version()
+        if version is None:
+            raise FileNotFoundError(f"No trained model found in {self.root}")
+
+        if version == LEGACY_VERSION:
+            model = model_class.load_models(self.root, **load_options)
+        else:
+            self.verify(version)
+            model = model_class.load_models(self.version_dir(version), **load_options)
+
+        model.version = version
+        return model
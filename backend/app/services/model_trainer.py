@@ -1,12 +1,12 @@
 import os
 import json
-import random
+import time
 import numpy as np
 import pandas as pd
-from typing import Dict, Any, Tuple, List, Optional
+from typing import Dict, Any, Tuple, List, Optional, Iterator
 from sklearn.ensemble import RandomForestClassifier, RandomForestRegressor
 from sklearn.preprocessing import LabelEncoder, StandardScaler
-from sklearn.model_selection import train_test_split, cross_val_score
+from sklearn.model_selection import train_test_split
 from sklearn.metrics import (
     accuracy_score, 
     classification_report, 
@@ -23,33 +23,51 @@ import joblib
 import logging
 from imblearn.pipeline import Pipeline as ImbPipeline
 
-class NutritionStrokeModel:
-    def __init__(self):
-        self.stroke_model = None
-        self.nutrition_scaler = None
-        self.encoders = {}
-        self.feature_columns = [
-            'age', 'gender', 'bmi', 'hypertension', 'heart_disease',
-            'avg_glucose_level', 'smoking_status', 'residence_type', 'work_type'
-        ]
-        self.nutrition_columns = [
-            'calories', 'protein_g', 'fat_g', 'carbs_g', 'fiber_g',
-            'sugar_g', 'sodium_mg', 'potassium_mg', 'cholesterol_mg',
-            'vitamin_a_iu', 'vitamin_c_mg', 'calcium_mg', 'iron_mg'
-        ]
-        
+from .forest_compaction import MIN_CLASS_ROWS, compact_forest
+from .inference import MODELS_DIR, InferenceModel
+from .similarity_index import SimilarityIndex
+from .training_engine import TrainingEngine, smote_pipeline, timed_stage
+
+CATEGORICAL_COLUMNS = ['gender', 'smoking_status', 'residence_type', 'work_type']
+NUMERIC_COLUMNS = ['age', 'bmi', 'avg_glucose_level', 'hypertension', 'heart_disease']
+
+# Rows per chunk for streaming ingest
+DEFAULT_CHUNKSIZE = 100_000
+
+def _is_parquet(path: str) -> bool:
+    return path.lower().endswith(('.parquet', '.pq'))
+
+def _population_stability_index(expected: np.ndarray, actual: np.ndarray, bins: int = 10) -> float:
+    """PSI of ``actual`` against ``expected``, over deciles of ``expected``."""
+    edges = np.unique(np.quantile(expected, np.linspace(0, 1, bins + 1)))
+    if len(edges) < 3:
+        return 0.0  # Constant scores leave a single bin
+    edges[0], edges[-1] = -np.inf, np.inf
+    expected_share = np.histogram(expected, edges)[0] / len(expected)
+    actual_share = np.histogram(actual, edges)[0] / len(actual)
+    # Empty bins would make the log undefined
+    expected_share = np.clip(expected_share, 1e-4, None)
+    actual_share = np.clip(actual_share, 1e-4, None)
+    return float(np.sum((actual_share - expected_share) * np.log(actual_share / expected_share)))
+
+class NutritionStrokeModel(InferenceModel):
+    """InferenceModel plus training, incremental updates and bulk file scoring."""
+    
     def load_data(self, data_path: str) -> pd.DataFrame:
         """Load and preprocess the dataset."""
         df = pd.read_csv(data_path)
-        
+        return self.clean_data(df)
+    
+    def clean_data(self, df: pd.DataFrame) -> pd.DataFrame:
+        """Normalize column types and fill missing values."""
         # Ensure all categorical columns are strings
-        categorical_cols = ['gender', 'smoking_status', 'residence_type', 'work_type']
+        categorical_cols = CATEGORICAL_COLUMNS
         for col in categorical_cols:
             if col in df.columns:
                 df[col] = df[col].astype(str).str.strip()
         
         # Convert numeric columns
-        numeric_cols = ['age', 'bmi', 'avg_glucose_level', 'hypertension', 'heart_disease']
+        numeric_cols = NUMERIC_COLUMNS
         for col in numeric_cols:
             if col in df.columns:
                 df[col] = pd.to_numeric(df[col], errors='coerce')
@@ -63,10 +81,220 @@ class NutritionStrokeModel:
         
         return df
     
+    def _read_chunks(self, data_path: str, chunksize: int, columns: Optional[List[str]] = None,
+                     skip_rows: int = 0) -> Iterator[pd.DataFrame]:
+        """
+        Read the training columns of a CSV or Parquet file in chunks.
+        
+        Categorical columns are always read as strings so every chunk parses
+        them the same way, whatever values it happens to contain.
+        
+        Args:
+            data_path: CSV or Parquet file
+            chunksize: Rows per chunk
+            columns: Columns to read, if not the training columns; columns
+                missing from the file are left out
+            skip_rows: Number of leading data rows to skip
+        """
+        wanted = set(columns or self.feature_columns + self.nutrition_columns + ['stroke'])
+        
+        if _is_parquet(data_path):
+            try:
+                import pyarrow.parquet as pq
+            except ImportError:
+                raise ImportError("Reading Parquet files requires pyarrow: pip install pyarrow")
+            
+            parquet_file = pq.ParquetFile(data_path)
+            names = [c for c in parquet_file.schema_arrow.names if c in wanted]
+            for batch in parquet_file.iter_batches(batch_size=chunksize, columns=names):
+                if skip_rows >= batch.num_rows:
+                    skip_rows -= batch.num_rows
+                    continue
+                yield batch.slice(skip_rows).to_pandas()
+                skip_rows = 0
+        else:
+            yield from pd.read_csv(
+                data_path,
+                chunksize=chunksize,
+                usecols=lambda c: c in wanted,
+                dtype={col: str for col in CATEGORICAL_COLUMNS},
+                skiprows=(lambda i: 0 < i <= skip_rows) if skip_rows else None
+            )
+    
+    def _normalize_chunk(self, chunk: pd.DataFrame) -> pd.DataFrame:
+        """
+        Apply load_data's type cleaning to one chunk, using compact dtypes.
+        
+        Categorical columns hold the stripped string labels as ``category``
+        (missing values are the label 'nan', as in load_data); numeric,
+        nutrition and target columns become float32 with non-numeric values
+        as NaN. The binary hypertension and heart_disease flags stay float32
+        too: they can be missing and are then filled with the median.
+        """
+        for col in CATEGORICAL_COLUMNS:
+            if col in chunk.columns:
+                chunk[col] = chunk[col].astype(str).str.strip().astype('category')
+        
+        for col in NUMERIC_COLUMNS + self.nutrition_columns + ['stroke']:
+            if col in chunk.columns:
+                chunk[col] = pd.to_numeric(chunk[col], errors='coerce').astype(np.float32)
+        
+        return chunk
+    
+    def scan_training_data(self, data_path: str, chunksize: int = DEFAULT_CHUNKSIZE) -> Dict[str, Any]:
+        """
+        First streaming pass over a training file.
+        
+        Collects the row count, the median of every numeric column (the values
+        load_data fills gaps with), each categorical column's vocabulary in
+        order of first appearance, and the mean and standard deviation of the
+        median-filled columns used by the synthetic data generator.
+        """
+        n_rows = 0
+        columns = set()
+        numeric_values: Dict[str, List[np.ndarray]] = {col: [] for col in NUMERIC_COLUMNS}
+        vocabularies: Dict[str, Dict[str, None]] = {col: {} for col in CATEGORICAL_COLUMNS}
+        
+        for chunk in self._read_chunks(data_path, chunksize):
+            chunk = self._normalize_chunk(chunk)
+            n_rows += len(chunk)
+            columns.update(chunk.columns)
+            
+            for col in NUMERIC_COLUMNS:
+                if col in chunk.columns:
+                    values = chunk[col].to_numpy()
+                    numeric_values[col].append(values[~np.isnan(values)])
+            
+            for col in CATEGORICAL_COLUMNS:
+                if col in chunk.columns:
+                    # dict.update keeps the position of labels seen earlier
+                    vocabularies[col].update(dict.fromkeys(chunk[col].unique()))
+        
+        medians, numeric_stats = {}, {}
+        for col, parts in numeric_values.items():
+            if col not in columns:
+                continue
+            values = np.concatenate(parts).astype(np.float64) if parts else np.empty(0)
+            median = float(np.median(values)) if len(values) else float('nan')
+            medians[col] = median
+            
+            # Moments of the column after missing values are filled with the median
+            n_missing = n_rows - len(values)
+            fill = median if len(values) else 0.0
+            mean = (values.sum() + n_missing * fill) / n_rows if n_rows else float('nan')
+            sum_sq = ((values - mean) ** 2).sum() + n_missing * (fill - mean) ** 2
+            std = float(np.sqrt(sum_sq / (n_rows - 1))) if n_rows > 1 else float('nan')
+            numeric_stats[col] = (float(mean), std)
+        
+        return {
+            'n_rows': n_rows,
+            'columns': columns,
+            'medians': medians,
+            'vocabularies': {col: list(vocab) for col, vocab in vocabularies.items() if col in columns},
+            'numeric_stats': numeric_stats
+        }
+    
+    def load_training_matrix(self, data_path: str, chunksize: int = DEFAULT_CHUNKSIZE,
+                             synthetic_samples: int = 0, synthetic_seed: Optional[int] = None,
+                             return_cohort: bool = False) -> Tuple:
+        """
+        Build the training matrix from a CSV or Parquet file in two streaming passes.
+        
+        Produces the same features as load_data, encode_categorical,
+        generate_synthetic_data and prepare_features, but never holds the
+        whole file in memory: the first pass collects medians and vocabularies
+        and the second encodes chunk by chunk straight into a preallocated
+        float32 matrix. The nutrition scaler is fitted incrementally on the
+        real rows along the way.
+        
+        Returns:
+            Features (a DataFrame view over the float32 matrix) and target,
+            and with ``return_cohort`` the nutrition columns of the real
+            (not synthetic) rows as float32, missing values as NaN, and the
+            label of each categorical code the real rows were encoded with
+        """
+        scan = self.scan_training_data(data_path, chunksize)
+        n_rows = scan['n_rows']
+        
+        missing_cols = [c for c in self.feature_columns + self.nutrition_columns + ['stroke']
+                        if c not in scan['columns']]
+        if missing_cols:
+            raise ValueError(f"Training data is missing columns: {', '.join(missing_cols)}")
+        
+        # Fit the encoders on the full vocabularies, as encode_categorical
+        # would on the fully loaded columns
+        tables = {}
+        for col, vocab in scan['vocabularies'].items():
+            self.encode_categorical(pd.DataFrame({col: vocab}))
+            tables[col] = {label: code for code, label in enumerate(self.encoders[col].classes_)}
+        
+        # Missing numeric values become the median, or 0 if there is none
+        fills = {col: (0.0 if np.isnan(m) else m) for col, m in scan['medians'].items()}
+        
+        X = np.empty((n_rows + synthetic_samples, len(self.feature_columns)), dtype=np.float32)
+        y = np.empty(n_rows + synthetic_samples, dtype=np.int8)
+        self.nutrition_scaler = StandardScaler()
+        cohort_nutrition = np.empty((n_rows, len(self.nutrition_columns)), dtype=np.float32) if return_cohort else None
+        # Synthetic augmentation refits the encoders, so the real rows' labels are kept here
+        cohort_categories = self._category_labels()
+        
+        row = 0
+        for chunk in self._read_chunks(data_path, chunksize):
+            chunk = self._normalize_chunk(chunk)
+            end = row + len(chunk)
+            
+            for j, col in enumerate(self.feature_columns):
+                if col in tables:
+                    X[row:end, j] = chunk[col].map(tables[col]).to_numpy()
+                else:
+                    X[row:end, j] = chunk[col].fillna(fills.get(col, 0.0)).to_numpy()
+            y[row:end] = chunk['stroke'].fillna(0).to_numpy()
+            
+            nutrition = chunk[self.nutrition_columns].to_numpy()
+            if cohort_nutrition is not None:
+                cohort_nutrition[row:end] = nutrition
+            # Missing values are ignored, as in train_nutrition_scaler
+            self.nutrition_scaler.partial_fit(nutrition)
+            row = end
+        
+        if synthetic_samples and n_rows:
+            print("Generating synthetic data to enhance training set...")
+            # Synthetic categorical values are drawn from the encoded codes,
+            # exactly as generate_synthetic_data does on the encoded frame
+            profile = {
+                'categorical_options': {
+                    col: np.array([str(tables[col][label]) for label in vocab])
+                    for col, vocab in scan['vocabularies'].items()
+                },
+                'numeric_stats': scan['numeric_stats']
+            }
+            # Drawn in iter_synthetic_data's default chunks so a seed gives the
+            # same rows as the in-memory path
+            rng = np.random.default_rng(synthetic_seed)
+            for start in range(0, synthetic_samples, DEFAULT_CHUNKSIZE):
+                synthetic = self._sample_synthetic_chunk(
+                    profile, min(DEFAULT_CHUNKSIZE, synthetic_samples - start), rng
+                )
+                end = row + len(synthetic)
+                X[row:end] = synthetic[self.feature_columns].to_numpy(dtype=np.float32)
+                y[row:end] = synthetic['stroke'].to_numpy()
+                row = end
+        
+        X = X[:row]
+        y = y[:row]
+        features, target = pd.DataFrame(X, columns=self.feature_columns, copy=False), pd.Series(y, name='stroke')
+        if return_cohort:
+            return features, target, cohort_nutrition, cohort_categories
+        return features, target
+    
+    def _category_labels(self) -> Dict[str, np.ndarray]:
+        """The label of each code, per fitted encoder."""
+        return {col: encoder.classes_.copy() for col, encoder in self.encoders.items()}
+    
     def encode_categorical(self, df: pd.DataFrame) -> pd.DataFrame:
         """Encode categorical variables in the dataframe."""
         df = df.copy()
-        categorical_cols = ['gender', 'smoking_status', 'residence_type', 'work_type']
+        categorical_cols = CATEGORICAL_COLUMNS
         
         for col in categorical_cols:
             if col in df.columns:
@@ -89,84 +317,165 @@ class NutritionStrokeModel:
         
         return df
 
-    def generate_synthetic_data(self, base_df: pd.DataFrame, num_samples: int = 1000) -> pd.DataFrame:
-        """Generate synthetic data to enhance the training set."""
-        if len(base_df) == 0:
-            return base_df
+    def extend_encoders(self, df: pd.DataFrame) -> pd.DataFrame:
+        """
+        Encode categorical variables, appending unseen labels to the encoders.
+        
+        Unlike encode_categorical, which refits an encoder with the sorted
+        union of old and new labels, new labels get the next free codes and
+        existing codes never change, so trees fitted on the old codes stay
+        valid. LabelEncoder maps string labels through a lookup table, so
+        ``classes_`` doesn't need to stay sorted.
+        """
+        df = df.copy()
+        
+        for col in CATEGORICAL_COLUMNS:
+            if col not in df.columns:
+                continue
+            df[col] = df[col].astype(str).str.strip()
+            
+            encoder = self.encoders.get(col)
+            if encoder is None:
+                encoder = self.encoders[col] = LabelEncoder().fit(df[col].unique())
             
-        df = base_df.copy()
+            known = set(encoder.classes_)
+            new_labels = [label for label in df[col].unique() if label not in known]
+            if new_labels:
+                print(f"Adding {col} categories: {new_labels}")
+                encoder.classes_ = np.concatenate([encoder.classes_.astype(object), np.array(new_labels, dtype=object)])
+            
+            df[col] = encoder.transform(df[col])
         
-        # Ensure we have the right data types
-        categorical_cols = ['gender', 'smoking_status', 'residence_type', 'work_type']
-        numeric_cols = ['age', 'bmi', 'avg_glucose_level', 'hypertension', 'heart_disease']
+        return df
+    
+    def _synthetic_profile(self, base_df: pd.DataFrame) -> Dict[str, Any]:
+        """Statistics of the real data that synthetic samples are drawn from."""
+        categorical_cols = CATEGORICAL_COLUMNS
         
-        # Get unique values for categorical columns
+        # Unique values for categorical columns
         categorical_options = {}
         for col in categorical_cols:
-            if col in df.columns:
-                categorical_options[col] = df[col].astype(str).unique().tolist()
+            if col in base_df.columns:
+                categorical_options[col] = base_df[col].astype(str).unique()
         
-        # Generate new samples
-        new_data = []
-        for _ in range(num_samples):
-            # Generate realistic data
-            sample = {}
-            
-            # Generate categorical features
-            for col, options in categorical_options.items():
-                if options:
-                    sample[col] = random.choice(options)
-            
-            # Generate numerical features based on statistics from real data
-            sample['age'] = max(18, min(100, int(random.gauss(df['age'].mean(), df['age'].std()))))
-            sample['bmi'] = max(15, min(50, random.gauss(df['bmi'].mean(), df['bmi'].std())))
-            sample['avg_glucose_level'] = max(50, min(300, random.gauss(df['avg_glucose_level'].mean(), df['avg_glucose_level'].std())))
-            sample['hypertension'] = random.choices([0, 1], weights=[0.9, 0.1])[0]
-            sample['heart_disease'] = random.choices([0, 1], weights=[0.95, 0.05])[0]
-            
-            # Generate stroke based on risk factors
-            stroke_risk = 0.01
-            stroke_risk += 0.02 if sample['age'] > 60 else 0
-            stroke_risk += 0.01 if sample['bmi'] > 30 else 0
-            stroke_risk += 0.02 if sample['hypertension'] else 0
-            stroke_risk += 0.02 if sample['heart_disease'] else 0
-            if 'smoking_status' in sample and 'smokes' in sample['smoking_status'].lower():
-                stroke_risk += 0.01
-            
-            sample['stroke'] = 1 if random.random() < min(0.9, stroke_risk) else 0
-            
-            new_data.append(sample)
+        # Mean and standard deviation of the numerical features, computed once
+        numeric_stats = {
+            col: (float(base_df[col].mean()), float(base_df[col].std()))
+            for col in ('age', 'bmi', 'avg_glucose_level')
+        }
         
-        # Create new DataFrame
-        new_df = pd.DataFrame(new_data)
+        return {'categorical_options': categorical_options, 'numeric_stats': numeric_stats}
+    
+    def _sample_synthetic_chunk(self, profile: Dict[str, Any], num_samples: int,
+                                rng: np.random.Generator) -> pd.DataFrame:
+        """Draw ``num_samples`` encoded synthetic rows, whole columns at a time."""
+        data = {}
+        smokes = np.zeros(num_samples, dtype=bool)
         
-        # Encode categorical variables
-        new_df = self.encode_categorical(new_df)
+        # Generate categorical features
+        for col, options in profile['categorical_options'].items():
+            if len(options) == 0:
+                continue
+            choice = rng.integers(0, len(options), num_samples)
+            if col == 'smoking_status':
+                smokes = np.array(['smokes' in option.lower() for option in options])[choice]
+            data[col] = self._encode_synthetic_choices(col, options, choice)
         
-        # Ensure all numeric columns are float
-        for col in numeric_cols:
-            if col in new_df.columns:
-                new_df[col] = pd.to_numeric(new_df[col], errors='coerce')
+        # Generate numerical features based on statistics from real data
+        stats = profile['numeric_stats']
+        data['age'] = np.clip(np.trunc(rng.normal(*stats['age'], num_samples)), 18, 100).astype(np.int64)
+        data['bmi'] = np.clip(rng.normal(*stats['bmi'], num_samples), 15, 50)
+        data['avg_glucose_level'] = np.clip(rng.normal(*stats['avg_glucose_level'], num_samples), 50, 300)
+        data['hypertension'] = (rng.random(num_samples) < 0.1).astype(np.int64)
+        data['heart_disease'] = (rng.random(num_samples) < 0.05).astype(np.int64)
+        
+        # Generate stroke based on risk factors
+        stroke_risk = (
+            0.01
+            + 0.02 * (data['age'] > 60)
+            + 0.01 * (data['bmi'] > 30)
+            + 0.02 * data['hypertension']
+            + 0.02 * data['heart_disease']
+            + 0.01 * smokes
+        )
+        data['stroke'] = (rng.random(num_samples) < np.minimum(0.9, stroke_risk)).astype(np.int64)
+        
+        return pd.DataFrame(data)
+    
+    def _encode_synthetic_choices(self, col: str, options: np.ndarray, choice: np.ndarray) -> np.ndarray:
+        """
+        Encode sampled category indices.
+        
+        Runs encode_categorical on the distinct sampled labels only, so the
+        encoders are fitted or extended exactly as if the full column had been
+        encoded, and then maps every sample to its label's code.
+        """
+        present = np.unique(choice)
+        encoded = self.encode_categorical(pd.DataFrame({col: options[present]}))[col].to_numpy()
+        codes = np.zeros(len(options), dtype=np.int64)
+        codes[present] = encoded
+        return codes[choice]
+    
+    def iter_synthetic_data(self, base_df: pd.DataFrame, num_samples: int, chunk_size: int = DEFAULT_CHUNKSIZE,
+                            seed: Optional[int] = None) -> Iterator[pd.DataFrame]:
+        """
+        Generate encoded synthetic samples in chunks of at most ``chunk_size`` rows.
+        
+        Output is reproducible for a given ``seed`` and ``chunk_size``, and
+        only one chunk is held in memory at a time.
+        """
+        if len(base_df) == 0 or num_samples <= 0:
+            return
+        
+        profile = self._synthetic_profile(base_df)
+        rng = np.random.default_rng(seed)
+        for start in range(0, num_samples, chunk_size):
+            yield self._sample_synthetic_chunk(profile, min(chunk_size, num_samples - start), rng)
+    
+    def generate_synthetic_data(self, base_df: pd.DataFrame, num_samples: int = 1000,
+                                seed: Optional[int] = None, chunk_size: int = DEFAULT_CHUNKSIZE) -> pd.DataFrame:
+        """Generate synthetic data to enhance the training set."""
+        if len(base_df) == 0:
+            return base_df
+        
+        chunks = list(self.iter_synthetic_data(base_df, num_samples, chunk_size=chunk_size, seed=seed))
         
         # Combine with original data
-        combined_df = pd.concat([df, new_df], ignore_index=True)
+        combined_df = pd.concat([base_df, *chunks], ignore_index=True)
         
         # Fill any remaining NaN values
         combined_df = combined_df.fillna(0)
         
         return combined_df
     
-    def train_stroke_model(self, X: pd.DataFrame, y: pd.Series, test_size: float = 0.2) -> Dict[str, Any]:
-        """Train the stroke prediction model with improved pipeline for imbalanced data."""
+    def train_stroke_model(self, X: pd.DataFrame, y: pd.Series, test_size: float = 0.2,
+                           search_options: Optional[Dict[str, Any]] = None,
+                           compaction_options: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """
+        Train the stroke prediction model with improved pipeline for imbalanced data.
+        
+        Args:
+            X: Feature matrix
+            y: Stroke target
+            test_size: Fraction of rows held out for the test metrics
+            search_options: Keyword arguments for TrainingEngine (param_grid,
+                search, n_iter, cv, n_workers, refit); by default the base
+                forest parameters are cross-validated and refitted as before
+            compaction_options: Keyword arguments for compact_forest
+                (auc_tolerance, recall_tolerance, confidence); when given, a compact
+                forest is also selected on the test split
+        """
         print("\nTraining stroke prediction model with enhanced class weighting...")
+        stage_timings = {}
         
         # Split data with stratification to maintain class distribution
-        X_train, X_test, y_train, y_test = train_test_split(
-            X, y, 
-            test_size=test_size, 
-            random_state=42, 
-            stratify=y
-        )
+        with timed_stage(stage_timings, 'split'):
+            X_train, X_test, y_train, y_test = train_test_split(
+                X, y, 
+                test_size=test_size, 
+                random_state=42, 
+                stratify=y
+            )
         
         # Calculate class weights for the Random Forest
         class_weights = compute_class_weight(
@@ -176,54 +485,31 @@ class NutritionStrokeModel:
         )
         class_weight_dict = {i: w for i, w in enumerate(class_weights)}
         
-        # Define model with class weights and balanced class settings
-        model = RandomForestClassifier(
-            n_estimators=200,  # Increased number of trees
-            max_depth=8,       # Slightly shallower trees to prevent overfitting
-            min_samples_split=10,  # Require more samples to split
-            min_samples_leaf=5,    # Require more samples in leaves
-            class_weight=class_weight_dict,
-            max_features='sqrt',   # Consider fewer features at each split
-            bootstrap=True,
-            oob_score=True,       # Use out-of-bag samples for validation
-            random_state=42,
-            n_jobs=-1             # Use all available cores
-        )
-        
-        # Define SMOTE for oversampling the minority class
-        smote = SMOTE(
-            sampling_strategy='minority',  # Focus on the minority class
-            random_state=42,
-            k_neighbors=min(5, sum(y_train == 1) - 1)  # Adjust based on minority class size
-        )
-        
-        # Apply SMOTE to training data
-        try:
-            print("Applying SMOTE for class balancing...")
-            X_train_resampled, y_train_resampled = smote.fit_resample(X_train, y_train)
-            print(f"Training data resampled - Original: {X_train.shape[0]} samples, After SMOTE: {X_train_resampled.shape[0]} samples")
-        except ValueError as e:
-            print(f"Could not apply SMOTE: {e}. Using original data.")
-            X_train_resampled, y_train_resampled = X_train, y_train
-        
-        # Train model with cross-validation
-        print("Training model with cross-validation...")
-        cv_scores = cross_val_score(
-            model, 
-            X_train_resampled, 
-            y_train_resampled, 
-            cv=5, 
-            scoring='f1',
-            n_jobs=-1
-        )
+        # Base forest parameters, which the search overrides
+        base_params = {
+            'n_estimators': 200,  # Increased number of trees
+            'max_depth': 8,       # Slightly shallower trees to prevent overfitting
+            'min_samples_split': 10,  # Require more samples to split
+            'min_samples_leaf': 5,    # Require more samples in leaves
+            'class_weight': class_weight_dict,
+            'max_features': 'sqrt',   # Consider fewer features at each split
+            'bootstrap': True,
+            'oob_score': True,       # Use out-of-bag samples for validation
+            'random_state': 42
+        }
         
-        # Final training on full training set
-        print("Training final model on full dataset...")
-        model.fit(X_train_resampled, y_train_resampled)
+        # Cross-validate with SMOTE inside each fold, then build the final model
+        engine = TrainingEngine(base_params, **(search_options or {}))
+        model, search_report = engine.fit(X_train, y_train)
+        stage_timings.update(search_report['stage_timings'])
+        cv_scores = np.array(search_report['cv_scores'])
         
         # Make predictions
-        y_pred = model.predict(X_test)
-        y_pred_proba = model.predict_proba(X_test)[:, 1]  # Get probabilities for ROC
+        evaluate_start = time.perf_counter()
+        # The engine fits on arrays, so the forest has no feature names
+        X_test_array = X_test.to_numpy(dtype=np.float32)
+        y_pred = model.predict(X_test_array)
+        y_pred_proba = model.predict_proba(X_test_array)[:, 1]  # Get probabilities for ROC
         
         # Calculate metrics
         accuracy = accuracy_score(y_test, y_pred)
@@ -239,12 +525,29 @@ class NutritionStrokeModel:
         
         # Get feature importances
         feature_importance = dict(zip(X.columns, model.feature_importances_))
+        stage_timings['evaluate'] = round(time.perf_counter() - evaluate_start, 3)
         
         # Store the trained model
         self.stroke_model = model
+        self.explainer = None
+        
+        # The fewest trees that score the test split about as well
+        compaction = None
+        self.compact_model = None
+        if compaction_options is not None:
+            if np.bincount(y_test, minlength=2).min() >= MIN_CLASS_ROWS:
+                with timed_stage(stage_timings, 'compaction'):
+                    self.compact_model, compaction = compact_forest(
+                        model, X_test_array, y_test.to_numpy(), **compaction_options
+                    )
+            else:
+                print(f"\nSkipping forest compaction: the test split has fewer than "
+                      f"{MIN_CLASS_ROWS} rows of each outcome")
         
         # Print detailed metrics
         print("\n=== Model Performance ===")
+        if search_report['best_params']:
+            print(f"Best parameters: {search_report['best_params']}")
         print(f"Cross-validated F1 Score: {cv_scores.mean():.4f} (+/- {cv_scores.std() * 2:.4f})")
         print(f"Test Accuracy: {accuracy:.4f}")
         print(f"Test Precision: {precision:.4f}")
@@ -261,6 +564,11 @@ class NutritionStrokeModel:
         for feature, importance in sorted(feature_importance.items(), key=lambda x: x[1], reverse=True)[:5]:
             print(f"- {feature}: {importance:.4f}")
         
+        if compaction is not None:
+            print(f"\nCompact model: {compaction['n_trees']} of {compaction['full_n_trees']} trees, "
+                  f"ROC AUC {compaction['roc_auc']:.4f} (full {compaction['full_roc_auc']:.4f}), "
+                  f"recall {compaction['recall']:.4f} (full {compaction['full_recall']:.4f})")
+        
         return {
             'accuracy': accuracy,
             'precision': precision,
@@ -268,7 +576,11 @@ class NutritionStrokeModel:
             'f1_score': f1,
             'roc_auc': roc_auc,
             'cv_f1_scores': cv_scores.tolist(),
+            'best_params': search_report['best_params'],
+            'search_results': search_report['search_results'],
+            'stage_timings': stage_timings,
             'feature_importance': feature_importance,
+            'compaction': compaction,
             'class_distribution': {
                 'train': dict(zip(*np.unique(y_train, return_counts=True))),
                 'test': dict(zip(*np.unique(y_test, return_counts=True)))
@@ -276,9 +588,16 @@ class NutritionStrokeModel:
         }
     
     def train_nutrition_scaler(self, df: pd.DataFrame) -> None:
-        """Train the nutrition data scaler."""
+        """
+        Train the nutrition data scaler on real patient rows.
+        
+        Its mean and scale are the population statistics diet logs are
+        compared with, so missing values are ignored rather than counted as
+        zero intake, and synthetic rows (which have no diet data) must not
+        be passed in.
+        """
         self.nutrition_scaler = StandardScaler()
-        nutrition_data = df[self.nutrition_columns].copy()
+        nutrition_data = df[self.nutrition_columns].apply(pd.to_numeric, errors='coerce')
         self.nutrition_scaler.fit(nutrition_data)
     
     def prepare_features(self, df: pd.DataFrame) -> Tuple[pd.DataFrame, pd.Series]:
@@ -294,54 +613,105 @@ class NutritionStrokeModel:
         target = df['stroke']
         return features, target
     
-    def train(self, data_path: str, use_synthetic_data: bool = True) -> Dict[str, Any]:
+    def train(self, data_path: str, use_synthetic_data: bool = True,
+              model_dir: Optional[str] = MODELS_DIR, synthetic_samples: int = 1000,
+              synthetic_seed: Optional[int] = None, chunksize: Optional[int] = None,
+              search_options: Optional[Dict[str, Any]] = None,
+              compaction_options: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
         """
         Train both stroke and nutrition models with enhanced pipeline.
         
         Args:
             data_path: Path to the training data CSV file
             use_synthetic_data: Whether to generate additional synthetic data
+            synthetic_samples: Number of synthetic rows to generate
+            synthetic_seed: Seed for reproducible synthetic data
+            chunksize: Stream the data file in chunks of this many rows
+                instead of loading it whole (always done for Parquet files)
+            search_options: Hyperparameter search settings for TrainingEngine
+            compaction_options: Accuracy budget for the compact forest (see
+                compact_forest), or None to train the full forest only
+            model_dir: Directory to save the trained models to, or None to
+                leave saving to the caller
             
         Returns:
             Dictionary containing training metrics and model information
         """
         print("Loading and preprocessing data...")
         
+        stage_timings = {}
+        
         try:
-            # Load and preprocess data
-            df = self.load_data(data_path)
-            
-            # Encode categorical variables
-            df = self.encode_categorical(df)
-            
-            # Generate synthetic data if enabled
-            if use_synthetic_data and len(df) > 0:
-                print("Generating synthetic data to enhance training set...")
-                df = self.generate_synthetic_data(df)
-            
-            # Prepare features and target
-            X, y = self.prepare_features(df)
-            
-            # Ensure all data is numeric
-            for col in X.columns:
-                X[col] = pd.to_numeric(X[col], errors='coerce')
-            X = X.fillna(0)
-            
-            # Ensure target is numeric
-            y = y.astype(int)
+            prepare_start = time.perf_counter()
+            if chunksize is not None or _is_parquet(data_path):
+                # Stream the file into a compact training matrix
+                X, y, cohort_nutrition, cohort_categories = self.load_training_matrix(
+                    data_path,
+                    chunksize=chunksize or DEFAULT_CHUNKSIZE,
+                    synthetic_samples=synthetic_samples if use_synthetic_data else 0,
+                    synthetic_seed=synthetic_seed,
+                    return_cohort=True
+                )
+                n_real = len(cohort_nutrition)
+                df = None
+            else:
+                # Load and preprocess data
+                df = self.load_data(data_path)
+                
+                # Encode categorical variables
+                df = self.encode_categorical(df)
+                n_real = len(df)
+                real_df = df
+                cohort_categories = self._category_labels()
+                
+                # Generate synthetic data if enabled
+                if use_synthetic_data and len(df) > 0:
+                    print("Generating synthetic data to enhance training set...")
+                    df = self.generate_synthetic_data(df, num_samples=synthetic_samples, seed=synthetic_seed)
+                
+                # Prepare features and target
+                X, y = self.prepare_features(df)
+                
+                # Ensure all data is numeric
+                for col in X.columns:
+                    X[col] = pd.to_numeric(X[col], errors='coerce')
+                X = X.fillna(0)
+                
+                # Ensure target is numeric
+                y = y.astype(int)
+                
+                cohort_nutrition = real_df[self.nutrition_columns].apply(
+                    pd.to_numeric, errors='coerce'
+                ).to_numpy(dtype=np.float32)
+            stage_timings['prepare_data'] = round(time.perf_counter() - prepare_start, 3)
             
             # Train and evaluate stroke model
             print("\nTraining stroke prediction model...")
-            metrics = self.train_stroke_model(X, y)
+            metrics = self.train_stroke_model(X, y, search_options=search_options,
+                                              compaction_options=compaction_options)
+            stage_timings.update(metrics['stage_timings'])
             
-            # Train nutrition data scaler
-            print("\nTraining nutrition data scaler...")
-            self.train_nutrition_scaler(df)
+            # Train nutrition data scaler (the streaming loader fits it as it reads)
+            if df is not None:
+                print("\nTraining nutrition data scaler...")
+                with timed_stage(stage_timings, 'nutrition_scaler'):
+                    self.train_nutrition_scaler(real_df)
+            
+            # Index the real patients for similar-patient lookups
+            with timed_stage(stage_timings, 'similarity_index'):
+                self.similarity_index = SimilarityIndex.build(
+                    X.to_numpy(dtype=np.float32)[:n_real], cohort_nutrition, y.to_numpy()[:n_real],
+                    self.feature_columns, cohort_categories, self.encoders
+                )
             
             # Save models and encoders
-            print("\nSaving models and encoders...")
-            self.save_models()
+            if model_dir is not None:
+                print("\nSaving models and encoders...")
+                with timed_stage(stage_timings, 'save'):
+                    self.save_models(model_dir)
+            self._prepare_inference()
             
+            metrics['stage_timings'] = stage_timings
             return metrics
             
         except Exception as e:
@@ -350,137 +720,235 @@ class NutritionStrokeModel:
             traceback.print_exc()
             raise
     
-    def predict_stroke_risk(self, patient_data: Dict[str, Any]) -> Dict[str, Any]:
-        """Predict stroke risk for a given patient."""
-        try:
-            # Prepare input data
-            input_df = pd.DataFrame([patient_data])
-            
-            # Encode categorical variables
-            for col, encoder in self.encoders.items():
-                if col in input_df.columns:
-                    # Convert to string and handle unseen labels
-                    input_df[col] = input_df[col].astype(str).str.lower().str.strip()
-                    
-                    # Handle unseen labels by using the most common class (usually index 0)
-                    mask = ~input_df[col].isin(encoder.classes_)
-                    if mask.any():
-                        print(f"Warning: Found unknown {col} values: {input_df.loc[mask, col].unique()}")
-                        # Replace unknown values with the first class (usually most common)
-                        input_df[col] = input_df[col].apply(
-                            lambda x: encoder.classes_[0] if x not in encoder.classes_ else x
-                        )
-                    
-                    # Transform using the encoder
-                    input_df[col] = encoder.transform(input_df[col])
-            
-            # Make prediction
-            features = input_df[self.feature_columns]
-            stroke_prob = self.stroke_model.predict_proba(features)[0][1]
-            
-            return {
-                'stroke_risk': float(stroke_prob),
-                'risk_category': self._get_risk_category(stroke_prob)
-            }
+    def update(self, data: Any, n_new_trees: int = 50, max_trees: Optional[int] = None,
+               holdout: float = 0.2) -> Dict[str, Any]:
+        """
+        Incrementally retrain on newly arrived patient records only.
+        
+        New categories are appended to the encoders without renumbering
+        existing codes, ``n_new_trees`` trees are grown on the new records
+        (SMOTE-balanced) with ``warm_start`` and added to the forest, and the
+        nutrition scaler's statistics are updated with ``partial_fit``. When
+        ``max_trees`` is set, the oldest trees are dropped to keep the forest
+        at that size. Every step costs time proportional to the new data.
+        
+        Args:
+            data: Path to a CSV file, or a DataFrame, of new records
+            n_new_trees: Number of trees to grow on the new records
+            max_trees: Maximum forest size after the update
+            holdout: Fraction of the new records held out to compare the old
+                and updated models; 0 compares them on all new records
             
-        except Exception as e:
-            print(f"Error in predict_stroke_risk: {str(e)}")
-            print(f"Input data: {patient_data}")
-            raise
+        Returns:
+            Drift metrics between the old and the updated model
+        """
+        if self.stroke_model is None:
+            raise ValueError("Incremental updates need the sklearn forest; load the model with storage='joblib'")
+        if self.variant != 'full':
+            raise ValueError("Incremental updates need the full forest; load the model with variant='full'")
+        
+        df = data.copy() if isinstance(data, pd.DataFrame) else pd.read_csv(data)
+        df = self.extend_encoders(self.clean_data(df))
+        X, y = self.prepare_features(df)
+        X = X.apply(pd.to_numeric, errors='coerce').fillna(0).to_numpy(dtype=np.float32)
+        y = pd.to_numeric(y, errors='coerce').fillna(0).astype(int).to_numpy()
+        if len(np.unique(y)) < 2:
+            raise ValueError("New records must include both stroke outcomes to grow new trees")
+        
+        if holdout and np.bincount(y).min() >= 2 and len(y) * holdout >= 2:
+            X_fit, X_eval, y_fit, y_eval = train_test_split(
+                X, y, test_size=holdout, random_state=42, stratify=y
+            )
+        else:
+            X_fit, X_eval, y_fit, y_eval = X, X, y, y
+        
+        # Scores of the old model, before the forest is modified in place
+        old_trees = len(self.stroke_model.estimators_)
+        old_proba = self.stroke_model.predict_proba(X_eval)[:, 1]
+        
+        print(f"Growing {n_new_trees} trees on {len(X_fit)} new records...")
+        forest = self.stroke_model
+        # Out-of-bag scores would mix the old trees' bootstrap indices with
+        # the new rows, so they are dropped rather than left stale
+        forest.set_params(warm_start=True, oob_score=False, n_estimators=old_trees + n_new_trees)
+        for attr in ('oob_score_', 'oob_decision_function_'):
+            if hasattr(forest, attr):
+                delattr(forest, attr)
+        smote_pipeline(forest, y_fit, random_state=42).fit(X_fit, y_fit)
+        forest.set_params(warm_start=False)
+        
+        dropped_trees = 0
+        if max_trees is not None and len(forest.estimators_) > max_trees:
+            dropped_trees = len(forest.estimators_) - max_trees
+            forest.estimators_ = forest.estimators_[dropped_trees:]
+            forest.n_estimators = len(forest.estimators_)
+        
+        self.nutrition_scaler.partial_fit(df[self.nutrition_columns].apply(pd.to_numeric, errors='coerce'))
+        
+        self._prepare_inference()
+        if self.compiled_forest is not None:
+            self.compile_forest()
+        # Contribution tables of the old trees; rebuilt when next needed
+        self.explainer = None
+        
+        new_proba = self.stroke_model.predict_proba(X_eval)[:, 1]
+        drift = self._drift_metrics(old_proba, new_proba, y_eval)
+        drift.update({
+            'new_records': len(df),
+            'evaluation_records': len(y_eval),
+            'trees_added': n_new_trees,
+            'trees_dropped': dropped_trees,
+            'n_trees': len(forest.estimators_)
+        })
+        
+        print(f"Mean |risk shift|: {drift['mean_abs_risk_shift']:.4f}, "
+              f"category flips: {drift['category_flip_rate']:.2%}, PSI: {drift['risk_psi']:.4f}")
+        return drift
     
-    def get_nutrition_recommendations(self, patient_data: Dict[str, Any]) -> Dict[str, Any]:
-        """Generate nutrition recommendations based on patient data."""
-        # This is a simplified example - in a real application, this would use
-        # a more sophisticated recommendation system
-        bmi = patient_data.get('bmi', 25)
-        stroke_risk = patient_data.get('stroke_risk', 0.5)
-        
-        recommendations = []
-        
-        # BMI-based recommendations
-        if bmi >= 30:
-            recommendations.append("Reduce daily caloric intake by 500-1000 kcal for weight loss.")
-            recommendations.append("Focus on whole, unprocessed foods.")
-        
-        # Stroke risk-based recommendations
-        if stroke_risk > 0.7:
-            recommendations.append("Follow a DASH (Dietary Approaches to Stop Hypertension) diet.")
-            recommendations.append("Limit sodium intake to less than 1,500 mg per day.")
-            recommendations.append("Increase potassium-rich foods like bananas, spinach, and sweet potatoes.")
-        
-        # General recommendations
-        recommendations.extend([
-            "Consume at least 5 servings of fruits and vegetables daily.",
-            "Choose whole grains over refined grains.",
-            "Include fatty fish (like salmon) twice a week for omega-3 fatty acids.",
-            "Stay hydrated with water and limit sugary beverages."
-        ])
+    def _drift_metrics(self, old_proba: np.ndarray, new_proba: np.ndarray, y: np.ndarray) -> Dict[str, Any]:
+        """Compare the old and updated model's stroke probabilities on the same records."""
+        shift = np.abs(new_proba - old_proba)
+        old_categories = [self._get_risk_category(p) for p in old_proba]
+        new_categories = [self._get_risk_category(p) for p in new_proba]
+        
+        try:
+            old_auc, new_auc = roc_auc_score(y, old_proba), roc_auc_score(y, new_proba)
+        except ValueError:
+            old_auc = new_auc = None  # Only one class among the evaluation records
         
         return {
-            'recommendations': recommendations,
-            'daily_goals': self._get_daily_nutrition_goals(patient_data)
+            'mean_abs_risk_shift': float(shift.mean()),
+            'max_abs_risk_shift': float(shift.max()),
+            'category_flip_rate': float(np.mean([a != b for a, b in zip(old_categories, new_categories)])),
+            'risk_psi': _population_stability_index(old_proba, new_proba),
+            'old_roc_auc': old_auc,
+            'new_roc_auc': new_auc
         }
     
-    def _get_risk_category(self, probability: float) -> str:
-        """Convert probability to risk category."""
-        if probability < 0.2:
-            return 'Low'
-        elif probability < 0.5:
-            return 'Moderate'
-        else:
-            return 'High'
-    
-    def _get_daily_nutrition_goals(self, patient_data: Dict[str, Any]) -> Dict[str, Any]:
-        """Calculate personalized daily nutrition goals."""
-        # This is a simplified example
-        age = patient_data.get('age', 50)
-        gender = patient_data.get('gender', 'male')
-        
-        goals = {
-            'calories': 2000 if gender == 'male' else 1800,
-            'protein_g': 56 if gender == 'male' else 46,
-            'fiber_g': 30,
-            'sodium_mg': 1500 if patient_data.get('hypertension', 0) else 2300,
-            'sugar_g': 25
-        }
+    def _encode_frame(self, df: pd.DataFrame) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        ``_encode_batch`` for a DataFrame, encoding whole columns at once.
         
-        # Adjust for age
-        if age > 50:
-            goals['calories'] = max(1600, goals['calories'] - 200)
-            goals['calcium_mg'] = 1200
-            goals['vitamin_d_iu'] = 800
+        Columns missing from the frame are marked missing for every row.
+        """
+        if self._encoder_tables is None:
+            self._prepare_inference()
         
-        return goals
-    
-    def save_models(self, model_dir: str = 'models') -> None:
-        """Save trained models and encoders."""
-        os.makedirs(model_dir, exist_ok=True)
+        features = np.zeros((len(df), len(self.feature_columns)), dtype=np.float32)
+        missing = np.zeros(features.shape, dtype=bool)
+        
+        for j, col in enumerate(self.feature_columns):
+            if col not in df.columns:
+                missing[:, j] = True
+                continue
+            
+            table = self._encoder_tables.get(col)
+            if table is None:
+                column = pd.to_numeric(df[col], errors='coerce').to_numpy(dtype=np.float64)
+                missing[:, j] = ~np.isfinite(column)
+                features[:, j] = np.nan_to_num(column)
+                continue
+            
+            # Same label normalization and unseen-label fallback as _encode_batch
+            labels = df[col].astype(str).str.lower().str.strip()
+            codes = labels.map(table)
+            missing[:, j] = df[col].isna().to_numpy()
+            unknown = codes.isna().to_numpy() & ~missing[:, j]
+            if unknown.any():
+                print(f"Warning: Found unknown {col} values: {labels[unknown].unique()}")
+            features[:, j] = codes.fillna(0).to_numpy()
         
-        joblib.dump(self.stroke_model, os.path.join(model_dir, 'stroke_model.joblib'))
-        joblib.dump(self.nutrition_scaler, os.path.join(model_dir, 'nutrition_scaler.joblib'))
-        joblib.dump(self.encoders, os.path.join(model_dir, 'encoders.joblib'))
+        return features, missing
     
-    @classmethod
-    def load_models(cls, model_dir: str = 'models') -> 'NutritionStrokeModel':
-        """Load trained models and encoders."""
-        instance = cls()
+    def score_frame(self, df: pd.DataFrame) -> pd.DataFrame:
+        """
+        Score a chunk of patient records read from a file.
+        
+        Nothing is converted to per-record dicts: features are encoded
+        column-wise, scored with one forest evaluation, and goals are looked
+        up as whole columns of the chunk after load_data's type cleaning.
+        
+        Returns:
+            One row per input row with ``stroke_risk``, ``risk_category``, a
+            ``goal_<nutrient>`` column per daily goal and ``error``; rows that
+            can't be scored have only ``error`` set
+        """
+        # Encode before cleaning, which turns missing labels into 'nan'
+        features, missing = self._encode_frame(df)
+        df = self._normalize_chunk(df)
+        valid = ~missing.any(axis=1)
+        
+        risk = np.full(len(df), np.nan)
+        if valid.any():
+            risk[valid] = self._predict_proba_array(features[valid])[:, 1]
+        
+        columns = {field: df[field] for field in df.columns}
+        columns['stroke_risk'] = risk
+        cells = self.recommendation_engine.lookup_columns(columns, len(df))
         
-        instance.stroke_model = joblib.load(os.path.join(model_dir, 'stroke_model.joblib'))
-        instance.nutrition_scaler = joblib.load(os.path.join(model_dir, 'nutrition_scaler.joblib'))
-        instance.encoders = joblib.load(os.path.join(model_dir, 'encoders.joblib'))
+        scores = pd.DataFrame({
+            'stroke_risk': risk,
+            'risk_category': [self._get_risk_category(p) if ok else None for p, ok in zip(risk, valid)]
+        })
+        for key in self.recommendation_engine.goal_keys:
+            scores[f"goal_{key}"] = [goals.get(key) for _, goals in cells]
+            scores.loc[~valid, f"goal_{key}"] = None
         
-        return instance
+        errors = [None] * len(df)
+        for i in np.flatnonzero(~valid):
+            bad_cols = [col for col, bad in zip(self.feature_columns, missing[i]) if bad]
+            errors[i] = f"Missing or invalid values for: {', '.join(bad_cols)}"
+        scores['error'] = errors
+        return scores
 
-def train_and_save_model(use_synthetic_data: bool = True) -> Dict[str, Any]:
+def training_search_options() -> Dict[str, Any]:
+    """TrainingEngine options from the NEURONUTRI_TRAINING_* settings."""
+    from ..config import settings
+    
+    return {
+        'param_grid': settings.training_param_grid,
+        'search': settings.training_search,
+        'n_iter': settings.training_search_iterations,
+        'cv': settings.training_cv_folds,
+        'n_workers': settings.training_workers,
+        'refit': settings.training_refit
+    }
+
+def training_compaction_options() -> Optional[Dict[str, Any]]:
+    """compact_forest options from the NEURONUTRI_COMPACTION_* settings, or None when disabled."""
+    from ..config import settings
+    
+    if not settings.compaction_enabled:
+        return None
+    return {
+        'auc_tolerance': settings.compaction_auc_tolerance,
+        'recall_tolerance': settings.compaction_recall_tolerance
+    }
+
+def train_and_save_model(use_synthetic_data: bool = True, models_dir: str = MODELS_DIR,
+                         search_options: Optional[Dict[str, Any]] = None,
+                         compaction_options: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
     """
-    Train and save the model pipeline with enhanced functionality.
+    Train the model pipeline and publish it as the current registry version.
     
     Args:
         use_synthetic_data: Whether to generate additional synthetic data
+        models_dir: Root of the model registry to publish to
+        search_options: Hyperparameter search settings for TrainingEngine;
+            read from the application settings by default
+        compaction_options: Accuracy budget for the compact forest; read
+            from the application settings by default
         
     Returns:
         Dictionary containing training metrics and model information
     """
+    from .model_registry import ModelRegistry
+    
+    if search_options is None:
+        search_options = training_search_options()
+    if compaction_options is None:
+        compaction_options = training_compaction_options()
+    
     try:
         # Initialize the model
         model = NutritionStrokeModel()
@@ -494,17 +962,19 @@ def train_and_save_model(use_synthetic_data: bool = True) -> Dict[str, Any]:
         print("Starting model training pipeline...")
         print("=" * 80)
         
-        metrics = model.train(data_path, use_synthetic_data=use_synthetic_data)
+        metrics = model.train(data_path, use_synthetic_data=use_synthetic_data, model_dir=None,
+                              search_options=search_options, compaction_options=compaction_options)
         
-        # Save the trained model
-        models_dir = os.path.join(current_dir, '..', 'models')
-        os.makedirs(models_dir, exist_ok=True)
-        model.save_models(models_dir)
+        # Publish the trained model as a new version
+        registry = ModelRegistry(models_dir)
+        version = registry.publish(model, metrics)
         
         print("\n" + "=" * 80)
         print("Model training complete!")
-        print(f"- Models saved to: {models_dir}")
+        print(f"- Models saved to: {registry.version_dir(version)}")
+        print(f"- Model version: {version}")
         print(f"- Test Accuracy: {metrics['accuracy']:.4f}")
+        print("- Stage timings: " + ", ".join(f"{k} {v:.2f}s" for k, v in metrics['stage_timings'].items()))
         print("=" * 80)
         
         return metrics
@@ -513,5 +983,216 @@ def train_and_save_model(use_synthetic_data: bool = True) -> Dict[str, Any]:
         print(f"\nError during model training: {str(e)}")
         raise
 
+def update_and_save_model(data_path: str, models_dir: str = MODELS_DIR, n_new_trees: int = 50,
+                          max_trees: Optional[int] = None, activate: bool = True) -> Dict[str, Any]:
+    """
+    Incrementally update the current registry version and publish the result.
+    
+    Args:
+        data_path: CSV file of newly arrived patient records
+        models_dir: Root of the model registry
+        n_new_trees: Number of trees to grow on the new records
+        max_trees: Maximum forest size; the oldest trees are dropped beyond it
+        activate: Whether to make the updated model the current version
+        
+    Returns:
+        Drift metrics between the previous and the updated model
+    """
+    from .model_registry import ModelRegistry
+    
+    registry = ModelRegistry(models_dir)
+    model = registry.load(model_class=NutritionStrokeModel)
+    parent_version = model.version
+    
+    drift = model.update(data_path, n_new_trees=n_new_trees, max_trees=max_trees)
+    
+    # The manifest keeps the parent's training metrics alongside the update's drift
+    metrics = registry.read_manifest(parent_version).get('metrics', {})
+    metrics.update({'parent_version': parent_version, 'drift': drift})
+    version = registry.publish(model, metrics, activate=activate)
+    
+    print(f"Updated model {parent_version} -> {version}")
+    return drift
+
+# Model replica held by each bulk-scoring pool worker
+_scoring_model = None
+
+def _init_scoring_worker(model: 'NutritionStrokeModel') -> None:
+    global _scoring_model
+    _scoring_model = model
+
+def _score_chunk(chunk: pd.DataFrame) -> pd.DataFrame:
+    return _scoring_model.score_frame(chunk)
+
+def _input_fingerprint(input_path: str, model_version: Optional[str]) -> Dict[str, Any]:
+    """What a resumed run must match: the same input file, scored by the same model."""
+    stat = os.stat(input_path)
+    return {
+        'input': os.path.abspath(input_path),
+        'input_size': stat.st_size,
+        'input_mtime_ns': stat.st_mtime_ns,
+        'model_version': model_version
+    }
+
+def _write_progress(progress_path: str, progress: Dict[str, Any]) -> None:
+    tmp_path = progress_path + '.tmp'
+    with open(tmp_path, 'w') as f:
+        json.dump(progress, f)
+    os.replace(tmp_path, progress_path)
+
+def score_file(input_path: str, output_path: str, models_dir: str = MODELS_DIR,
+               version: Optional[str] = None, chunksize: int = DEFAULT_CHUNKSIZE,
+               n_workers: Optional[int] = None, id_column: Optional[str] = None,
+               resume: bool = True) -> Dict[str, Any]:
+    """
+    Score a CSV or Parquet cohort file with a registry model, writing a CSV.
+    
+    The input is streamed in chunks of ``chunksize`` rows and each chunk is
+    scored by NutritionStrokeModel.score_frame in a pool of worker processes,
+    each holding its own copy of the model. At most ``n_workers + 1`` chunks
+    are in flight, so memory stays bounded whatever the size of the file.
+    Output rows are written in input order: ``row`` (the 0-based input row),
+    the ``id_column`` if given, then the score columns.
+    
+    After each chunk is written, the rows done and the output size are
+    recorded in ``<output_path>.progress.json``. If a run fails, running it
+    again with ``resume=True`` cuts off any partially written chunk and
+    continues after the last complete one. It refuses to resume if the input
+    file or the model version have changed. The progress file is removed
+    once the whole input has been scored.
+    
+    Args:
+        input_path: CSV or Parquet file of patient records
+        output_path: CSV file to write
+        models_dir: Root of the model registry
+        version: Model version to score with; the current one by default
+        chunksize: Rows per chunk
+        n_workers: Worker processes; defaults to the number of CPUs, and
+            1 scores in this process
+        id_column: Input column to copy to the output, e.g. a patient ID
+        resume: Continue a previous run of the same job if one was interrupted
+        
+    Returns:
+        Rows scored, rows with errors, elapsed seconds and rows per second
+    """
+    import multiprocessing
+    from collections import deque
+    from concurrent.futures import ProcessPoolExecutor
+    from .model_registry import ModelRegistry
+    
+    model = ModelRegistry(models_dir).load(version, model_class=NutritionStrokeModel)
+    n_workers = n_workers or os.cpu_count() or 1
+    fingerprint = _input_fingerprint(input_path, model.version)
+    progress_path = output_path + '.progress.json'
+    
+    progress = {**fingerprint, 'rows_done': 0, 'output_bytes': 0, 'errors': 0}
+    if resume and os.path.exists(progress_path) and os.path.exists(output_path):
+        with open(progress_path) as f:
+            previous = json.load(f)
+        if any(previous.get(key) != value for key, value in fingerprint.items()):
+            raise ValueError(
+                f"{progress_path} is for a different input file or model version; "
+                "remove it or run without resume to start over"
+            )
+        progress = previous
+        print(f"Resuming after {progress['rows_done']:,} rows")
+    
+    columns = list(model.feature_columns)
+    if id_column:
+        columns.append(id_column)
+    chunks = model._read_chunks(input_path, chunksize, columns=columns, skip_rows=progress['rows_done'])
+    
+    start = time.perf_counter()
+    rows_at_start = progress['rows_done']
+    mode = 'r+' if progress['output_bytes'] else 'w'
+    with open(output_path, mode, newline='') as out:
+        out.truncate(progress['output_bytes'])
+        out.seek(progress['output_bytes'])
+        
+        def write(chunk: pd.DataFrame, scores: pd.DataFrame) -> None:
+            row = progress['rows_done']
+            scores.insert(0, 'row', np.arange(row, row + len(chunk)))
+            if id_column:
+                scores.insert(1, id_column, chunk[id_column].to_numpy() if id_column in chunk else None)
+            scores.to_csv(out, header=(row == 0), index=False)
+            out.flush()
+            os.fsync(out.fileno())
+            
+            progress['rows_done'] += len(chunk)
+            progress['output_bytes'] = out.tell()
+            progress['errors'] += int(scores['error'].notna().sum())
+            _write_progress(progress_path, progress)
+            
+            elapsed = time.perf_counter() - start
+            rate = (progress['rows_done'] - rows_at_start) / elapsed if elapsed else 0.0
+            print(f"Scored {progress['rows_done']:,} rows ({rate:,.0f} rows/s)")
+        
+        if n_workers == 1:
+            for chunk in chunks:
+                write(chunk, model.score_frame(chunk.copy()))
+        else:
+            with ProcessPoolExecutor(
+                max_workers=n_workers,
+                mp_context=multiprocessing.get_context('spawn'),
+                initializer=_init_scoring_worker,
+                initargs=(model,)
+            ) as pool:
+                pending = deque()
+                for chunk in chunks:
+                    pending.append((chunk, pool.submit(_score_chunk, chunk)))
+                    if len(pending) > n_workers:
+                        done_chunk, future = pending.popleft()
+                        write(done_chunk, future.result())
+                while pending:
+                    done_chunk, future = pending.popleft()
+                    write(done_chunk, future.result())
+    
+    if os.path.exists(progress_path):
+        os.remove(progress_path)
+    elapsed = time.perf_counter() - start
+    scored = progress['rows_done'] - rows_at_start
+    summary = {
+        'rows': progress['rows_done'],
+        'rows_scored': scored,
+        'errors': progress['errors'],
+        'seconds': round(elapsed, 3),
+        'rows_per_second': round(scored / elapsed, 1) if elapsed else None
+    }
+    print(f"Wrote {output_path}: {summary['rows']:,} rows ({summary['errors']:,} with errors), "
+          f"{summary['rows_per_second']:,} rows/s")
+    return summary
+
+def main(argv: Optional[List[str]] = None) -> None:
+    """Command-line entry point: train (the default) or score a cohort file."""
+    import argparse
+    
+    parser = argparse.ArgumentParser(description="Train the NeuroNutri models or score cohort files")
+    commands = parser.add_subparsers(dest='command')
+    
+    train_parser = commands.add_parser('train', help="Train and publish a new model version (default)")
+    train_parser.add_argument('--no-synthetic', action='store_true', help="Train on the real data only")
+    train_parser.add_argument('--models-dir', default=MODELS_DIR, help="Model registry root")
+    
+    score_parser = commands.add_parser('score', help="Score a CSV or Parquet cohort file into a CSV file")
+    score_parser.add_argument('input', help="CSV or Parquet file of patient records")
+    score_parser.add_argument('output', help="CSV file to write the scores to")
+    score_parser.add_argument('--models-dir', default=MODELS_DIR, help="Model registry root")
+    score_parser.add_argument('--version', help="Model version (default: the current one)")
+    score_parser.add_argument('--chunksize', type=int, default=DEFAULT_CHUNKSIZE, help="Rows per chunk")
+    score_parser.add_argument('--workers', type=int, help="Worker processes (default: one per CPU)")
+    score_parser.add_argument('--id-column', help="Input column to copy to the output")
+    score_parser.add_argument('--restart', action='store_true',
+                              help="Start over instead of resuming an interrupted run")
+    
+    args = parser.parse_args(argv)
+    if args.command == 'score':
+        score_file(args.input, args.output, models_dir=args.models_dir, version=args.version,
+                   chunksize=args.chunksize, n_workers=args.workers, id_column=args.id_column,
+                   resume=not args.restart)
+    elif args.command == 'train':
+        train_and_save_model(use_synthetic_data=not args.no_synthetic, models_dir=args.models_dir)
+    else:
+        train_and_save_model()
+
 if __name__ == "__main__":
-    train_and_save_model()
+    main()
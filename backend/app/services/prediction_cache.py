@@ -0,0 +1,259 @@
+import asyncio
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional
+
+
+def cache_key(patient_data: Dict[str, Any], model_version: Optional[str]) -> str:
+    """
+    Canonical hash of a validated patient record and the model version.
+
+    The record is expected to come from ``PatientData.dict()``, so field types
+    are already coerced (``"45"`` and ``45`` are both ``45.0``); serializing
+    it with sorted keys makes the key independent of field order. Values are
+    not otherwise normalized, since the recommendations depend on e.g. the
+    exact ``gender`` string.
+    """
+    payload = json.dumps(
+        {'model_version': model_version, 'patient': patient_data},
+        sort_keys=True, separators=(',', ':'), default=str
+    )
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+class MemoryCache:
+    """
+    Thread-safe in-process LRU cache whose entries expire after ``ttl`` seconds.
+
+    Holds at most ``max_entries`` entries; the least recently used one is
+    evicted when a new entry doesn't fit.
+    """
+
+    def __init__(self, max_entries: int = 10000, ttl: float = 300.0):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries: 'OrderedDict[str, tuple]' = OrderedDict()
+        self._lock = threading.Lock()
+        self.evictions = 0
+
+    def get(self, key: str) -> Optional[Any]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires_at, value = entry
+            if expires_at < time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key: str, value: Any) -> None:
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+class DiskCache:
+    """
+    SQLite-backed cache shared by all worker processes on a host.
+
+    Values are stored as JSON. Expired rows are skipped on read; every
+    ``cleanup_interval`` writes, expired rows are deleted and the table is
+    trimmed to the ``max_entries`` most recently written rows.
+    """
+
+    cleanup_interval = 256
+
+    def __init__(self, path: str, ttl: float = 300.0, max_entries: int = 100000):
+        self.path = path
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._local = threading.local()
+        self._writes = 0
+        with self._connect() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS predictions "
+                "(key TEXT PRIMARY KEY, expires_at REAL, value TEXT)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS predictions_expiry ON predictions (expires_at)")
+
+    def _connect(self) -> sqlite3.Connection:
+        # sqlite3 connections can't be shared between threads
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=1.0)
+            conn.execute("PRAGMA journal_mode=WAL")
+            self._local.conn = conn
+        return conn
+
+    def get(self, key: str) -> Optional[Any]:
+        row = self._connect().execute(
+            "SELECT value FROM predictions WHERE key = ? AND expires_at >= ?", (key, time.time())
+        ).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def set(self, key: str, value: Any) -> None:
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO predictions VALUES (?, ?, ?)",
+                (key, time.time() + self.ttl, json.dumps(value))
+            )
+            self._writes += 1
+            if self._writes % self.cleanup_interval:
+                return
+            conn.execute("DELETE FROM predictions WHERE expires_at < ?", (time.time(),))
+            conn.execute(
+                "DELETE FROM predictions WHERE key IN (SELECT key FROM predictions "
+                "ORDER BY expires_at DESC LIMIT -1 OFFSET ?)", (self.max_entries,)
+            )
+
+    def clear(self) -> None:
+        with self._connect() as conn:
+            conn.execute("DELETE FROM predictions")
+
+
+class RedisCache:
+    """Cache on a Redis-compatible server, shared across hosts."""
+
+    def __init__(self, url: str, ttl: float = 300.0, prefix: str = 'neuronutri:prediction:'):
+        try:
+            import redis
+        except ImportError:
+            raise ImportError("The Redis prediction cache requires the redis package: pip install redis")
+        self.client = redis.Redis.from_url(url)
+        self.ttl = ttl
+        self.prefix = prefix
+
+    def get(self, key: str) -> Optional[Any]:
+        value = self.client.get(self.prefix + key)
+        return json.loads(value) if value is not None else None
+
+    def set(self, key: str, value: Any) -> None:
+        self.client.set(self.prefix + key, json.dumps(value), px=int(self.ttl * 1000))
+
+    def clear(self) -> None:
+        for key in self.client.scan_iter(match=self.prefix + '*'):
+            self.client.delete(key)
+
+
+class PredictionCache:
+    """
+    Two-level cache of /analyze results.
+
+    Lookups go to the in-process LRU first and then, if configured, to a
+    shared backend (DiskCache or RedisCache); shared hits are copied into
+    the LRU. Keys include the model version, so results of a previous model
+    are never served after a reload. Errors from the shared backend are
+    treated as misses, so an unavailable backend never fails a request.
+
+    The shared backends do blocking I/O, so code on the event loop uses
+    ``get_async`` and ``set_async``, which run it in the loop's default
+    thread pool.
+    """
+
+    def __init__(self, memory: MemoryCache, shared: Optional[Any] = None):
+        self.memory = memory
+        self.shared = shared
+        self._hits = 0
+        self._shared_hits = 0
+        self._misses = 0
+        self._shared_errors = 0
+
+    def _get_memory(self, key: str) -> Optional[Dict[str, Any]]:
+        value = self.memory.get(key)
+        if value is not None:
+            self._hits += 1
+        return value
+
+    def _get_shared(self, key: str) -> Optional[Dict[str, Any]]:
+        try:
+            value = self.shared.get(key)
+        except Exception:
+            self._shared_errors += 1
+            return None
+        if value is not None:
+            self._shared_hits += 1
+            self.memory.set(key, value)
+        return value
+
+    def _shared_write_failed(self, error: BaseException) -> None:
+        self._shared_errors += 1
+        print(f"Warning: prediction cache write to {type(self.shared).__name__} failed: {error!r}")
+
+    def _set_shared(self, key: str, value: Dict[str, Any]) -> None:
+        try:
+            self.shared.set(key, value)
+        except Exception as e:
+            self._shared_write_failed(e)
+
+    def _check_shared_write(self, future: asyncio.Future) -> None:
+        """Done-callback of a background write: report it if it failed."""
+        if not future.cancelled() and future.exception() is not None:
+            self._shared_write_failed(future.exception())
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        value = self._get_memory(key)
+        if value is None and self.shared is not None:
+            value = self._get_shared(key)
+        if value is None:
+            self._misses += 1
+        return value
+
+    def set(self, key: str, value: Dict[str, Any]) -> None:
+        self.memory.set(key, value)
+        if self.shared is not None:
+            self._set_shared(key, value)
+
+    async def get_async(self, key: str) -> Optional[Dict[str, Any]]:
+        """``get`` for the event loop; only a shared-backend lookup leaves it."""
+        value = self._get_memory(key)
+        if value is None and self.shared is not None:
+            value = await asyncio.get_running_loop().run_in_executor(None, self._get_shared, key)
+        if value is None:
+            self._misses += 1
+        return value
+
+    def set_async(self, key: str, value: Dict[str, Any]) -> None:
+        """
+        ``set`` for the event loop. The shared-backend write runs in the
+        background; the caller doesn't wait for it, and a failure is counted
+        and reported when the write finishes.
+        """
+        self.memory.set(key, value)
+        if self.shared is not None:
+            write = asyncio.get_running_loop().run_in_executor(None, self.shared.set, key, value)
+            write.add_done_callback(self._check_shared_write)
+
+    def clear(self) -> None:
+        """Drop the in-process entries, e.g. after a model swap."""
+        self.memory.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self._hits + self._shared_hits + self._misses
+        return {
+            "backend": type(self.shared).__name__ if self.shared is not None else None,
+            "entries": len(self.memory),
+            "max_entries": self.memory.max_entries,
+            "ttl_seconds": self.memory.ttl,
+            "hits": self._hits,
+            "shared_hits": self._shared_hits,
+            "misses": self._misses,
+            "hit_rate": (self._hits + self._shared_hits) / lookups if lookups else 0.0,
+            "evictions": self.memory.evictions,
+            "shared_errors": self._shared_errors
+        }
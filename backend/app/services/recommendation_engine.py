@@ -0,0 +1,208 @@
+from itertools import product
+from typing import Any, Dict, List, Mapping, Sequence, Tuple
+
+import numpy as np
+
+
+class FrozenDict(dict):
+    """
+    Read-only dict shared between all results that use it.
+
+    A dict subclass rather than a ``MappingProxyType`` so it still pickles
+    (for process-pool workers) and serializes to JSON like a plain dict.
+    """
+
+    def _readonly(self, *args, **kwargs):
+        raise TypeError("FrozenDict is read-only")
+
+    __setitem__ = __delitem__ = clear = pop = popitem = setdefault = update = _readonly
+
+    def __reduce__(self):
+        return (FrozenDict, (dict(self),))
+
+
+class Dimension:
+    """
+    A patient attribute discretized into buckets.
+
+    Numeric dimensions have ``edges``: ``(threshold, inclusive)`` pairs in
+    increasing order. The bucket of a value is the number of edges it passes,
+    ``value >= threshold`` for an inclusive edge and ``value > threshold``
+    otherwise, so each edge keeps the exact comparison of the rule it came
+    from. Categorical dimensions have ``categories``; values outside them
+    fall into the last bucket.
+    """
+
+    def __init__(self, name: str, field: str, default: Any, labels: Sequence[str],
+                 edges: Sequence[Tuple[float, bool]] = (), categories: Sequence[Any] = ()):
+        if edges and len(labels) != len(edges) + 1:
+            raise ValueError(f"Dimension {name} needs {len(edges) + 1} labels")
+        if categories and len(labels) != len(categories) + 1:
+            raise ValueError(f"Dimension {name} needs {len(categories) + 1} labels")
+        self.name = name
+        self.field = field
+        self.default = default
+        self.labels = tuple(labels)
+        self.edges = tuple(edges)
+        self.categories = {value: i for i, value in enumerate(categories)}
+
+    def bucket(self, value: Any) -> int:
+        if self.categories:
+            return self.categories.get(value, len(self.categories))
+        index = 0
+        for threshold, inclusive in self.edges:
+            if value >= threshold if inclusive else value > threshold:
+                index += 1
+            else:
+                break  # Edges are increasing, so no later edge can pass
+        return index
+
+    def buckets(self, values: Sequence[Any]) -> np.ndarray:
+        """Vectorized ``bucket`` over a list of values."""
+        if self.categories:
+            other = len(self.categories)
+            return np.fromiter((self.categories.get(v, other) for v in values), dtype=np.intp, count=len(values))
+        array = np.asarray(values, dtype=np.float64)
+        index = np.zeros(len(array), dtype=np.intp)
+        for threshold, inclusive in self.edges:
+            index += (array >= threshold) if inclusive else (array > threshold)
+        return index
+
+
+# Patient attributes the rules can condition on. Each edge reproduces the
+# comparison of the rule that introduced it: age > 50, BMI >= 30, and the
+# risk category boundaries (0.2 and 0.5) plus the DASH diet cut-off (> 0.7)
+DIMENSIONS = (
+    Dimension('age', 'age', 50, ('50_or_under', 'over_50'), edges=[(50, False)]),
+    Dimension('gender', 'gender', 'male', ('male', 'other'), categories=['male']),
+    Dimension('hypertension', 'hypertension', 0, ('no', 'yes'), edges=[(0, False)]),
+    Dimension('bmi', 'bmi', 25, ('under_30', '30_or_over'), edges=[(30, True)]),
+    Dimension('risk', 'stroke_risk', 0.5, ('low', 'moderate', 'high', 'very_high'),
+              edges=[(0.2, True), (0.5, True), (0.7, False)]),
+)
+
+# Declarative recommendation and goal rules, applied in order to every
+# patient whose buckets match ``when`` (a label or a tuple of labels per
+# dimension; missing dimensions match everything). ``recommendations`` are
+# appended; ``goals`` are set, or adjusted when the value is a callable of
+# the current value. Later rules override earlier ones.
+NUTRITION_RULES = (
+    {
+        'goals': {'calories': 2000, 'protein_g': 56, 'fiber_g': 30, 'sodium_mg': 2300, 'sugar_g': 25}
+    },
+    {
+        'when': {'gender': 'other'},
+        'goals': {'calories': 1800, 'protein_g': 46}
+    },
+    {
+        'when': {'hypertension': 'yes'},
+        'goals': {'sodium_mg': 1500}
+    },
+    {
+        'when': {'age': 'over_50'},
+        'goals': {'calories': lambda calories: max(1600, calories - 200), 'calcium_mg': 1200, 'vitamin_d_iu': 800}
+    },
+    {
+        'when': {'bmi': '30_or_over'},
+        'recommendations': (
+            "Reduce daily caloric intake by 500-1000 kcal for weight loss.",
+            "Focus on whole, unprocessed foods.",
+        )
+    },
+    {
+        'when': {'risk': 'very_high'},
+        'recommendations': (
+            "Follow a DASH (Dietary Approaches to Stop Hypertension) diet.",
+            "Limit sodium intake to less than 1,500 mg per day.",
+            "Increase potassium-rich foods like bananas, spinach, and sweet potatoes.",
+        )
+    },
+    {
+        'recommendations': (
+            "Consume at least 5 servings of fruits and vegetables daily.",
+            "Choose whole grains over refined grains.",
+            "Include fatty fish (like salmon) twice a week for omega-3 fatty acids.",
+            "Stay hydrated with water and limit sugary beverages.",
+        )
+    },
+)
+
+class RecommendationEngine:
+    """
+    Rule table compiled into a lookup table over every combination of buckets.
+
+    At construction every rule is evaluated once for every cell of the
+    bucket grid, so a lookup is a handful of comparisons to find the cell
+    plus one tuple index, whatever the number of rules. All patients in a
+    cell share the same recommendation tuple and FrozenDict of goals.
+    """
+
+    def __init__(self, rules: Sequence[Dict[str, Any]] = NUTRITION_RULES,
+                 dimensions: Sequence[Dimension] = DIMENSIONS):
+        self.dimensions = tuple(dimensions)
+        self.rules = tuple(rules)
+        self._sizes = [len(d.labels) for d in self.dimensions]
+        # Mixed-radix place value of each dimension in the cell index
+        self._strides = np.cumprod([1] + self._sizes[:0:-1])[::-1].astype(np.intp)
+        self._cells = tuple(self._compile(cell) for cell in product(*(range(n) for n in self._sizes)))
+        # Every goal any patient can get, in order of first appearance
+        self.goal_keys = tuple(dict.fromkeys(key for _, goals in self._cells for key in goals))
+        # Plain Python values for the per-patient lookup
+        self._scalar_plan = tuple(
+            (d.field, d.default, d.bucket, int(stride)) for d, stride in zip(self.dimensions, self._strides)
+        )
+
+    def _matches(self, rule: Dict[str, Any], cell: Tuple[int, ...]) -> bool:
+        for dimension, index in zip(self.dimensions, cell):
+            wanted = rule.get('when', {}).get(dimension.name)
+            if wanted is None:
+                continue
+            if isinstance(wanted, str):
+                wanted = (wanted,)
+            unknown = set(wanted) - set(dimension.labels)
+            if unknown:
+                raise ValueError(f"Unknown {dimension.name} buckets in rule: {sorted(unknown)}")
+            if dimension.labels[index] not in wanted:
+                return False
+        return True
+
+    def _compile(self, cell: Tuple[int, ...]) -> Tuple[Tuple[str, ...], FrozenDict]:
+        recommendations: List[str] = []
+        goals: Dict[str, Any] = {}
+        for rule in self.rules:
+            if not self._matches(rule, cell):
+                continue
+            recommendations.extend(rule.get('recommendations', ()))
+            for key, value in rule.get('goals', {}).items():
+                goals[key] = value(goals[key]) if callable(value) else value
+        return tuple(recommendations), FrozenDict(goals)
+
+    def lookup(self, patient_data: Dict[str, Any]) -> Tuple[Tuple[str, ...], FrozenDict]:
+        """Recommendations and daily goals for one patient."""
+        index = 0
+        for field, default, bucket, stride in self._scalar_plan:
+            index += stride * bucket(patient_data.get(field, default))
+        return self._cells[index]
+
+    def lookup_batch(self, patients: List[Dict[str, Any]]) -> List[Tuple[Tuple[str, ...], FrozenDict]]:
+        """``lookup`` for many patients, bucketing each dimension as one array operation."""
+        return self.lookup_columns({
+            d.field: [p.get(d.field, d.default) for p in patients] for d in self.dimensions
+        }, len(patients))
+
+    def lookup_columns(self, columns: Mapping[str, Sequence[Any]],
+                       n_rows: int) -> List[Tuple[Tuple[str, ...], FrozenDict]]:
+        """
+        ``lookup`` for column-oriented data, such as a DataFrame chunk.
+
+        Fields missing from ``columns`` take the dimension's default.
+        """
+        index = np.zeros(n_rows, dtype=np.intp)
+        for dimension, stride in zip(self.dimensions, self._strides):
+            values = columns[dimension.field] if dimension.field in columns else [dimension.default] * n_rows
+            index += stride * dimension.buckets(values)
+        cells = self._cells
+        return [cells[i] for i in index.tolist()]
+
+
+DEFAULT_ENGINE = RecommendationEngine()
@@ -0,0 +1,172 @@
+from typing import TYPE_CHECKING, Dict, List, Optional, Sequence, Tuple
+
+import joblib
+import numpy as np
+
+if TYPE_CHECKING:
+    from sklearn.neighbors import KDTree
+
+INDEX_FIELDS = ('features', 'outcomes', 'feature_mean', 'feature_scale', 'nutrition_mean',
+                'nutrition_scale', 'feature_tree', 'full_tree', 'categories')
+
+
+class SimilarityIndex:
+    """
+    Exact nearest-neighbor search over the patients a model was trained on.
+
+    Patients are compared on standardized vectors: the encoded
+    ``feature_columns`` and the nutrition columns, each standardized with
+    the cohort's own mean and standard deviation. Two KD-trees are kept, one
+    over the patient features and one over features plus nutrition, so
+    queries without a diet log are compared on the patient features only.
+    The labels of the categorical codes are kept with the index, so later
+    changes to the model's encoders don't change how rows are described.
+
+    Saved as a single joblib file; loading it memory-mapped maps the trees'
+    arrays from disk instead of reading them, so a cohort of millions of
+    rows loads in milliseconds and is shared between worker processes
+    through the page cache.
+    """
+
+    leaf_size = 40
+
+    def __init__(self, features: np.ndarray, outcomes: np.ndarray,
+                 feature_mean: np.ndarray, feature_scale: np.ndarray,
+                 nutrition_mean: np.ndarray, nutrition_scale: np.ndarray,
+                 feature_tree: 'KDTree', full_tree: 'KDTree',
+                 categories: Optional[Dict[str, np.ndarray]] = None):
+        self.features = features
+        self.outcomes = outcomes
+        self.feature_mean = feature_mean
+        self.feature_scale = feature_scale
+        # The cohort's own statistics, so model updates don't change its space
+        self.nutrition_mean = nutrition_mean
+        self.nutrition_scale = nutrition_scale
+        self.feature_tree = feature_tree
+        self.full_tree = full_tree
+        # Label of each code per categorical column (None for indexes saved
+        # before labels were kept, which are described with the encoders)
+        self.categories = categories
+        # File the index was memory-mapped from, if any
+        self.source_path: Optional[str] = None
+
+    def __reduce_ex__(self, protocol):
+        # Re-mapped from disk when unpickled (e.g. in process-pool workers)
+        if self.source_path is not None:
+            return (SimilarityIndex.load, (self.source_path, 'r'))
+        return super().__reduce_ex__(protocol)
+
+    def __len__(self) -> int:
+        return len(self.outcomes)
+
+    @classmethod
+    def build(cls, features: np.ndarray, nutrition: np.ndarray, outcomes: np.ndarray,
+              feature_columns: List[str], categories: Dict[str, Sequence[str]],
+              encoders: Dict[str, object]) -> 'SimilarityIndex':
+        """
+        Index a training cohort.
+
+        Args:
+            features: Encoded ``feature_columns`` of the real (not synthetic) rows
+            nutrition: Nutrition columns of the same rows, NaN where not logged
+            outcomes: Stroke outcome of each row
+            feature_columns: Names of the columns of ``features``
+            categories: Per categorical column, the label of each code in
+                ``features``
+            encoders: The model's fitted encoders; the rows are re-coded to
+                their codes, which queries are encoded with
+        """
+        # Imported here so loading a model without an index doesn't import
+        # sklearn.neighbors (unpickling a saved index imports it on demand)
+        from sklearn.neighbors import KDTree
+
+        features = np.array(features, dtype=np.float32)
+        index_categories = {}
+        for col, labels in categories.items():
+            j = feature_columns.index(col)
+            classes = np.asarray(encoders[col].classes_, dtype=object)
+            codes = {label: code for code, label in enumerate(classes.tolist())}
+            recode = np.array([codes[label] for label in labels], dtype=np.float32)
+            features[:, j] = recode[features[:, j].astype(np.intp)]
+            index_categories[col] = classes
+        feature_mean = features.mean(axis=0, dtype=np.float64)
+        feature_scale = features.std(axis=0, dtype=np.float64)
+        feature_scale[feature_scale == 0] = 1.0
+
+        # Missing nutrients are left out of the statistics and placed at the mean
+        nutrition = np.asarray(nutrition, dtype=np.float64)
+        logged = ~np.isnan(nutrition).all(axis=0)
+        nutrition_mean = np.zeros(nutrition.shape[1])
+        nutrition_scale = np.ones(nutrition.shape[1])
+        if logged.any():
+            nutrition_mean[logged] = np.nanmean(nutrition[:, logged], axis=0)
+            nutrition_scale[logged] = np.nanstd(nutrition[:, logged], axis=0)
+        nutrition_scale[nutrition_scale == 0] = 1.0
+
+        feature_vectors = (features - feature_mean) / feature_scale
+        nutrition_vectors = np.nan_to_num((nutrition - nutrition_mean) / nutrition_scale, nan=0.0)
+        return cls(
+            features=features,
+            outcomes=np.asarray(outcomes, dtype=np.int8),
+            feature_mean=feature_mean,
+            feature_scale=feature_scale,
+            nutrition_mean=nutrition_mean,
+            nutrition_scale=nutrition_scale,
+            feature_tree=KDTree(feature_vectors, leaf_size=cls.leaf_size),
+            full_tree=KDTree(np.hstack([feature_vectors, nutrition_vectors]), leaf_size=cls.leaf_size),
+            categories=index_categories
+        )
+
+    def save(self, path: str) -> None:
+        # The arrays and trees themselves, never a reference to source_path
+        joblib.dump({name: getattr(self, name) for name in INDEX_FIELDS}, path)
+
+    @classmethod
+    def load(cls, path: str, mmap_mode: Optional[str] = 'r') -> 'SimilarityIndex':
+        """Load a saved index, memory-mapped read-only by default."""
+        index = cls(**joblib.load(path, mmap_mode=mmap_mode))
+        if mmap_mode is not None:
+            index.source_path = path
+        return index
+
+    def query(self, features: np.ndarray, nutrition: Optional[np.ndarray],
+              k: int = 5) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Find the ``k`` nearest cohort rows for a batch of patients.
+
+        Args:
+            features: Encoded ``feature_columns`` of the queries
+            nutrition: Nutrition columns of the queries (NaN where not logged),
+                or None to compare on patient features only
+            k: Number of neighbors per query
+
+        Returns:
+            Euclidean distances and cohort row numbers, both (queries x k),
+            nearest first
+        """
+        k = min(k, len(self))
+        queries = (np.asarray(features, dtype=np.float64) - self.feature_mean) / self.feature_scale
+        if nutrition is None:
+            return self.feature_tree.query(queries, k=k)
+
+        # Nutrients that weren't logged are taken to be at the population mean
+        scaled = (np.asarray(nutrition, dtype=np.float64) - self.nutrition_mean) / self.nutrition_scale
+        return self.full_tree.query(np.hstack([queries, np.nan_to_num(scaled, nan=0.0)]), k=k)
+
+    def describe(self, rows: np.ndarray, feature_columns: List[str],
+                 encoders: Dict[str, object]) -> List[Dict[str, object]]:
+        """Decoded patient attributes and stroke outcome of cohort rows."""
+        if self.categories is not None:
+            labels = self.categories
+        else:
+            labels = {col: encoder.classes_ for col, encoder in encoders.items()}
+        features = self.features[rows]
+        described = []
+        for row, values in zip(rows.tolist(), features):
+            patient = {}
+            for col, value in zip(feature_columns, values.tolist()):
+                classes = labels.get(col)
+                patient[col] = str(classes[int(value)]) if classes is not None else value
+            patient['stroke'] = int(self.outcomes[row])
+            described.append(patient)
+        return described
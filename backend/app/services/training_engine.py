@@ -0,0 +1,187 @@
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List, Literal, Optional, Tuple
+
+import numpy as np
+from imblearn.over_sampling import SMOTE
+from imblearn.pipeline import Pipeline as ImbPipeline
+from sklearn.base import clone
+from sklearn.ensemble import RandomForestClassifier
+from sklearn.metrics import get_scorer
+from sklearn.model_selection import ParameterGrid, ParameterSampler, StratifiedKFold
+from threadpoolctl import threadpool_limits
+
+# Training data shared with each pool worker once, instead of per task
+_worker_X = None
+_worker_y = None
+
+
+def _init_worker(X: Optional[np.ndarray], y: Optional[np.ndarray], limit_threads: bool = True) -> None:
+    global _worker_X, _worker_y
+    _worker_X, _worker_y = X, y
+    if limit_threads:
+        # Each worker fits one single-threaded forest at a time; native thread
+        # pools (BLAS, OpenMP) would only compete with the other workers
+        threadpool_limits(1)
+
+
+@contextmanager
+def timed_stage(timings: Dict[str, float], name: str) -> Iterator[None]:
+    """Record the wall time of a block in ``timings[name]``, in seconds."""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        timings[name] = round(time.perf_counter() - start, 3)
+        print(f"[{name}] {timings[name]:.2f}s")
+
+
+def smote_pipeline(forest: RandomForestClassifier, y: np.ndarray, random_state: int) -> ImbPipeline:
+    """SMOTE followed by the forest, or just the forest when SMOTE can't run."""
+    k_neighbors = min(5, int(np.sum(y == 1)) - 1)
+    if k_neighbors < 1:
+        return ImbPipeline([('model', forest)])
+    smote = SMOTE(sampling_strategy='minority', random_state=random_state, k_neighbors=k_neighbors)
+    return ImbPipeline([('smote', smote), ('model', forest)])
+
+
+def _fit_fold(estimator: RandomForestClassifier, train_idx: np.ndarray, test_idx: np.ndarray,
+              scoring: str, random_state: int, keep_model: bool) -> Tuple[float, Optional[RandomForestClassifier]]:
+    """
+    Resample and fit one fold, then score it on the untouched held-out rows.
+
+    Runs in a pool worker (or inline) against the worker's copy of the data.
+    """
+    X_train, y_train = _worker_X[train_idx], _worker_y[train_idx]
+    pipeline = smote_pipeline(clone(estimator), y_train, random_state)
+    pipeline.fit(X_train, y_train)
+
+    model = pipeline.named_steps['model']
+    score = get_scorer(scoring)(model, _worker_X[test_idx], _worker_y[test_idx])
+    return float(score), (model if keep_model else None)
+
+
+class TrainingEngine:
+    """
+    Hyperparameter search for the stroke forest over a process pool.
+
+    Every (parameter set, CV fold) pair is one task. Tasks are spread over a
+    fixed number of worker processes, each fitting a single-threaded forest,
+    so there's no nested parallelism: the old ``cross_val_score(n_jobs=-1)``
+    around a forest with ``n_jobs=-1`` started a full set of tree threads
+    per fold. SMOTE runs inside each fold, on that fold's training rows only,
+    so the held-out rows are always real data.
+
+    With ``refit='full'`` the best parameters are refitted on the whole
+    training split using every core; with ``refit='best_fold'`` the forest
+    already fitted on the best fold is kept and the refit is skipped.
+    """
+
+    def __init__(self, base_params: Dict[str, Any], param_grid: Optional[Dict[str, List[Any]]] = None,
+                 search: Literal['grid', 'random'] = 'grid', n_iter: int = 10, cv: int = 5,
+                 scoring: str = 'f1', n_workers: Optional[int] = None,
+                 refit: Literal['full', 'best_fold'] = 'full', random_state: int = 42):
+        if search not in ('grid', 'random'):
+            raise ValueError(f"Unknown search strategy: {search}")
+        if refit not in ('full', 'best_fold'):
+            raise ValueError(f"Unknown refit strategy: {refit}")
+        self.base_params = base_params
+        self.param_grid = param_grid or {}
+        self.search = search
+        self.n_iter = n_iter
+        self.cv = cv
+        self.scoring = scoring
+        self.n_workers = n_workers or os.cpu_count() or 1
+        self.refit = refit
+        self.random_state = random_state
+        self.stage_timings: Dict[str, float] = {}
+
+    def candidates(self) -> List[Dict[str, Any]]:
+        """Parameter sets to evaluate, each merged over the base parameters."""
+        if not self.param_grid:
+            overrides = [{}]
+        elif self.search == 'grid':
+            overrides = list(ParameterGrid(self.param_grid))
+        else:
+            overrides = list(ParameterSampler(self.param_grid, self.n_iter, random_state=self.random_state))
+        return [{**self.base_params, **params} for params in overrides]
+
+    def fit(self, X: np.ndarray, y: np.ndarray) -> Tuple[RandomForestClassifier, Dict[str, Any]]:
+        """
+        Search the parameter space on a training split and build the final forest.
+
+        Returns:
+            The final forest and a report with the best parameters, its fold
+            scores, every candidate's mean score and the per-stage wall times
+        """
+        X = np.ascontiguousarray(X, dtype=np.float32)
+        y = np.asarray(y)
+        candidates = self.candidates()
+        folds = list(StratifiedKFold(n_splits=self.cv).split(X, y))
+        tasks = [(c, f) for c in range(len(candidates)) for f in range(len(folds))]
+        keep_models = self.refit == 'best_fold'
+
+        scores = np.full((len(candidates), len(folds)), np.nan)
+        # Forest of the best-scoring fold so far, per candidate
+        best_fold_models: Dict[int, Tuple[float, RandomForestClassifier]] = {}
+
+        def record(task: Tuple[int, int], score: float, model: Optional[RandomForestClassifier]) -> None:
+            c, f = task
+            scores[c, f] = score
+            if model is not None and (c not in best_fold_models or score > best_fold_models[c][0]):
+                best_fold_models[c] = (score, model)
+
+        print(f"Searching {len(candidates)} parameter set(s) x {len(folds)} folds on {min(self.n_workers, len(tasks))} worker(s)...")
+        with timed_stage(self.stage_timings, 'search'):
+            estimators = [RandomForestClassifier(**{**params, 'n_jobs': 1}) for params in candidates]
+            if self.n_workers == 1 or len(tasks) == 1:
+                _init_worker(X, y, limit_threads=False)
+                try:
+                    for task in tasks:
+                        c, f = task
+                        record(task, *_fit_fold(estimators[c], *folds[f], self.scoring, self.random_state, keep_models))
+                finally:
+                    _init_worker(None, None, limit_threads=False)
+            else:
+                with ProcessPoolExecutor(
+                    max_workers=min(self.n_workers, len(tasks)),
+                    mp_context=multiprocessing.get_context('spawn'),
+                    initializer=_init_worker,
+                    initargs=(X, y)
+                ) as pool:
+                    futures = {
+                        pool.submit(_fit_fold, estimators[c], *folds[f], self.scoring, self.random_state, keep_models): (c, f)
+                        for c, f in tasks
+                    }
+                    for future in as_completed(futures):
+                        record(futures[future], *future.result())
+
+        mean_scores = np.nanmean(scores, axis=1)
+        best = int(np.argmax(mean_scores))
+        best_params = candidates[best]
+
+        if self.refit == 'best_fold':
+            model = best_fold_models[best][1]
+            self.stage_timings['refit'] = 0.0
+        else:
+            with timed_stage(self.stage_timings, 'refit'):
+                forest = RandomForestClassifier(**{**best_params, 'n_jobs': -1})
+                pipeline = smote_pipeline(forest, y, self.random_state)
+                pipeline.fit(X, y)
+                model = pipeline.named_steps['model']
+        # The final model is used outside the search, where it may use every core
+        model.set_params(n_jobs=-1)
+
+        report = {
+            'best_params': {k: v for k, v in best_params.items() if k in self.param_grid},
+            'cv_scores': scores[best].tolist(),
+            'search_results': [
+                {'params': {k: v for k, v in params.items() if k in self.param_grid}, 'mean_score': float(mean)}
+                for params, mean in zip(candidates, mean_scores)
+            ],
+            'stage_timings': dict(self.stage_timings)
+        }
+        return model, report
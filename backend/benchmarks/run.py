@@ -0,0 +1,351 @@
+"""
+Offline latency and throughput benchmarks for training and inference.
+
+Run from the backend directory:
+
+    python -m benchmarks.run --rows 20000 --output results.json
+    python -m benchmarks.run --rows 20000 --compare results.json --threshold 0.2
+
+Every run builds a synthetic cohort with the schema of
+app/data/sample_nutrition_data.csv, trains and publishes a model into a
+temporary registry, and measures the model against it. Nothing is fetched
+over the network and the real registry in app/models is never touched.
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SAMPLE_DATA = os.path.join(BACKEND_DIR, 'app', 'data', 'sample_nutrition_data.csv')
+
+# Metric name suffixes where a higher value is better; everything else
+# (times, memory) is better when lower
+HIGHER_IS_BETTER = ('_per_s',)
+# Changes smaller than this, per unit suffix, are noise and never count as
+# regressions, however large they are relative to a tiny baseline
+NOISE_FLOOR = {'_ms': 1.0, '_s': 0.05, '_mb': 5.0}
+
+
+def build_cohort(rows: int, seed: int = 0) -> pd.DataFrame:
+    """
+    A synthetic cohort of ``rows`` patients with the sample data's columns.
+
+    Categorical values are drawn from those in the sample, numeric features
+    from the sample's mean and standard deviation, and nutrition logs by
+    resampling sample logs with +/-15% noise. Stroke follows the same risk
+    factors as NutritionStrokeModel's synthetic data.
+    """
+    sample = pd.read_csv(SAMPLE_DATA)
+    rng = np.random.default_rng(seed)
+    cohort = {}
+
+    for col in ('gender', 'smoking_status', 'residence_type', 'work_type'):
+        options = sample[col].astype(str).unique()
+        cohort[col] = options[rng.integers(0, len(options), rows)]
+
+    for col, low, high in (('age', 18, 100), ('bmi', 15, 50), ('avg_glucose_level', 50, 300)):
+        cohort[col] = np.clip(rng.normal(sample[col].mean(), sample[col].std(), rows), low, high).round(1)
+    cohort['hypertension'] = (rng.random(rows) < 0.1).astype(int)
+    cohort['heart_disease'] = (rng.random(rows) < 0.05).astype(int)
+
+    smokes = np.char.find(np.char.lower(cohort['smoking_status'].astype(str)), 'smokes') >= 0
+    risk = (0.01 + 0.02 * (cohort['age'] > 60) + 0.01 * (cohort['bmi'] > 30)
+            + 0.02 * cohort['hypertension'] + 0.02 * cohort['heart_disease'] + 0.01 * smokes)
+    cohort['stroke'] = (rng.random(rows) < risk).astype(int)
+
+    nutrition_cols = [c for c in sample.columns if c not in cohort]
+    logs = sample[nutrition_cols].to_numpy(dtype=float)[rng.integers(0, len(sample), rows)]
+    logs *= rng.uniform(0.85, 1.15, logs.shape)
+    for j, col in enumerate(nutrition_cols):
+        cohort[col] = logs[:, j].round(1)
+
+    return pd.DataFrame(cohort)[list(sample.columns)]
+
+
+def percentiles(samples: List[float], prefix: str) -> Dict[str, float]:
+    """p50/p90/p99 and mean of latencies in seconds, as milliseconds."""
+    ms = np.asarray(samples) * 1000
+    return {
+        f"{prefix}_p50_ms": round(float(np.percentile(ms, 50)), 3),
+        f"{prefix}_p90_ms": round(float(np.percentile(ms, 90)), 3),
+        f"{prefix}_p99_ms": round(float(np.percentile(ms, 99)), 3),
+        f"{prefix}_mean_ms": round(float(ms.mean()), 3),
+    }
+
+
+def bench_synthetic_data(rows: int) -> Dict[str, float]:
+    """NutritionStrokeModel.generate_synthetic_data throughput."""
+    from app.services.model_trainer import NutritionStrokeModel
+
+    model = NutritionStrokeModel()
+    base = model.clean_data(pd.read_csv(SAMPLE_DATA))
+    base = model.encode_categorical(base)
+    start = time.perf_counter()
+    model.generate_synthetic_data(base, num_samples=rows, seed=0)
+    elapsed = time.perf_counter() - start
+    return {'generate_s': round(elapsed, 3), 'generate_rows_per_s': round(rows / elapsed, 1)}
+
+
+def bench_training(cohort_path: str, registry_dir: str, cv_folds: int, workers: int) -> Dict[str, float]:
+    """Train on the cohort file and publish the model; wall time per training stage."""
+    from app.services.model_registry import ModelRegistry
+    from app.services.model_trainer import NutritionStrokeModel
+
+    model = NutritionStrokeModel()
+    start = time.perf_counter()
+    metrics = model.train(cohort_path, use_synthetic_data=False, model_dir=None,
+                          search_options={'cv': cv_folds, 'n_workers': workers})
+    total = time.perf_counter() - start
+    ModelRegistry(registry_dir).publish(model, metrics)
+
+    results = {f"{stage}_s": seconds for stage, seconds in metrics['stage_timings'].items()}
+    results['total_s'] = round(total, 3)
+    return results
+
+
+def _rss_mb() -> float:
+    with open('/proc/self/status') as f:
+        for line in f:
+            if line.startswith('VmRSS:'):
+                return int(line.split()[1]) / 1024
+    return float('nan')
+
+
+def measure_load(registry_dir: str, storage: str) -> Dict[str, float]:
+    """
+    Load the current model in this process; run in a fresh subprocess.
+
+    ``import_ms`` is the import of the serving code, ``load_ms`` the artifact
+    load alone (the libraries the artifacts unpickle into are imported before
+    it is timed) and ``cold_start_ms`` everything from the first import.
+    """
+    start = time.perf_counter()
+    from app.services.model_registry import ModelRegistry
+    imported = time.perf_counter()
+    import sklearn.preprocessing  # noqa: F401 (encoders and scaler)
+    if storage == 'joblib':
+        import sklearn.ensemble  # noqa: F401 (the pickled forest)
+
+    registry = ModelRegistry(registry_dir)
+    before = _rss_mb()
+    load_start = time.perf_counter()
+    registry.load(storage=storage)
+    end = time.perf_counter()
+    return {'import_ms': round((imported - start) * 1000, 3), 'load_ms': round((end - load_start) * 1000, 3),
+            'cold_start_ms': round((end - start) * 1000, 3), 'rss_mb': round(_rss_mb(), 1),
+            'rss_increase_mb': round(_rss_mb() - before, 1)}
+
+
+def bench_model_load(registry_dir: str, repeat: int = 3) -> Dict[str, float]:
+    """
+    Model load time and resident memory per storage mode.
+
+    Each load runs in a new interpreter, after the imports, so it measures a
+    cold process rather than objects cached by an earlier load. The median
+    of ``repeat`` runs is kept.
+    """
+    results = {}
+    for storage in ('joblib', 'mmap'):
+        runs = []
+        for _ in range(repeat):
+            output = subprocess.run(
+                [sys.executable, '-m', 'benchmarks.run', '--measure-load', registry_dir, storage],
+                cwd=BACKEND_DIR, capture_output=True, text=True, check=True
+            ).stdout
+            runs.append(json.loads(output.strip().splitlines()[-1]))
+        for key in runs[0]:
+            results[f"{storage}_{key}"] = float(np.median([run[key] for run in runs]))
+    return results
+
+
+async def _bench_api(registry_dir: str, cohort: pd.DataFrame, requests: int,
+                     batch_sizes: List[int]) -> Dict[str, float]:
+    import httpx
+    from app import main
+    from app.config import settings
+    from app.services.model_registry import ModelRegistry
+
+    # Measure the model path, not the result cache
+    settings.prediction_cache_size = 0
+    main.registry = ModelRegistry(registry_dir)
+    await main.load_models()
+
+    records = cohort.drop(columns=['stroke']).to_dict('records')
+    patients = [
+        {**{k: v for k, v in r.items() if k in main.PatientData.__fields__},
+         'nutrition_data': {k: v for k, v in r.items() if k not in main.PatientData.__fields__}}
+        for r in records
+    ]
+    results = {}
+    try:
+        async with httpx.AsyncClient(app=main.app, base_url='http://benchmark') as client:
+            for patient in patients[:50]:
+                (await client.post('/analyze', json=patient)).raise_for_status()
+
+            # Every request in both serving modes; fast mode metrics are prefixed
+            for mode, mode_prefix in (('standard', ''), ('fast', 'fast_')):
+                settings.serving_mode = mode
+                for name, url in (('analyze', '/analyze'), ('analyze_explain', '/analyze?explain=true')):
+                    latencies = []
+                    cpu_start = time.process_time()
+                    for i in range(requests):
+                        start = time.perf_counter()
+                        response = await client.post(url, json=patients[i % len(patients)])
+                        latencies.append(time.perf_counter() - start)
+                        response.raise_for_status()
+                    # Client and server share the process, so this includes the client
+                    cpu_ms = (time.process_time() - cpu_start) / requests * 1000
+                    results.update(percentiles(latencies, mode_prefix + name))
+                    results[f"{mode_prefix}{name}_cpu_ms"] = round(cpu_ms, 3)
+
+                for size in batch_sizes:
+                    body = {'patients': patients[:size]}
+                    (await client.post('/analyze/batch', json=body)).raise_for_status()
+                    start = time.perf_counter()
+                    (await client.post('/analyze/batch', json=body)).raise_for_status()
+                    results[f"{mode_prefix}batch_{size}_records_per_s"] = round(size / (time.perf_counter() - start), 1)
+    finally:
+        await main.shutdown_executor()
+    return results
+
+
+def bench_inference(registry_dir: str, cohort: pd.DataFrame, requests: int,
+                    batch_sizes: List[int]) -> Dict[str, float]:
+    """
+    Single-request /analyze latency and CPU time (with and without
+    explanations) through an in-process ASGI client, batch throughput of
+    /analyze/batch, each in both serving modes, and predict_stroke_risk
+    latency on its own.
+    """
+    from app.services.model_registry import ModelRegistry
+
+    batch_sizes = [size for size in batch_sizes if size <= len(cohort)]
+    results = asyncio.run(_bench_api(registry_dir, cohort, requests, batch_sizes))
+
+    model = ModelRegistry(registry_dir).load()
+    records = cohort.drop(columns=['stroke']).to_dict('records')
+    for record in records[:50]:
+        model.predict_stroke_risk(record)
+    for prefix, explain in (('predict_stroke_risk', False), ('predict_stroke_risk_explain', True)):
+        latencies = []
+        for i in range(requests):
+            start = time.perf_counter()
+            model.predict_stroke_risk(records[i % len(records)], explain=explain)
+            latencies.append(time.perf_counter() - start)
+        results.update(percentiles(latencies, prefix))
+    return results
+
+
+def run_suite(rows: int, requests: int, batch_sizes: List[int], cv_folds: int, workers: int,
+              work_dir: str) -> Dict[str, Any]:
+    """Run every benchmark; returns the results document."""
+    cohort = build_cohort(rows)
+    cohort_path = os.path.join(work_dir, 'cohort.csv')
+    cohort.to_csv(cohort_path, index=False)
+    registry_dir = os.path.join(work_dir, 'models')
+
+    suites = {}
+    print(f"Synthetic data ({rows:,} rows)...")
+    suites['synthetic_data'] = bench_synthetic_data(rows)
+    print(f"Training ({rows:,} rows, {cv_folds}-fold search)...")
+    suites['training'] = bench_training(cohort_path, registry_dir, cv_folds, workers)
+    print("Model load...")
+    suites['model_load'] = bench_model_load(registry_dir)
+    print(f"Inference ({requests:,} requests)...")
+    suites['inference'] = bench_inference(registry_dir, cohort, requests, batch_sizes)
+
+    return {
+        'meta': {
+            'created_at': time.strftime('%Y-%m-%dT%H:%M:%S%z'),
+            'rows': rows,
+            'requests': requests,
+            'cv_folds': cv_folds,
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'cpu_count': os.cpu_count(),
+        },
+        'results': suites
+    }
+
+
+def compare(current: Dict[str, Any], baseline: Dict[str, Any], threshold: float) -> List[str]:
+    """
+    Print each metric next to the baseline; returns the regressed metrics.
+
+    A metric regresses when it is worse than the baseline by more than
+    ``threshold`` (a fraction, e.g. 0.2 for 20%) and by more than the
+    NOISE_FLOOR of its unit.
+    """
+    regressions = []
+    print(f"\n{'metric':<48} {'baseline':>12} {'current':>12} {'change':>9}")
+    for suite, metrics in current['results'].items():
+        for name, value in metrics.items():
+            old = baseline.get('results', {}).get(suite, {}).get(name)
+            if old is None or not old:
+                continue
+            change = (value - old) / abs(old)
+            if name.endswith(HIGHER_IS_BETTER):
+                regressed = -change > threshold
+            else:
+                floor = next((v for suffix, v in NOISE_FLOOR.items() if name.endswith(suffix)), 0.0)
+                regressed = change > threshold and value - old > floor
+            flag = '  REGRESSION' if regressed else ''
+            if flag:
+                regressions.append(f"{suite}.{name}")
+            print(f"{suite + '.' + name:<48} {old:>12.3f} {value:>12.3f} {change:>+8.1%}{flag}")
+    return regressions
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="NeuroNutri training and inference benchmarks")
+    parser.add_argument('--rows', type=int, default=20000, help="Synthetic cohort size")
+    parser.add_argument('--requests', type=int, default=1000, help="Single /analyze requests to time")
+    parser.add_argument('--batch-sizes', type=int, nargs='+', default=[100, 1000, 10000],
+                        help="/analyze/batch sizes to time")
+    parser.add_argument('--cv-folds', type=int, default=3, help="Cross-validation folds during training")
+    parser.add_argument('--workers', type=int, default=None, help="Training worker processes")
+    parser.add_argument('--output', help="Write the results as JSON to this file")
+    parser.add_argument('--compare', help="Baseline results JSON to compare against")
+    parser.add_argument('--threshold', type=float, default=0.2,
+                        help="Relative slowdown that counts as a regression (default 0.2)")
+    parser.add_argument('--measure-load', nargs=2, metavar=('REGISTRY', 'STORAGE'), help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.measure_load:
+        print(json.dumps(measure_load(*args.measure_load)))
+        return 0
+
+    with tempfile.TemporaryDirectory(prefix='neuronutri-bench-') as work_dir:
+        results = run_suite(args.rows, args.requests, args.batch_sizes, args.cv_folds,
+                            args.workers, work_dir)
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2)
+        print(f"Results written to {args.output}")
+    else:
+        print(json.dumps(results, indent=2))
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        regressions = compare(results, baseline, args.threshold)
+        if regressions:
+            print(f"\n{len(regressions)} regression(s) over {args.threshold:.0%}: {', '.join(regressions)}")
+            return 1
+        print(f"\nNo regressions over {args.threshold:.0%}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,3 @@
+import os
+
+DATA_PATH = os.path.join(os.path.dirname(__file__), '..', 'app', 'data', 'sample_nutrition_data.csv')
@@ -0,0 +1,13 @@
+import pytest
+
+from app.services.model_trainer import NutritionStrokeModel
+
+from . import DATA_PATH
+
+
+@pytest.fixture(scope='session', params=[None, 4], ids=['in_memory', 'streaming'])
+def trained_model(request):
+    """A model trained on the bundled data, loaded whole and streamed in chunks."""
+    model = NutritionStrokeModel()
+    model.train(DATA_PATH, model_dir=None, synthetic_samples=1000, synthetic_seed=0, chunksize=request.param)
+    return model
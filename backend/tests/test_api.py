@@ -0,0 +1,202 @@
+import asyncio
+import json
+import os
+
+import pytest
+from fastapi.encoders import jsonable_encoder
+from fastapi.testclient import TestClient
+
+from app import main
+from app.config import settings
+from app.services.model_registry import ModelRegistry
+
+PATIENT = {
+    'age': 67, 'gender': 'Male', 'bmi': 36.6, 'hypertension': 0, 'heart_disease': 1,
+    'avg_glucose_level': 228.69, 'smoking_status': 'formerly smoked',
+}
+
+
+@pytest.fixture
+def client(trained_model, tmp_path, monkeypatch):
+    registry = ModelRegistry(str(tmp_path))
+    registry.publish(trained_model)
+    monkeypatch.setattr(main, 'registry', registry)
+    monkeypatch.setattr(settings, 'prediction_cache_size', 0)
+    with TestClient(main.app) as client:
+        yield client
+
+
+@pytest.mark.parametrize('serving_mode', ['standard', 'fast'])
+def test_batch_reports_non_object_records_individually(client, monkeypatch, serving_mode):
+    monkeypatch.setattr(settings, 'serving_mode', serving_mode)
+    response = client.post('/analyze/batch', json={'patients': [PATIENT, 5, 'patient', None, {'age': 'old'}]})
+
+    assert response.status_code == 200
+    results = response.json()['results']
+    assert [item['index'] for item in results] == [0, 1, 2, 3, 4]
+    assert results[0]['result'] is not None
+    for item in results[1:4]:
+        assert item['error'] == 'Patient record must be an object'
+    assert results[4]['result'] is None and results[4]['error']
+
+
+@pytest.mark.parametrize('query', ['', '?explain=true'])
+def test_fast_mode_answers_like_standard_mode(client, monkeypatch, query):
+    bodies = [
+        PATIENT,
+        dict(PATIENT, nutrition_data={'calories': 2100, 'sodium_mg': 2500}),
+        dict(PATIENT, age='67'),
+        dict(PATIENT, bmi=None),
+        {'age': 67},
+    ]
+    responses = {}
+    for serving_mode in ('standard', 'fast'):
+        monkeypatch.setattr(settings, 'serving_mode', serving_mode)
+        responses[serving_mode] = [client.post('/analyze' + query, json=body) for body in bodies]
+
+    for standard, fast in zip(responses['standard'], responses['fast']):
+        assert (fast.status_code, fast.json()) == (standard.status_code, standard.json())
+
+
+def test_failed_reload_keeps_current_version_serving(client, trained_model, monkeypatch):
+    monkeypatch.setattr(settings, 'admin_token', 'secret')
+    registry = main.registry
+    serving = registry.current_version()
+    corrupted = registry.publish(trained_model)
+    registry.activate(serving)
+    name = sorted(registry.read_manifest(corrupted)['files'])[0]
+    with open(os.path.join(registry.version_dir(corrupted), name), 'ab') as f:
+        f.write(b'corrupted')
+
+    response = client.post(
+        '/admin/models/reload', json={'version': corrupted}, headers={'X-Admin-Token': 'secret'}
+    )
+
+    assert response.status_code == 400
+    assert 'Checksum mismatch' in response.json()['detail']
+    assert registry.current_version() == serving
+    assert client.get('/health').json()['model_version'] == serving
+    assert client.post('/analyze', json=PATIENT).status_code == 200
+
+
+def post_ndjson(client, lines):
+    body = b''.join(line if isinstance(line, bytes) else json.dumps(line).encode() + b'\n' for line in lines)
+    response = client.post('/analyze/stream', content=body, headers={'Content-Type': 'application/x-ndjson'})
+    assert response.status_code == 200
+    assert response.headers['content-type'].startswith('application/x-ndjson')
+    return [json.loads(line) for line in response.text.splitlines()]
+
+
+@pytest.mark.parametrize('serving_mode', ['standard', 'fast'])
+def test_stream_answers_every_line_in_order(client, monkeypatch, serving_mode):
+    monkeypatch.setattr(settings, 'serving_mode', serving_mode)
+    # More records than the first chunk holds, with blank lines and bad records among them
+    patients = [dict(PATIENT, age=30 + i) for i in range(40)]
+    lines = patients[:10] + [b'{"age": \n', b'\n', {'age': 'old'}, b'   \n'] + patients[10:]
+
+    results = post_ndjson(client, lines)
+
+    assert [item['index'] for item in results] == list(range(42))
+    assert all('result' in item for item in results[:10] + results[12:])
+    assert results[10]['error'] and 'result' not in results[10]
+    assert 'age' in results[11]['error'] and 'result' not in results[11]
+    # Batch results list the optional fields the stream leaves out as null
+    expected = client.post('/analyze/batch', json={'patients': patients}).json()['results']
+    expected = [{k: v for k, v in item['result'].items() if v is not None} for item in expected]
+    assert [item['result'] for item in results[:10] + results[12:]] == expected
+
+
+@pytest.mark.parametrize('newline', [b'\n', b''])
+def test_stream_refuses_lines_over_1_mib(client, newline):
+    too_long = b'{"age": "' + b'x' * main.MAX_NDJSON_LINE_BYTES + b'"}' + newline
+    results = post_ndjson(client, [PATIENT, too_long, PATIENT])
+
+    assert len(results) == 2
+    assert results[0]['index'] == 0 and 'result' in results[0]
+    assert results[1] == {'error': f"Line 1 is longer than {main.MAX_NDJSON_LINE_BYTES} bytes"}
+
+
+def test_stream_accepts_a_line_of_exactly_1_mib(client):
+    line = json.dumps(PATIENT).encode()
+    line = line[:-1] + b' ' * (main.MAX_NDJSON_LINE_BYTES - len(line)) + b'}'
+    assert len(line) == main.MAX_NDJSON_LINE_BYTES
+
+    results = post_ndjson(client, [line + b'\n'])
+    assert results[0]['index'] == 0 and 'result' in results[0]
+
+
+@pytest.mark.parametrize('serving_mode', ['standard', 'fast'])
+def test_saturated_executor_answers_503(client, monkeypatch, serving_mode):
+    monkeypatch.setattr(settings, 'serving_mode', serving_mode)
+    executor = main.app.state.executor
+    with monkeypatch.context() as patch:
+        patch.setattr(executor, '_in_flight', executor.capacity)
+        responses = [
+            client.post('/analyze', json=PATIENT),
+            client.post('/analyze/batch', json={'patients': [PATIENT, PATIENT]}),
+        ]
+
+    for response in responses:
+        assert response.status_code == 503
+        assert response.headers['retry-after'] == '1'
+        assert 'Inference queue is full' in response.json()['detail']
+    assert executor.stats()['rejected'] == 2
+    assert client.post('/analyze', json=PATIENT).status_code == 200
+
+
+def test_micro_batch_results_go_back_to_their_requests(client):
+    patients = [dict(PATIENT, age=30), dict(PATIENT, age=80), dict(PATIENT, bmi=22)]
+    # The batcher receives validated records
+    records = [main.PatientData.parse_obj(patient).dict() for patient in patients]
+    items = [(records[0], True), (records[1], False), (records[2], True)]
+
+    results = asyncio.run(main.score_micro_batch(items))
+
+    for patient, (_, explain), result in zip(patients, items, results):
+        expected = client.post('/analyze' + ('?explain=true' if explain else ''), json=patient).json()
+        assert {k: v for k, v in expected.items() if v is not None} == jsonable_encoder(result)
+        assert ('explanation' in result) == explain
+
+
+def parse_metrics(text):
+    """Samples of a Prometheus text exposition, keyed by name and label string."""
+    families, samples = {}, {}
+    for line in text.splitlines():
+        if line.startswith('# TYPE '):
+            _, _, name, kind = line.split(' ')
+            families[name] = kind
+        elif line and not line.startswith('#'):
+            key, value = line.rsplit(' ', 1)
+            name, _, labels = key.partition('{')
+            samples[name, labels.rstrip('}')] = float(value)
+    return families, samples
+
+
+def test_metrics_exposition(client, monkeypatch):
+    for _ in range(2):
+        assert client.post('/analyze', json=PATIENT).status_code == 200
+
+    response = client.get('/metrics')
+    assert response.status_code == 200
+    assert response.headers['content-type'].startswith('text/plain; version=0.0.4')
+    families, samples = parse_metrics(response.text)
+
+    for name, _ in samples:
+        base = name.rsplit('_', 1)[0] if name.endswith(('_bucket', '_sum', '_count')) else name
+        assert name in families or families.get(base) == 'histogram'
+
+    labels = 'path="/analyze",status="200"'
+    name = 'neuronutri_http_request_duration_seconds'
+    buckets = [value for (sample, sample_labels), value in samples.items()
+               if sample == f"{name}_bucket" and sample_labels.startswith(labels + ',')]
+    assert buckets == sorted(buckets)
+    assert buckets[-1] == samples[f"{name}_bucket", labels + ',le="+Inf"'] == samples[f"{name}_count", labels] >= 2
+    assert samples['neuronutri_request_stage_seconds_count', 'stage="predict"'] >= 2
+
+    model = main.app.state.model
+    assert samples['neuronutri_model_info', f'version="{model.version}",variant="{model.variant}"'] == 1
+    assert samples['neuronutri_inference_capacity', ''] == main.app.state.executor.capacity
+    assert samples['neuronutri_inference_rejected_total', ''] == 0
+
+    monkeypatch.setattr(main.METRICS, 'enabled', False)
+    assert client.get('/metrics').status_code == 404
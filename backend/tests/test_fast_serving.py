@@ -0,0 +1,91 @@
+import random
+from typing import Dict, Optional
+
+import pytest
+from pydantic import BaseModel, ValidationError, validator
+
+from app.main import PATIENT_VALIDATOR, PatientData
+from app.services.fast_serving import RecordValidator, parse_flag
+
+VALID = {
+    'age': 67, 'gender': 'Male', 'bmi': 36.6, 'hypertension': 0, 'heart_disease': 1,
+    'avg_glucose_level': 228.69, 'smoking_status': 'formerly smoked',
+    'nutrition_data': {'calories': 2100, 'sodium_mg': 1500.5},
+}
+
+# JSON values a client might send for any field
+VALUES = [None, 0, 1, -3, 45, 2.5, 0.0, 1e300, True, False, '', '45', '2.5', 'Male', 'abc',
+          [], [1], {}, {'calories': 2000}, {'calories': '2000'}, {'calories': None}, {'calories': True}]
+
+
+def mutations(n, seed=0):
+    rng = random.Random(seed)
+    fields = list(PatientData.__fields__) + ['extra']
+    for _ in range(n):
+        record = dict(VALID)
+        for name in rng.sample(fields, rng.randint(1, 3)):
+            if rng.random() < 0.2:
+                record.pop(name, None)
+            else:
+                record[name] = rng.choice(VALUES)
+        yield record
+
+
+def test_accepted_records_match_pydantic():
+    accepted = 0
+    for record in [VALID, *mutations(5000)]:
+        fast = PATIENT_VALIDATOR(record)
+        if fast is None:
+            continue
+        accepted += 1
+        expected = PatientData.parse_obj(record).dict()
+        assert fast == expected, record
+        assert {k: type(v) for k, v in fast.items()} == {k: type(v) for k, v in expected.items()}, record
+    # The validator must not just hand everything to pydantic
+    assert accepted > 500
+
+
+def test_records_needing_coercion_or_errors_are_left_to_pydantic():
+    for record in [
+        dict(VALID, age='45'),
+        dict(VALID, hypertension=True),
+        dict(VALID, hypertension=1.0),
+        dict(VALID, gender=None),
+        dict(VALID, nutrition_data={'calories': '2000'}),
+        {key: value for key, value in VALID.items() if key != 'bmi'},
+        [VALID],
+    ]:
+        assert PATIENT_VALIDATOR(record) is None, record
+
+
+def test_unsupported_models_are_rejected():
+    class Validated(BaseModel):
+        age: float
+
+        @validator('age')
+        def positive(cls, value):
+            return value
+
+    class Nested(BaseModel):
+        patient: PatientData
+
+    class IntKeys(BaseModel):
+        ages: Optional[Dict[int, float]]
+
+    for model in (Validated, Nested, IntKeys):
+        with pytest.raises(TypeError):
+            RecordValidator(model)
+
+
+@pytest.mark.parametrize('value, expected', [
+    (None, False), ('true', True), ('1', True), ('False', False), ('0', False), ('yes', None),
+])
+def test_parse_flag(value, expected):
+    assert parse_flag(value) is expected
+
+
+def test_pydantic_rejects_what_the_validator_rejects_for_missing_fields():
+    record = {key: value for key, value in VALID.items() if key != 'age'}
+    assert PATIENT_VALIDATOR(record) is None
+    with pytest.raises(ValidationError):
+        PatientData.parse_obj(record)
@@ -0,0 +1,49 @@
+import numpy as np
+import pytest
+from sklearn.ensemble import RandomForestClassifier
+from sklearn.metrics import roc_auc_score
+
+from app.services.forest_compaction import MIN_CLASS_ROWS, _candidate_aucs, compact_forest
+
+from .test_forest_compiler import make_data
+
+
+@pytest.fixture(scope='module')
+def forest():
+    X, y = make_data(2000, seed=0)
+    return RandomForestClassifier(n_estimators=60, max_depth=8, random_state=0).fit(X, y)
+
+
+def test_candidate_aucs_match_roc_auc_score():
+    rng = np.random.default_rng(0)
+    positive = rng.random(300) < 0.3
+    # Coarse scores, so most of them are tied
+    scores = np.vstack([rng.integers(0, 5, (10, 300)) / 4, rng.random((10, 300))])
+
+    expected = [roc_auc_score(positive, row) for row in scores]
+    np.testing.assert_allclose(_candidate_aucs(scores, positive), expected, rtol=0, atol=1e-12)
+
+
+def test_compacted_forest_stays_within_tolerances(forest):
+    X, y = make_data(3000, seed=1)
+    compact, report = compact_forest(forest, X, y, auc_tolerance=0.005, recall_tolerance=0.01)
+
+    assert len(forest.estimators_) == report['full_n_trees'] == 60
+    assert len(compact.estimators_) == compact.n_estimators == report['n_trees'] < 60
+    assert report['auc_drop_bound'] <= 0.005
+    assert report['recall_drop_bound'] <= 0.01
+    assert report['full_roc_auc'] - report['roc_auc'] <= 0.005
+    assert report['full_recall'] - report['recall'] <= 0.01
+    # The kept trees are shared with the full forest, in their original order
+    assert report['trees'] == sorted(report['trees'])
+    assert compact.estimators_ == [forest.estimators_[i] for i in report['trees']]
+    expected = np.mean([tree.predict_proba(X) for tree in compact.estimators_], axis=0)
+    np.testing.assert_allclose(compact.predict_proba(X), expected, rtol=0, atol=1e-12)
+
+
+def test_compaction_needs_enough_rows_of_each_outcome(forest):
+    X, y = make_data(3000, seed=1)
+    rows = np.concatenate([np.flatnonzero(y == 0), np.flatnonzero(y == 1)[:MIN_CLASS_ROWS - 1]])
+
+    with pytest.raises(ValueError):
+        compact_forest(forest, X[rows], y[rows])
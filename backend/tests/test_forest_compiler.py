@@ -0,0 +1,52 @@
+import pickle
+
+import numpy as np
+import pytest
+from sklearn.ensemble import RandomForestClassifier
+
+from app.services.forest_compiler import CompiledForest, compile_forest
+
+N_FEATURES = 6
+
+
+def make_data(n_rows, seed):
+    rng = np.random.default_rng(seed)
+    # Continuous and integer-coded columns, like the patient features
+    X = np.column_stack([
+        rng.normal(60, 15, n_rows), rng.integers(0, 2, n_rows), rng.normal(28, 5, n_rows),
+        rng.integers(0, 2, n_rows), rng.normal(110, 40, n_rows), rng.integers(0, 4, n_rows),
+    ]).astype(np.float32)
+    logit = 0.05 * (X[:, 0] - 60) + X[:, 1] + 0.02 * (X[:, 4] - 110) - 0.3 * X[:, 5]
+    y = (rng.random(n_rows) < 1 / (1 + np.exp(-logit))).astype(int)
+    return X, y
+
+
+@pytest.fixture(scope='module', params=[8, None], ids=['depth_8', 'unbounded'])
+def forest(request):
+    X, y = make_data(2000, seed=0)
+    return RandomForestClassifier(n_estimators=25, max_depth=request.param, random_state=0).fit(X, y)
+
+
+def test_predict_proba_matches_sklearn(forest):
+    compiled = CompiledForest.from_sklearn(forest)
+    X, _ = make_data(1000, seed=1)
+    # Rows sitting exactly on split thresholds exercise the <= comparison
+    X = np.vstack([X, compiled.probe_matrix(N_FEATURES)])
+
+    np.testing.assert_allclose(compiled.predict_proba(X), forest.predict_proba(X), rtol=0, atol=1e-12)
+
+
+def test_memory_mapped_forest_matches(forest, tmp_path):
+    compiled = CompiledForest.from_sklearn(forest)
+    compiled.save(str(tmp_path))
+    loaded = CompiledForest.load(str(tmp_path), mmap_mode='r')
+    X, _ = make_data(500, seed=2)
+
+    expected = forest.predict_proba(X)
+    np.testing.assert_allclose(loaded.predict_proba(X), expected, rtol=0, atol=1e-12)
+    # Pickled (e.g. for process-pool workers) as a reference to the files
+    np.testing.assert_allclose(pickle.loads(pickle.dumps(loaded)).predict_proba(X), expected, rtol=0, atol=1e-12)
+
+
+def test_compile_forest_verifies_against_sklearn(forest):
+    assert compile_forest(forest, N_FEATURES) is not None
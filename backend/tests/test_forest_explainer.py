@@ -0,0 +1,54 @@
+import numpy as np
+import pandas as pd
+import pytest
+from sklearn.ensemble import RandomForestClassifier
+
+from app.services.forest_compiler import CompiledForest
+from app.services.forest_explainer import ForestExplainer
+from app.services.model_registry import ModelRegistry
+
+from . import DATA_PATH
+from .test_forest_compiler import N_FEATURES, make_data
+
+
+@pytest.fixture(scope='module')
+def forest():
+    X, y = make_data(2000, seed=0)
+    return RandomForestClassifier(n_estimators=25, max_depth=8, random_state=0).fit(X, y)
+
+
+def test_contributions_sum_to_the_prediction(forest):
+    explainer = ForestExplainer.from_sklearn(forest, N_FEATURES)
+    compiled = CompiledForest.from_sklearn(forest)
+    X, _ = make_data(500, seed=1)
+    expected = forest.predict_proba(X)[:, 1]
+
+    for leaves in (explainer.sklearn_leaves(forest, X), compiled.apply(X)):
+        proba, contributions = explainer.explain(leaves)
+        np.testing.assert_allclose(proba, expected, rtol=0, atol=1e-12)
+        np.testing.assert_allclose(explainer.baseline + contributions.sum(axis=1), expected, rtol=0, atol=1e-12)
+
+
+def test_explained_predictions_add_up(trained_model):
+    patients = pd.read_csv(DATA_PATH).to_dict('records')
+    for result in trained_model.predict_stroke_risk_batch(patients, explain=True):
+        explanation = result['explanation']
+        total = explanation['baseline_risk'] + sum(explanation['contributions'].values())
+        assert total == pytest.approx(result['stroke_risk'], abs=1e-12)
+        assert list(explanation['contributions']) == sorted(
+            explanation['contributions'], key=lambda col: -abs(explanation['contributions'][col])
+        )
+
+
+def test_explanation_tables_are_built_on_first_use(trained_model, tmp_path):
+    registry = ModelRegistry(str(tmp_path))
+    model = registry.load(registry.publish(trained_model))
+    assert model.explainer is None
+
+    patient = pd.read_csv(DATA_PATH).to_dict('records')[0]
+    model.predict_stroke_risk_batch([patient])
+    assert model.explainer is None
+    explained = model.predict_stroke_risk_batch([patient], explain=True)[0]
+    assert model.explainer is not None
+    expected = trained_model.predict_stroke_risk_batch([patient])[0]['stroke_risk']
+    assert explained['stroke_risk'] == pytest.approx(expected, abs=1e-12)
@@ -0,0 +1,17 @@
+import numpy as np
+import pandas as pd
+
+from . import DATA_PATH
+
+
+def test_fast_path_matches_sklearn(trained_model):
+    patients = pd.read_csv(DATA_PATH).to_dict('records')
+    features, missing = trained_model._encode_batch(patients)
+    assert not missing.any()
+    expected = trained_model.stroke_model.predict_proba(features)[:, 1]
+
+    single = [trained_model.predict_stroke_risk(patient)['stroke_risk'] for patient in patients]
+    batch = [result['stroke_risk'] for result in trained_model.predict_stroke_risk_batch(patients)]
+    np.testing.assert_allclose(single, expected, rtol=0, atol=1e-12)
+    np.testing.assert_allclose(batch, expected, rtol=0, atol=1e-12)
+    np.testing.assert_array_equal(trained_model._encode_row(patients[0]), features[:1])
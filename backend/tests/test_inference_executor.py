@@ -0,0 +1,60 @@
+import asyncio
+import threading
+
+from app.services.inference_executor import ExecutorSaturated, InferenceExecutor
+
+
+def blocking_call(model, event, result):
+    event.wait(5)
+    return result
+
+
+async def run_saturated(wait):
+    executor = InferenceExecutor('thread', max_workers=1, queue_depth=0)
+    executor.start(model=None)
+    release = threading.Event()
+    try:
+        first = asyncio.create_task(executor.run(blocking_call, release, 'first'))
+        await asyncio.sleep(0.05)
+        second = asyncio.create_task(executor.run(blocking_call, release, 'second', wait=wait))
+        await asyncio.sleep(0.05)
+        stats = executor.stats()
+        release.set()
+        return await asyncio.gather(first, second, return_exceptions=True), stats
+    finally:
+        executor.shutdown()
+
+
+def test_saturated_executor_rejects_calls():
+    (first, second), stats = asyncio.run(run_saturated(wait=False))
+
+    assert first == 'first'
+    assert isinstance(second, ExecutorSaturated)
+    assert (stats['in_flight'], stats['rejected']) == (1, 1)
+
+
+def test_waiting_call_runs_once_a_worker_is_free():
+    (first, second), stats = asyncio.run(run_saturated(wait=True))
+
+    assert (first, second) == ('first', 'second')
+    assert (stats['in_flight'], stats['rejected']) == (1, 0)
+
+
+def test_cancelled_waiter_passes_its_slot_on():
+    async def scenario():
+        executor = InferenceExecutor('thread', max_workers=1, queue_depth=0)
+        executor.start(model=None)
+        release = threading.Event()
+        try:
+            first = asyncio.create_task(executor.run(blocking_call, release, 'first'))
+            await asyncio.sleep(0.05)
+            cancelled = asyncio.create_task(executor.run(blocking_call, release, 'cancelled', wait=True))
+            waiting = asyncio.create_task(executor.run(blocking_call, release, 'waiting', wait=True))
+            await asyncio.sleep(0.05)
+            cancelled.cancel()
+            release.set()
+            return await asyncio.wait_for(asyncio.gather(first, waiting), 5)
+        finally:
+            executor.shutdown()
+
+    assert asyncio.run(scenario()) == ['first', 'waiting']
@@ -0,0 +1,22 @@
+import numpy as np
+
+from . import DATA_PATH
+
+# A day's intake in the range of the bundled patients' logs
+TYPICAL_LOG = {
+    'calories': 1900, 'protein_g': 80, 'fat_g': 60, 'carbs_g': 260, 'fiber_g': 26,
+    'sugar_g': 100, 'sodium_mg': 1500, 'potassium_mg': 3100, 'cholesterol_mg': 180,
+    'vitamin_a_iu': 4600, 'vitamin_c_mg': 80, 'calcium_mg': 1000, 'iron_mg': 7.5,
+}
+
+
+def test_scaler_is_fitted_on_real_rows(trained_model):
+    real = trained_model.load_data(DATA_PATH)[trained_model.nutrition_columns].to_numpy(dtype=np.float64)
+    np.testing.assert_allclose(trained_model.nutrition_scaler.mean_, real.mean(axis=0))
+    np.testing.assert_allclose(trained_model.nutrition_scaler.scale_, real.std(axis=0))
+
+
+def test_typical_log_is_typical(trained_model):
+    analysis, _ = trained_model.analyze_nutrient_intake_batch([TYPICAL_LOG], [{}])[0]
+    for col, entry in analysis['nutrients'].items():
+        assert entry['population'] == 'typical', (col, entry['z_score'])
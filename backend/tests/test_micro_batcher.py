@@ -0,0 +1,56 @@
+import asyncio
+
+import pytest
+
+from app.services.micro_batcher import MicroBatcher
+
+
+class RecordingScorer:
+    def __init__(self):
+        self.batches = []
+
+    async def __call__(self, items):
+        self.batches.append(list(items))
+        return [item * 10 for item in items]
+
+
+def submit_all(batcher, items):
+    async def run():
+        return await asyncio.gather(*(batcher.submit(item) for item in items))
+    return asyncio.run(run())
+
+
+def test_concurrent_items_share_one_batch():
+    scorer = RecordingScorer()
+    batcher = MicroBatcher(scorer, max_batch_size=32, max_wait_ms=20)
+
+    assert submit_all(batcher, [1, 2, 3, 4, 5]) == [10, 20, 30, 40, 50]
+    assert scorer.batches == [[1, 2, 3, 4, 5]]
+    stats = batcher.stats()
+    assert (stats['batches'], stats['items'], stats['flushed_full'], stats['flushed_timeout']) == (1, 5, 0, 1)
+
+
+def test_full_batches_are_scored_without_waiting():
+    scorer = RecordingScorer()
+    batcher = MicroBatcher(scorer, max_batch_size=3, max_wait_ms=20)
+
+    assert submit_all(batcher, list(range(7))) == [0, 10, 20, 30, 40, 50, 60]
+    assert scorer.batches == [[0, 1, 2], [3, 4, 5], [6]]
+    stats = batcher.stats()
+    assert (stats['flushed_full'], stats['flushed_timeout']) == (2, 1)
+    assert stats['mean_batch_size'] == pytest.approx(7 / 3)
+    # Cumulative buckets: batches of at most N items
+    histogram = stats['batch_size_histogram']
+    assert (histogram['le_1'], histogram['le_2'], histogram['le_4'], histogram['le_256'], histogram['le_inf']) == (1, 1, 3, 3, 3)
+
+
+def test_scoring_errors_reach_every_caller():
+    async def failing(items):
+        raise RuntimeError("model failed")
+
+    async def run():
+        batcher = MicroBatcher(failing, max_wait_ms=1)
+        return await asyncio.gather(*(batcher.submit(item) for item in range(3)), return_exceptions=True)
+
+    results = asyncio.run(run())
+    assert all(isinstance(result, RuntimeError) for result in results)
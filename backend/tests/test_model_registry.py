@@ -0,0 +1,38 @@
+from datetime import datetime, timezone
+
+from app.services import model_registry
+from app.services.model_registry import ModelRegistry
+
+
+class FrozenDatetime(datetime):
+    @classmethod
+    def now(cls, tz=None):
+        return datetime(2026, 1, 1, tzinfo=timezone.utc)
+
+
+def test_publishes_at_the_same_time_get_distinct_versions(trained_model, tmp_path, monkeypatch):
+    monkeypatch.setattr(model_registry, 'datetime', FrozenDatetime)
+    registry = ModelRegistry(str(tmp_path))
+    first = registry.publish(trained_model)
+    second = registry.publish(trained_model)
+
+    assert first != second
+    assert registry.list_versions() == sorted([first, second])
+    assert registry.current_version() == second
+    for version in (first, second):
+        assert registry.read_manifest(version)['version'] == version
+        assert registry.load(version).version == version
+
+
+def test_versions_are_hashed_once(trained_model, tmp_path, monkeypatch):
+    version = ModelRegistry(str(tmp_path)).publish(trained_model)
+    hashed = []
+    sha256 = model_registry._file_sha256
+    monkeypatch.setattr(model_registry, '_file_sha256', lambda path: hashed.append(path) or sha256(path))
+
+    registry = ModelRegistry(str(tmp_path))
+    registry.load(version)
+    n_files = len(registry.read_manifest(version)['files'])
+    assert len(hashed) == n_files
+    registry.load(version)
+    assert len(hashed) == n_files
@@ -0,0 +1,79 @@
+import copy
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from app.services.model_trainer import _population_stability_index
+
+from . import DATA_PATH
+
+
+@pytest.fixture
+def model(trained_model):
+    # update() modifies the model in place
+    return copy.deepcopy(trained_model)
+
+
+@pytest.fixture
+def new_records():
+    records = pd.concat([pd.read_csv(DATA_PATH)] * 4, ignore_index=True)
+    records.loc[::3, 'smoking_status'] = 'vapes'
+    return records
+
+
+def test_new_categories_are_appended_without_renumbering(model, new_records):
+    old_classes = {col: list(encoder.classes_) for col, encoder in model.encoders.items()}
+    assert 'vapes' not in old_classes['smoking_status']
+
+    model.update(new_records, n_new_trees=5)
+
+    for col, classes in old_classes.items():
+        assert list(model.encoders[col].classes_[:len(classes)]) == classes
+    assert list(model.encoders['smoking_status'].classes_[len(old_classes['smoking_status']):]) == ['vapes']
+    assert model._encoder_tables['smoking_status']['vapes'] == len(old_classes['smoking_status'])
+
+
+def test_warm_start_grows_trees_and_max_trees_drops_the_oldest(model, new_records):
+    old_trees = list(model.stroke_model.estimators_)
+    n_trees = len(old_trees)
+
+    drift = model.update(new_records, n_new_trees=5)
+    grown = list(model.stroke_model.estimators_)
+    assert (drift['trees_added'], drift['trees_dropped'], drift['n_trees']) == (5, 0, n_trees + 5)
+    assert len(grown) == model.stroke_model.n_estimators == n_trees + 5
+    assert all(new is old for new, old in zip(grown, old_trees))
+
+    drift = model.update(new_records, n_new_trees=5, max_trees=n_trees)
+    trees = model.stroke_model.estimators_
+    assert (drift['trees_dropped'], drift['n_trees']) == (10, n_trees)
+    assert len(trees) == model.stroke_model.n_estimators == n_trees
+    assert all(new is old for new, old in zip(trees, grown[10:]))
+    assert not any(tree is old for tree in trees for old in grown[:10])
+
+
+def test_drift_metrics(model):
+    old = np.array([0.1, 0.3, 0.6, 0.8])
+    new = np.array([0.1, 0.6, 0.6, 0.2])
+
+    drift = model._drift_metrics(old, new, np.array([0, 1, 1, 0]))
+    assert drift['mean_abs_risk_shift'] == pytest.approx(0.225)
+    assert drift['max_abs_risk_shift'] == pytest.approx(0.6)
+    # Moderate -> High and High -> Moderate
+    assert drift['category_flip_rate'] == 0.5
+    assert drift['risk_psi'] == _population_stability_index(old, new)
+    assert (drift['old_roc_auc'], drift['new_roc_auc']) == (0.5, 1.0)
+
+    drift = model._drift_metrics(old, new, np.zeros(4, dtype=int))
+    assert drift['old_roc_auc'] is None and drift['new_roc_auc'] is None
+
+
+def test_population_stability_index():
+    expected = np.arange(100) / 100
+    assert _population_stability_index(expected, expected) == 0.0
+    assert _population_stability_index(np.full(100, 0.3), expected) == 0.0
+
+    # Half of the scores in the lowest decile and half in the highest
+    actual = np.concatenate([np.full(50, 0.01), np.full(50, 0.99)])
+    psi = 2 * (0.5 - 0.1) * np.log(0.5 / 0.1) + 8 * (1e-4 - 0.1) * np.log(1e-4 / 0.1)
+    assert _population_stability_index(expected, actual) == pytest.approx(psi)
@@ -0,0 +1,65 @@
+import asyncio
+import threading
+
+from app.services.prediction_cache import DiskCache, MemoryCache, PredictionCache
+
+
+class ThreadRecordingCache(DiskCache):
+    """DiskCache that records the thread of every call."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.threads = []
+
+    def get(self, key):
+        self.threads.append(threading.get_ident())
+        return super().get(key)
+
+    def set(self, key, value):
+        self.threads.append(threading.get_ident())
+        super().set(key, value)
+
+
+def test_shared_backend_runs_off_the_event_loop(tmp_path):
+    shared = ThreadRecordingCache(str(tmp_path / 'cache.sqlite3'))
+
+    async def scenario():
+        writer = PredictionCache(MemoryCache(), shared)
+        writer.set_async('key', {'stroke_risk': 0.25})
+        # The write isn't awaited; wait for it to land
+        for _ in range(100):
+            if DiskCache.get(shared, 'key') is not None:
+                break
+            await asyncio.sleep(0.01)
+        reader = PredictionCache(MemoryCache(), shared)
+        value = await reader.get_async('key')
+        return threading.get_ident(), value, reader.stats()
+
+    loop_thread, value, stats = asyncio.run(scenario())
+    assert value == {'stroke_risk': 0.25}
+    assert stats['shared_hits'] == 1
+    assert shared.threads and loop_thread not in shared.threads
+
+
+class FailingCache:
+    def get(self, key):
+        return None
+
+    def set(self, key, value):
+        raise ConnectionError("backend unavailable")
+
+
+def test_failed_background_writes_are_reported(capsys):
+    async def scenario():
+        cache = PredictionCache(MemoryCache(), FailingCache())
+        cache.set_async('key', {'stroke_risk': 0.25})
+        for _ in range(100):
+            if cache.stats()['shared_errors']:
+                break
+            await asyncio.sleep(0.01)
+        return cache
+
+    cache = asyncio.run(scenario())
+    assert cache.stats()['shared_errors'] == 1
+    assert cache.memory.get('key') == {'stroke_risk': 0.25}
+    assert "prediction cache write to FailingCache failed: ConnectionError('backend unavailable')" in capsys.readouterr().out
@@ -0,0 +1,70 @@
+from itertools import product
+
+import pytest
+
+from app.services.recommendation_engine import DEFAULT_ENGINE
+
+
+def reference(patient):
+    """The if-chain the rule table replaced."""
+    bmi = patient.get('bmi', 25)
+    stroke_risk = patient.get('stroke_risk', 0.5)
+    recommendations = []
+    if bmi >= 30:
+        recommendations += ["Reduce daily caloric intake by 500-1000 kcal for weight loss.",
+                            "Focus on whole, unprocessed foods."]
+    if stroke_risk > 0.7:
+        recommendations += ["Follow a DASH (Dietary Approaches to Stop Hypertension) diet.",
+                            "Limit sodium intake to less than 1,500 mg per day.",
+                            "Increase potassium-rich foods like bananas, spinach, and sweet potatoes."]
+    recommendations += ["Consume at least 5 servings of fruits and vegetables daily.",
+                        "Choose whole grains over refined grains.",
+                        "Include fatty fish (like salmon) twice a week for omega-3 fatty acids.",
+                        "Stay hydrated with water and limit sugary beverages."]
+
+    age = patient.get('age', 50)
+    gender = patient.get('gender', 'male')
+    goals = {
+        'calories': 2000 if gender == 'male' else 1800,
+        'protein_g': 56 if gender == 'male' else 46,
+        'fiber_g': 30,
+        'sodium_mg': 1500 if patient.get('hypertension', 0) else 2300,
+        'sugar_g': 25
+    }
+    if age > 50:
+        goals['calories'] = max(1600, goals['calories'] - 200)
+        goals['calcium_mg'] = 1200
+        goals['vitamin_d_iu'] = 800
+    return tuple(recommendations), goals
+
+
+# Values on and around every rule boundary, plus a missing field
+GRID = {
+    'age': [30, 50, 50.5, 80, None],
+    'gender': ['male', 'female', 'Male', None],
+    'hypertension': [0, 1, None],
+    'bmi': [22, 29.99, 30, 35, None],
+    'stroke_risk': [0.1, 0.2, 0.5, 0.7, 0.7001, 0.9, None],
+}
+PATIENTS = [
+    {field: value for field, value in zip(GRID, values) if value is not None}
+    for values in product(*GRID.values())
+]
+
+
+@pytest.mark.parametrize('lookup', ['lookup', 'lookup_batch', 'lookup_columns'])
+def test_rule_table_matches_the_original_rules(lookup):
+    if lookup == 'lookup':
+        patients = PATIENTS
+        results = [DEFAULT_ENGINE.lookup(patient) for patient in patients]
+    elif lookup == 'lookup_batch':
+        patients = PATIENTS
+        results = DEFAULT_ENGINE.lookup_batch(patients)
+    else:
+        # Columns cover every field, so only patients that have them all
+        patients = [patient for patient in PATIENTS if len(patient) == len(GRID)]
+        columns = {field: [patient[field] for patient in patients] for field in GRID}
+        results = DEFAULT_ENGINE.lookup_columns(columns, len(patients))
+
+    for patient, (recommendations, goals) in zip(patients, results):
+        assert (recommendations, dict(goals)) == reference(patient), patient
@@ -0,0 +1,82 @@
+import os
+
+import pandas as pd
+import pytest
+
+from app.services.model_registry import ModelRegistry
+from app.services.model_trainer import NutritionStrokeModel, score_file
+
+from . import DATA_PATH
+
+
+@pytest.fixture
+def job(trained_model, tmp_path):
+    ModelRegistry(str(tmp_path / 'models')).publish(trained_model)
+    cohort = pd.concat([pd.read_csv(DATA_PATH)] * 5, ignore_index=True)
+    cohort.insert(0, 'patient_id', [f"p{i}" for i in range(len(cohort))])
+    input_path = str(tmp_path / 'cohort.csv')
+    cohort.to_csv(input_path, index=False)
+    return {'input_path': input_path, 'models_dir': str(tmp_path / 'models'), 'chunksize': 7,
+            'n_workers': 1, 'id_column': 'patient_id'}
+
+
+def run_interrupted(job, output_path, monkeypatch, failing_chunk):
+    """Run the job until scoring chunk number ``failing_chunk`` (1-based) fails."""
+    score_frame = NutritionStrokeModel.score_frame
+    calls = []
+
+    def failing_score_frame(self, chunk):
+        calls.append(len(chunk))
+        if len(calls) == failing_chunk:
+            raise RuntimeError("worker died")
+        return score_frame(self, chunk)
+
+    with monkeypatch.context() as patch:
+        patch.setattr(NutritionStrokeModel, 'score_frame', failing_score_frame)
+        with pytest.raises(RuntimeError):
+            score_file(output_path=output_path, **job)
+
+
+def test_resume_continues_after_the_last_complete_chunk(job, tmp_path, monkeypatch):
+    expected_path = str(tmp_path / 'expected.csv')
+    score_file(output_path=expected_path, **job)
+
+    output_path = str(tmp_path / 'scores.csv')
+    run_interrupted(job, output_path, monkeypatch, failing_chunk=4)
+    assert os.path.exists(output_path + '.progress.json')
+    # Part of a chunk written before the crash is cut off on resume
+    with open(output_path, 'a') as f:
+        f.write('21,p21,0.1')
+
+    summary = score_file(output_path=output_path, **job)
+    assert summary['rows'] == 50
+    assert summary['rows_scored'] == 50 - 3 * 7
+    assert not os.path.exists(output_path + '.progress.json')
+    with open(output_path) as f, open(expected_path) as g:
+        assert f.read() == g.read()
+
+
+def test_resume_refuses_a_changed_input(job, tmp_path, monkeypatch):
+    output_path = str(tmp_path / 'scores.csv')
+    run_interrupted(job, output_path, monkeypatch, failing_chunk=2)
+
+    with open(job['input_path'], 'a') as f:
+        f.write('p50,' + open(DATA_PATH).read().splitlines()[1] + '\n')
+    with pytest.raises(ValueError):
+        score_file(output_path=output_path, **job)
+    # Without resume the job starts over
+    assert score_file(output_path=output_path, resume=False, **job)['rows'] == 51
+
+
+def test_missing_categorical_values_are_errors(trained_model):
+    chunk = pd.read_csv(DATA_PATH, nrows=3, dtype={'gender': str, 'smoking_status': str})
+    chunk.loc[1, 'gender'] = None
+    chunk.loc[2, 'smoking_status'] = float('nan')
+
+    scores = trained_model.score_frame(chunk)
+
+    assert scores.loc[0, 'error'] is None and scores.loc[0, 'stroke_risk'] >= 0
+    assert scores.loc[1, 'error'] == 'Missing or invalid values for: gender'
+    assert scores.loc[2, 'error'] == 'Missing or invalid values for: smoking_status'
+    assert scores.loc[1:, 'stroke_risk'].isna().all()
+    assert scores.loc[1:, 'risk_category'].isna().all()
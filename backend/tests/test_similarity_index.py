@@ -0,0 +1,21 @@
+import numpy as np
+import pandas as pd
+
+from . import DATA_PATH
+
+
+def test_neighbors_have_real_labels(trained_model):
+    real = pd.read_csv(DATA_PATH, dtype=str)
+    patient = real.iloc[0].to_dict()
+    result = trained_model.find_similar_patients([patient], k=len(real))[0]
+
+    described = pd.DataFrame([neighbor['patient'] for neighbor in result['neighbors']])
+    for col in trained_model.encoders:
+        assert set(described[col]) <= set(real[col].str.strip()), col
+
+
+def test_nutrition_is_scaled_with_cohort_statistics(trained_model):
+    real = pd.read_csv(DATA_PATH)[trained_model.nutrition_columns].to_numpy(dtype=np.float64)
+    index = trained_model.similarity_index
+    np.testing.assert_allclose(index.nutrition_mean, real.mean(axis=0))
+    np.testing.assert_allclose(index.nutrition_scale, real.std(axis=0))
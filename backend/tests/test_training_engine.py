@@ -0,0 +1,84 @@
+import numpy as np
+import pytest
+from imblearn.over_sampling import SMOTE
+from sklearn.ensemble import RandomForestClassifier
+from sklearn.model_selection import StratifiedKFold
+
+from app.services import training_engine
+from app.services.training_engine import TrainingEngine, smote_pipeline
+
+from .test_forest_compiler import make_data
+
+BASE_PARAMS = {'n_estimators': 10, 'random_state': 0}
+PARAM_GRID = {'max_depth': [3, 6]}
+
+
+@pytest.fixture(scope='module')
+def data():
+    X, y = make_data(400, seed=0)
+    # Keep a minority class for SMOTE to oversample
+    rows = np.concatenate([np.flatnonzero(y == 0), np.flatnonzero(y == 1)[:60]])
+    return X[rows], y[rows]
+
+
+def make_engine(**options):
+    return TrainingEngine(BASE_PARAMS, PARAM_GRID, cv=2, **options)
+
+
+def fit_forest(params, X, y):
+    pipeline = smote_pipeline(RandomForestClassifier(**params), y, random_state=42)
+    return pipeline.fit(X, y).named_steps['model']
+
+
+def test_pool_search_matches_inline_search(data):
+    _, inline = make_engine(n_workers=1).fit(*data)
+    _, pooled = make_engine(n_workers=2).fit(*data)
+
+    assert [result['params'] for result in pooled['search_results']] == [{'max_depth': 3}, {'max_depth': 6}]
+    assert pooled['search_results'] == inline['search_results']
+    assert pooled['best_params'] == inline['best_params']
+    assert pooled['cv_scores'] == inline['cv_scores']
+
+
+def test_smote_only_resamples_fold_training_rows(data, monkeypatch):
+    X, y = data
+    resampled, scored = [], []
+    fit_resample = SMOTE.fit_resample
+    get_scorer = training_engine.get_scorer
+
+    def recording_fit_resample(self, X, y):
+        resampled.append(X.copy())
+        return fit_resample(self, X, y)
+
+    def recording_get_scorer(scoring):
+        scorer = get_scorer(scoring)
+        return lambda model, X, y: scored.append(X.copy()) or scorer(model, X, y)
+
+    monkeypatch.setattr(SMOTE, 'fit_resample', recording_fit_resample)
+    monkeypatch.setattr(training_engine, 'get_scorer', recording_get_scorer)
+    make_engine(n_workers=1, refit='best_fold').fit(X, y)
+
+    folds = list(StratifiedKFold(n_splits=2).split(X, y))
+    # One resample per (candidate, fold), of that fold's training rows only
+    assert len(resampled) == len(scored) == 2 * len(folds)
+    for i, (train_idx, test_idx) in enumerate(folds * 2):
+        np.testing.assert_array_equal(resampled[i], X[train_idx])
+        # Held-out rows are scored as they are, without synthetic rows
+        np.testing.assert_array_equal(scored[i], X[test_idx])
+
+
+@pytest.mark.parametrize('refit', ['full', 'best_fold'])
+def test_refit_modes(data, refit):
+    X, y = data
+    model, report = make_engine(n_workers=1, refit=refit).fit(X, y)
+    params = {**BASE_PARAMS, **report['best_params'], 'n_jobs': 1}
+
+    if refit == 'full':
+        expected = fit_forest(params, X, y)
+        assert report['stage_timings']['refit'] >= 0
+    else:
+        train_idx, _ = list(StratifiedKFold(n_splits=2).split(X, y))[int(np.argmax(report['cv_scores']))]
+        expected = fit_forest(params, X[train_idx], y[train_idx])
+        assert report['stage_timings']['refit'] == 0.0
+    assert model.n_jobs == -1
+    np.testing.assert_array_equal(model.predict_proba(X), expected.predict_proba(X))